@@ -0,0 +1,396 @@
+# ===========================================
+# Fake Rebrickable
+# ===========================================
+#
+# A local stand-in for the Rebrickable API and its CSV download CDN, for
+# benchmarks. Point the server at it with
+#   REBRICKABLE_BASE_URL=http://127.0.0.1:<port>/api/v3
+#   REBRICKABLE_CDN_URL=http://127.0.0.1:<port>/media/downloads
+#
+# Serves a deterministic synthetic catalog and the user's part lists, with
+# configurable latency, page size limit, 429 throttling and bulk POST
+# behaviour. GET /_stats reports what it was asked for; POST /_reset puts
+# the part lists and counters back to their initial state.
+
+import argparse
+import asyncio
+import csv
+import io
+import math
+import random
+import time
+import zipfile
+from email.utils import formatdate
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+API = "/api/v3"
+WORDS = ["Brick", "Plate", "Tile", "Slope", "Round", "Technic", "Axle", "Pin", "Beam", "Wedge", "Panel", "Hinge", "Bracket", "Cone", "Arch"]
+
+# How a POST of a JSON array of parts treats parts already in the list
+BULK_MODES = ("add", "reject", "off")  # add to the quantity / fail the whole request / arrays not accepted
+
+
+class SyntheticCatalog:
+    """Every table the server downloads from the CDN, generated from a seed."""
+
+    def __init__(self, parts: int = 2000, sets: int = 300, seed: int = 1):
+        rng = random.Random(seed)
+        self.colors = [
+            (color_id, f"Color {color_id}" if color_id >= 0 else "[Unknown]", f"{rng.randrange(1 << 24):06X}", color_id % 7 == 3)
+            for color_id in range(-1, 60)
+        ]
+        color_ids = [c[0] for c in self.colors[1:]]
+        categories = [(i, f"{WORDS[i % len(WORDS)]}s {i}") for i in range(1, 40)]
+        self.parts = []
+        for i in range(parts):
+            part_num = str(3000 + i) if i % 3 else f"{3000 + i}pr{i % 7:04d}"
+            name = f"{rng.choice(WORDS)} {rng.randint(1, 4)} x {rng.randint(1, 12)} {rng.choice(WORDS)}"
+            self.parts.append((part_num, name, rng.randint(1, 39), "Plastic"))
+        part_nums = [p[0] for p in self.parts]
+        common = part_nums[:200]
+
+        set_rows = [(f"{10000 + i}-1", f"Set {i}", rng.randint(1990, 2025), rng.randint(1, 3), 0, "") for i in range(sets)]
+        inventories = [(i + 1, 1, s[0]) for i, s in enumerate(set_rows)]
+        inventory_parts = []
+        for inventory_id, _, _ in inventories:
+            seen = set()
+            for _ in range(rng.randint(20, 120)):
+                key = (rng.choice(common if rng.random() < 0.7 else part_nums), rng.choice(color_ids[:30]))
+                if key not in seen:
+                    seen.add(key)
+                    inventory_parts.append((inventory_id, key[0], key[1], rng.randint(1, 8), rng.random() < 0.2, ""))
+
+        self.tables = {
+            "colors": (["id", "name", "rgb", "is_trans"], self.colors),
+            "themes": (["id", "name", "parent_id"], [(1, "City", ""), (2, "Police", 1), (3, "Technic", "")]),
+            "part_categories": (["id", "name"], categories),
+            "parts": (["part_num", "name", "part_cat_id", "part_material"], self.parts),
+            "part_relationships": (
+                ["rel_type", "child_part_num", "parent_part_num"],
+                [(rng.choice("PMAB"), rng.choice(part_nums), rng.choice(part_nums)) for _ in range(parts // 4)],
+            ),
+            "elements": (
+                ["element_id", "part_num", "color_id", "design_id"],
+                [(str(300000 + i), rng.choice(part_nums), rng.choice(color_ids[:40]), "") for i in range(parts * 2)],
+            ),
+            "sets": (["set_num", "name", "year", "theme_id", "num_parts", "img_url"], set_rows),
+            "minifigs": (["fig_num", "name", "num_parts", "img_url"], [(f"fig-{i:06d}", f"Fig {i}", 4, "") for i in range(50)]),
+            "inventories": (["id", "version", "set_num"], inventories),
+            "inventory_parts": (["inventory_id", "part_num", "color_id", "quantity", "is_spare", "img_url"], inventory_parts),
+        }
+        self._zips: dict[str, bytes] = {}
+        self.last_modified = formatdate(usegmt=True)
+
+    def dump(self, name: str) -> bytes:
+        """{name}.csv.zip, built on first request."""
+        if name not in self._zips:
+            header, rows = self.tables[name]
+            text = io.StringIO()
+            writer = csv.writer(text)
+            writer.writerow(header)
+            writer.writerows(rows)
+            data = io.BytesIO()
+            with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(f"{name}.csv", text.getvalue())
+            self._zips[name] = data.getvalue()
+        return self._zips[name]
+
+    @staticmethod
+    def bricklink_id(part_num: str) -> str:
+        # BrickLink names printed parts differently; "pb" for "pr" stands in for its mapping
+        return part_num.replace("pr", "pb")
+
+    def color(self, color_id: int) -> dict:
+        for cid, name, rgb, is_trans in self.colors:
+            if cid == color_id:
+                # BrickLink numbers colors differently; offset ids stand in for its mapping
+                bricklink = {"BrickLink": {"ext_ids": [cid + 1], "ext_descrs": [[name]]}} if cid >= 0 else {}
+                return {"id": cid, "name": name, "rgb": rgb, "is_trans": is_trans, "external_ids": bricklink}
+        return {"id": color_id, "name": "Unknown", "rgb": "000000", "is_trans": False}
+
+
+def _part(part_num: str, name: str = "", part_cat_id: int = 0) -> dict:
+    return {"part_num": part_num, "name": name, "part_cat_id": part_cat_id, "part_url": "", "part_img_url": None}
+
+
+class FakeRebrickable:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate: float = 0.0,
+        burst: int = 10,
+        max_page_size: int = 1000,
+        bulk: str = "add",
+        lists: int = 2,
+        list_size: int = 500,
+        catalog: SyntheticCatalog | None = None,
+        seed: int = 1,
+    ):
+        if bulk not in BULK_MODES:
+            raise ValueError(f"bulk must be one of {BULK_MODES}")
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.burst = burst
+        self.max_page_size = max_page_size
+        self.bulk = bulk
+        self.catalog = catalog or SyntheticCatalog(seed=seed)
+        self.seed = seed
+        self.initial_lists = lists
+        self.initial_list_size = list_size
+        self._parts_by_num = {p[0]: p for p in self.catalog.parts}
+        self.reset()
+
+    def reset(self):
+        """Seed lists 1..n with `list_size` parts each and clear every counter."""
+        rng = random.Random(self.seed)
+        color_ids = [c[0] for c in self.catalog.colors[1:31]]
+        self.lists: dict[int, dict] = {}
+        for list_id in range(1, self.initial_lists + 1):
+            parts = {}
+            while len(parts) < min(self.initial_list_size, len(self.catalog.parts) * len(color_ids)):
+                parts[(rng.choice(self.catalog.parts)[0], rng.choice(color_ids))] = rng.randint(1, 20)
+            self.lists[list_id] = {"name": f"List {list_id}", "is_buildable": True, "parts": parts}
+        self.next_list_id = self.initial_lists + 1
+        self.requests: dict[str, int] = {}
+        self.throttled = 0
+        self.downloads = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    # ---- request plumbing ----
+
+    def _throttle(self) -> float:
+        """0 if a request may proceed, else seconds until the bucket has a token."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def api(self, path: str, handler, methods: list[str] | None = None) -> Route:
+        """Route to an API handler, counted, delayed and throttled like the real service."""
+        async def endpoint(request: Request):
+            route = f"{request.method} {path}"
+            self.requests[route] = self.requests.get(route, 0) + 1
+            if self.latency or self.jitter:
+                await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+            wait = self._throttle()
+            if wait:
+                self.throttled += 1
+                return JSONResponse(
+                    {"detail": "Request was throttled."}, status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+            body = await request.json() if request.method in ("POST", "PUT") else None
+            return await handler(request, body)
+        return Route(f"{API}{path}", endpoint, methods=methods or ["GET"])
+
+    def _page(self, request: Request, items: list) -> JSONResponse:
+        page = int(request.query_params.get("page", 1))
+        size = min(int(request.query_params.get("page_size", 100)), self.max_page_size)
+        start = (page - 1) * size
+        if start >= len(items) and page > 1:
+            return JSONResponse({"detail": "Invalid page."}, status_code=404)
+
+        def link(number: int) -> str:
+            return str(request.url.include_query_params(page=number, page_size=size))
+
+        return JSONResponse({
+            "count": len(items),
+            "next": link(page + 1) if start + size < len(items) else None,
+            "previous": link(page - 1) if page > 1 else None,
+            "results": items[start:start + size],
+        })
+
+    def _list(self, request: Request) -> dict | None:
+        return self.lists.get(request.path_params["list_id"])
+
+    def _list_item(self, list_id: int, part_num: str, color_id: int, quantity: int) -> dict:
+        part = self._parts_by_num.get(part_num)
+        return {
+            "list_id": list_id,
+            "quantity": quantity,
+            "part": _part(*part[:3]) if part else _part(part_num),
+            "color": self.catalog.color(color_id),
+        }
+
+    def _list_summary(self, list_id: int, data: dict) -> dict:
+        return {"id": list_id, "name": data["name"], "is_buildable": data["is_buildable"], "num_parts": sum(data["parts"].values())}
+
+    # ---- catalog ----
+
+    async def colors(self, request, body):
+        return self._page(request, [self.catalog.color(c[0]) for c in self.catalog.colors])
+
+    async def parts(self, request, body):
+        search = request.query_params.get("search", "").lower()
+        category = request.query_params.get("part_cat_id")
+        bricklink = request.query_params.get("bricklink_id")
+        found = [
+            _part(*p[:3]) for p in self.catalog.parts
+            if (not search or search in p[0].lower() or search in p[1].lower())
+            and (category is None or str(p[2]) == category)
+            and (bricklink is None or self.catalog.bricklink_id(p[0]) == bricklink)
+        ]
+        return self._page(request, found)
+
+    async def part(self, request, body):
+        part = self._parts_by_num.get(request.path_params["part_num"])
+        if part is None:
+            return JSONResponse({"detail": "Not found."}, status_code=404)
+        return JSONResponse(_part(*part[:3]))
+
+    async def part_colors(self, request, body):
+        part_num = request.path_params["part_num"]
+        if part_num not in self._parts_by_num:
+            return JSONResponse({"detail": "Not found."}, status_code=404)
+        color_ids = sorted({cid for _, pn, cid, *_ in self.catalog.tables["inventory_parts"][1] if pn == part_num})
+        return self._page(request, [
+            {"color_id": cid, "color_name": self.catalog.color(cid)["name"], "num_sets": 1, "num_set_parts": 1}
+            for cid in color_ids
+        ])
+
+    async def download(self, request: Request):
+        name = request.path_params["name"]
+        if name not in self.catalog.tables:
+            return Response(status_code=404)
+        if request.headers.get("if-modified-since") == self.catalog.last_modified:
+            return Response(status_code=304)
+        self.downloads += 1
+        return Response(
+            self.catalog.dump(name), media_type="application/zip",
+            headers={"Last-Modified": self.catalog.last_modified},
+        )
+
+    # ---- part lists ----
+
+    async def partlists(self, request, body):
+        if request.method == "POST":
+            list_id = self.next_list_id
+            self.next_list_id += 1
+            self.lists[list_id] = {"name": body.get("name", ""), "is_buildable": body.get("is_buildable", True), "parts": {}}
+            return JSONResponse(self._list_summary(list_id, self.lists[list_id]), status_code=201)
+        return self._page(request, [self._list_summary(list_id, data) for list_id, data in self.lists.items()])
+
+    async def partlist(self, request, body):
+        data = self._list(request)
+        if data is None:
+            return JSONResponse({"detail": "Not found."}, status_code=404)
+        list_id = request.path_params["list_id"]
+        if request.method == "DELETE":
+            del self.lists[list_id]
+            return Response(status_code=204)
+        if request.method == "PUT":
+            data.update({k: body[k] for k in ("name", "is_buildable") if k in body})
+        return JSONResponse(self._list_summary(list_id, data))
+
+    async def list_parts(self, request, body):
+        data = self._list(request)
+        if data is None:
+            return JSONResponse({"detail": "Not found."}, status_code=404)
+        list_id = request.path_params["list_id"]
+        if request.method == "GET":
+            return self._page(request, [self._list_item(list_id, pn, cid, qty) for (pn, cid), qty in data["parts"].items()])
+
+        items = body if isinstance(body, list) else [body]
+        if isinstance(body, list) and self.bulk == "off":
+            return JSONResponse({"detail": "Expected a dictionary of items."}, status_code=400)
+        keys = [(str(item["part_num"]), int(item["color_id"])) for item in items]
+        existing = [key for key in keys if key in data["parts"]]
+        if existing and (not isinstance(body, list) or self.bulk == "reject"):
+            return JSONResponse({"detail": f"Part already in list: {existing[0][0]} / {existing[0][1]}"}, status_code=400)
+        for key, item in zip(keys, items):
+            data["parts"][key] = data["parts"].get(key, 0) + int(item.get("quantity", 1))
+        created = [self._list_item(list_id, pn, cid, data["parts"][(pn, cid)]) for pn, cid in keys]
+        return JSONResponse(created if isinstance(body, list) else created[0], status_code=201)
+
+    async def list_part(self, request, body):
+        data = self._list(request)
+        key = (request.path_params["part_num"], request.path_params["color_id"])
+        if data is None or key not in data["parts"]:
+            return JSONResponse({"detail": "Not found."}, status_code=404)
+        if request.method == "DELETE":
+            del data["parts"][key]
+            return Response(status_code=204)
+        if request.method == "PUT":
+            data["parts"][key] = int(body["quantity"])
+        return JSONResponse(self._list_item(request.path_params["list_id"], *key, data["parts"][key]))
+
+    # ---- control ----
+
+    async def stats(self, request: Request):
+        return JSONResponse({
+            "requests": sum(self.requests.values()),
+            "by_route": self.requests,
+            "throttled": self.throttled,
+            "downloads": self.downloads,
+        })
+
+    async def reset_endpoint(self, request: Request):
+        self.reset()
+        return JSONResponse({"status": "reset"})
+
+    def app(self) -> Starlette:
+        lists = "/users/{user_token}/partlists"
+        return Starlette(routes=[
+            self.api("/lego/colors/", self.colors),
+            self.api("/lego/parts/", self.parts),
+            self.api("/lego/parts/{part_num}/", self.part),
+            self.api("/lego/parts/{part_num}/colors/", self.part_colors),
+            self.api(f"{lists}/", self.partlists, ["GET", "POST"]),
+            self.api(f"{lists}/{{list_id:int}}/", self.partlist, ["GET", "PUT", "DELETE"]),
+            self.api(f"{lists}/{{list_id:int}}/parts/", self.list_parts, ["GET", "POST"]),
+            self.api(f"{lists}/{{list_id:int}}/parts/{{part_num}}/{{color_id:int}}/", self.list_part, ["GET", "PUT", "DELETE"]),
+            Route("/media/downloads/{name}.csv.zip", self.download),
+            Route("/_stats", self.stats),
+            Route("/_reset", self.reset_endpoint, methods=["POST"]),
+        ])
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every API response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests/second before 429s (0 = never throttle)")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-page-size", type=int, default=1000)
+    parser.add_argument("--bulk", choices=BULK_MODES, default="add")
+    parser.add_argument("--catalog-parts", type=int, default=2000)
+    parser.add_argument("--catalog-sets", type=int, default=300)
+    parser.add_argument("--lists", type=int, default=2)
+    parser.add_argument("--list-size", type=int, default=500)
+
+def from_arguments(args: argparse.Namespace) -> FakeRebrickable:
+    return FakeRebrickable(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate=args.rate,
+        burst=args.burst,
+        max_page_size=args.max_page_size,
+        bulk=args.bulk,
+        lists=args.lists,
+        list_size=args.list_size,
+        catalog=SyntheticCatalog(parts=args.catalog_parts, sets=args.catalog_sets),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Rebrickable API and CDN")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(from_arguments(args).app(), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# ===========================================
+# Benchmark Runner
+# ===========================================
+#
+#   python -m bench.run                          # every scenario, default settings
+#   python -m bench.run search move_list --latency 0.05
+#   python -m bench.run --save baseline.json
+#   python -m bench.run --compare baseline.json  # exit 1 on a regression
+#
+# Starts bench/fake_rebrickable.py, then runs each scenario in its own
+# interpreter against it from a scratch directory (so ./cache starts empty
+# for cold_start and is reused by the scenarios after it). The fake's part
+# lists are reset between scenarios.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench import fake_rebrickable
+from bench.scenarios import SCENARIOS, free_port
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Run in this order: cold_start leaves the cache warm_start and the rest rely on
+ORDER = ["cold_start", "warm_start", "list_colors", "search", "move_list", "move_partial", "sse_sessions"]
+
+# Compared against a baseline; anything else in a result is informational
+MEASURES = ("wall_s", "upstream_calls", "peak_rss_mb")
+
+
+def start_fake(args) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    command = [sys.executable, "-m", "bench.fake_rebrickable", "--port", str(port)]
+    for option in ("latency", "jitter", "rate", "burst", "max_page_size", "bulk", "catalog_parts", "catalog_sets", "lists", "list_size"):
+        command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{url}/_stats")
+            return process, url
+        except httpx.TransportError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Fake Rebrickable server didn't start")
+
+def run_scenario(name: str, fake_url: str, workdir: Path, args) -> dict:
+    httpx.post(f"{fake_url}/_reset")
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(REPO_ROOT),
+        "REBRICKABLE_BASE_URL": f"{fake_url}/api/v3",
+        "REBRICKABLE_CDN_URL": f"{fake_url}/media/downloads",
+        "REBRICKABLE_API_KEY": "bench",
+        "REBRICKABLE_USER_TOKEN": "bench",
+        "REBRICKABLE_RATE_LIMIT": str(args.client_rate),
+        "REBRICKABLE_RATE_BURST": str(args.client_burst),
+        "REBRICKABLE_HTTP2": "0",
+        # The catalog never goes stale mid-run
+        "REBRICKABLE_CATALOG_REFRESH_HOURS": "100000",
+    }
+    command = [
+        sys.executable, "-m", "bench.scenarios", name, "--fake", fake_url,
+        "--iterations", str(args.iterations), "--parts", str(args.parts), "--sessions", str(args.sessions),
+    ]
+    child = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if child.returncode != 0:
+        return {"scenario": name, "error": child.stderr.strip().splitlines()[-1] if child.stderr.strip() else "failed"}
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+def _format(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}" if value < 100 else f"{value:.0f}"
+    return str(value)
+
+def report(results: list[dict]) -> str:
+    lines = [f"{'scenario':<14} {'wall s':>9} {'upstream':>9} {'peak MB':>9}  details"]
+    for result in results:
+        if "error" in result:
+            lines.append(f"{result['scenario']:<14} ERROR: {result['error']}")
+            continue
+        details = ", ".join(f"{k}={_format(v)}" for k, v in result.items() if k != "scenario" and k not in MEASURES)
+        lines.append(
+            f"{result['scenario']:<14} {_format(result['wall_s']):>9} {_format(result['upstream_calls']):>9}"
+            f" {_format(result['peak_rss_mb']):>9}  {details}"
+        )
+    return "\n".join(lines)
+
+def regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Measures worse than the baseline by more than `tolerance` (a fraction). Upstream calls must not grow at all."""
+    previous = {result["scenario"]: result for result in baseline}
+    found = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None or "error" in before:
+            continue
+        if "error" in result:
+            found.append(f"{result['scenario']}: failed ({result['error']})")
+            continue
+        for measure in MEASURES:
+            old, new = before.get(measure), result.get(measure)
+            if old is None or new is None:
+                continue
+            allowed = old if measure == "upstream_calls" else old * (1 + tolerance)
+            if new > allowed:
+                found.append(f"{result['scenario']}: {measure} {_format(old)} -> {_format(new)}")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the server against a local fake Rebrickable")
+    parser.add_argument("scenarios", nargs="*", help=f"Default: all ({', '.join(ORDER)})")
+    fake_rebrickable.add_arguments(parser)
+    parser.add_argument("--client-rate", type=float, default=100.0, help="Server's REBRICKABLE_RATE_LIMIT for the run")
+    parser.add_argument("--client-burst", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=500, help="Tool calls in list_colors/search")
+    parser.add_argument("--parts", type=int, default=100, help="Parts moved by move_partial")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent clients in sse_sessions")
+    parser.add_argument("--workdir", type=Path, help="Directory holding ./cache (default: a fresh temp dir)")
+    parser.add_argument("--save", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON from --save; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown/growth vs the baseline")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(ORDER)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    names = [name for name in ORDER if name in (args.scenarios or ORDER)]
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="rebrickable-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    fake, url = start_fake(args)
+    try:
+        results = []
+        for name in names:
+            results.append(run_scenario(name, url, workdir, args))
+            print(f"  {name}: done", file=sys.stderr)
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    print(report(results))
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        found = regressions(results, json.loads(args.compare.read_text()), args.tolerance)
+        if found:
+            print("\nRegressions:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
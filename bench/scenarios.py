@@ -0,0 +1,236 @@
+# ===========================================
+# Benchmark Scenarios
+# ===========================================
+#
+# Each scenario runs in a fresh interpreter (started by bench/run.py) so its
+# import cost and peak RSS are its own. Run one directly with
+#   python -m bench.scenarios <name> --fake http://127.0.0.1:<port>
+# from a scratch directory - scenarios read and write ./cache.
+#
+# Prints one JSON line: wall time of the timed section, upstream API calls
+# it made (as counted by the fake server), peak RSS, plus scenario details.
+# Scenarios without a Timed block are timed whole, imports included.
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+SCENARIOS = {}
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Fake:
+    """Client for the fake server's control endpoints."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    def stats(self) -> dict:
+        return httpx.get(f"{self.url}/_stats").json()
+
+    def requests(self) -> int:
+        return self.stats()["requests"]
+
+    def list_parts(self, list_id: int) -> list[dict]:
+        page = httpx.get(f"{self.url}/api/v3/users/bench/partlists/{list_id}/parts/", params={"page_size": 100000}).json()
+        return page["results"]
+
+
+class Timed:
+    """Wall time and upstream calls of a block - the part of a scenario being measured."""
+
+    def __init__(self, fake: Fake):
+        self.fake = fake
+
+    def __enter__(self):
+        self.before = self.fake.requests()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.start
+        self.calls = self.fake.requests() - self.before
+
+    def result(self, **details) -> dict:
+        return {"wall_s": self.wall, "upstream_calls": self.calls, **details}
+
+
+async def _call(mcp, tool: str, args: dict):
+    """Call a tool in-process and return what the tool returned."""
+    result = await mcp.call_tool(tool, args)
+    if isinstance(result, tuple):  # (content, structured output)
+        structured = result[1]
+        return structured.get("result", structured) if isinstance(structured, dict) else structured
+    return json.loads(result[0].text) if result else None
+
+
+# ===========================================
+# Scenarios
+# ===========================================
+
+@scenario
+async def cold_start(fake: Fake, args) -> dict:
+    """Empty cache: import the server, then download the dumps and build the catalog."""
+    shutil.rmtree("cache", ignore_errors=True)
+    start = time.perf_counter()
+    import src.main
+    src.main.create_app()
+    imported = time.perf_counter()
+    from src.rebrickable_mcp import cache
+    loaded = await asyncio.to_thread(cache.load_catalog)
+    return {
+        "import_s": imported - start,
+        "catalog_s": time.perf_counter() - imported,
+        "catalog_loaded": loaded,
+        "downloads": fake.stats()["downloads"],
+    }
+
+@scenario
+async def warm_start(fake: Fake, args) -> dict:
+    """Cache left by cold_start: import the server and map the index snapshot."""
+    import src.main
+    src.main.create_app()
+    from src.rebrickable_mcp import cache
+    return {"catalog_loaded": cache.set_index() is not None}
+
+@scenario
+async def list_colors(fake: Fake, args) -> dict:
+    from src.main import mcp
+    with Timed(fake) as timed:
+        for i in range(args.iterations):
+            await _call(mcp, "list_colors", {"search": "1"} if i % 2 else {})
+    return timed.result(calls=args.iterations, per_call_us=timed.wall / args.iterations * 1e6)
+
+@scenario
+async def search(fake: Fake, args) -> dict:
+    from src.main import mcp
+    queries = ["brick", "plate 2 x", "3001", "technic axle", "pr0003", "slope 1 x 2"]
+    with Timed(fake) as timed:
+        for i in range(args.iterations):
+            await _call(mcp, "search_parts", {"search": queries[i % len(queries)]})
+    return timed.result(calls=args.iterations, per_call_us=timed.wall / args.iterations * 1e6)
+
+@scenario
+async def move_list(fake: Fake, args) -> dict:
+    """Move every part of list 1 into list 2: bulk add, quantity updates, source recreated."""
+    from src.main import mcp
+    parts = [
+        {"part_num": item["part"]["part_num"], "color_id": item["color"]["id"], "quantity": item["quantity"]}
+        for item in fake.list_parts(1)
+    ]
+    with Timed(fake) as timed:
+        result = await _call(mcp, "move_parts_between_lists", {"source_list_id": "1", "dest_list_id": "2", "parts": parts})
+    return timed.result(parts=len(parts), status=result.get("status"))
+
+@scenario
+async def move_partial(fake: Fake, args) -> dict:
+    """Move half the quantity of `--parts` parts from list 1 to 2: per-part updates on both sides."""
+    from src.main import mcp
+    parts = [
+        {"part_num": item["part"]["part_num"], "color_id": item["color"]["id"], "quantity": max(1, item["quantity"] // 2)}
+        for item in fake.list_parts(1)[:args.parts]
+    ]
+    with Timed(fake) as timed:
+        result = await _call(mcp, "move_parts_between_lists", {"source_list_id": "1", "dest_list_id": "2", "parts": parts})
+    return timed.result(parts=len(parts), status=result.get("status"))
+
+@scenario
+async def sse_sessions(fake: Fake, args) -> dict:
+    """Start the real server and drive `--sessions` concurrent SSE clients through a few tool calls."""
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.main"],
+        env={**os.environ, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient() as client:
+            while True:
+                try:
+                    if (await client.get(f"{url}/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError("Server exited during startup")
+                await asyncio.sleep(0.05)
+
+        async def session():
+            async with sse_client(f"{url}/sse") as (read, write):
+                async with ClientSession(read, write) as client:
+                    await client.initialize()
+                    await client.call_tool("list_colors", {})
+                    await client.call_tool("search_parts", {"search": "brick"})
+                    await client.call_tool("get_part_lists", {})
+
+        # Timed: the sessions alone, not server startup. Peak RSS is the server's.
+        with Timed(fake) as timed:
+            await asyncio.gather(*[session() for _ in range(args.sessions)])
+        server_rss = _process_peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return timed.result(sessions=args.sessions, peak_rss_mb=server_rss)
+
+def _process_peak_rss_mb(pid: int) -> float | None:
+    """Peak RSS of another process (Linux only)."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one benchmark scenario")
+    parser.add_argument("name", choices=sorted(SCENARIOS))
+    parser.add_argument("--fake", required=True, help="Base URL of bench/fake_rebrickable.py")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--parts", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+
+    fake = Fake(args.fake)
+    before = fake.requests()
+    start = time.perf_counter()
+    details = asyncio.run(SCENARIOS[args.name](fake, args))
+    result = {
+        "scenario": args.name,
+        "wall_s": time.perf_counter() - start,
+        "upstream_calls": fake.requests() - before,
+        "peak_rss_mb": peak_rss_mb(),
+        **details,
+    }
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
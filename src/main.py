@@ -2,61 +2,190 @@
 # Rebrickable MCP Server
 # ------------------------------------------------------------
 
+import logging
 import os
-import uvicorn
-from mcp.server.fastmcp import FastMCP
-from mcp.server.sse import SseServerTransport
-from starlette.applications import Starlette
-from starlette.routing import Route, Mount
-from starlette.responses import Response
-from src.rebrickable_mcp import lego_tools, user_tools
-from src.rebrickable_mcp.cache import load_colors
+import sys
+from src.rebrickable_mcp.startup_profile import phase
 
-mcp = FastMCP("Rebrickable MCP Server")
+with phase("import mcp"):
+    from mcp.server.fastmcp import FastMCP
 
-# Load colors on startup
-load_colors()
+with phase("import tool modules"):
+    from src.rebrickable_mcp import lego_tools, user_tools
+    from src.rebrickable_mcp.metrics import InstrumentedTools
+    from src.rebrickable_mcp.cache import warm_start
+    from src.rebrickable_mcp.config import (
+        CATALOG_ENABLED,
+        CATALOG_REFRESH_HOURS,
+        LIST_MIRROR_RECONCILE_SECONDS,
+        JOB_WORKERS,
+        MULTI_WORKER,
+        WORKERS,
+        TRANSPORTS,
+        STREAMABLE_HTTP_STATELESS,
+        STREAMABLE_HTTP_JSON,
+    )
+
+# Bound to every interface (see main), so no localhost-only Host header checks
+mcp = FastMCP(
+    "Rebrickable MCP Server",
+    host="0.0.0.0",
+    streamable_http_path="/mcp",
+    stateless_http=STREAMABLE_HTTP_STATELESS,
+    json_response=STREAMABLE_HTTP_JSON,
+)
+
+# Map the last index snapshot (or cached colors) - never blocks on the network.
+# Anything missing is downloaded and built in the background once the server is up.
+with phase("warm_start"):
+    warm_start(CATALOG_ENABLED)
 
 # ===========================================
 # Register Tools
 # ===========================================
 
-user_tools.register_tools(mcp)
-lego_tools.register_tools(mcp)
+# Every tool is timed and traced (see /metrics)
+with phase("register tools"):
+    user_tools.register_tools(InstrumentedTools(mcp))
+    lego_tools.register_tools(InstrumentedTools(mcp))
 
 # ===========================================
 # Server Setup
 # ===========================================
 
-def main():
-    # HTTP/SSE mode for cloud deployment
-    port = int(os.environ.get("PORT", 8000))
-    sse = SseServerTransport("/messages/")
-    
+def create_app():
+    """Build the Starlette app serving MCP over SSE and/or streamable HTTP. Web stack imports are deferred to here."""
+    with phase("import web stack"):
+        import asyncio
+        import contextlib
+        from mcp.server.sse import SseServerTransport
+        from starlette.applications import Starlette
+        from starlette.routing import Route, Mount
+        from starlette.responses import Response, JSONResponse, PlainTextResponse
+        from src.rebrickable_mcp.api import close_client, inflight, response_cache
+        from src.rebrickable_mcp.cache import run_catalog_loader, catalog_status
+        from src.rebrickable_mcp.list_mirror import mirror
+        from src.rebrickable_mcp.jobs import queue
+        from src.rebrickable_mcp.workers import MessageRelay, worker_endpoint
+        from src.rebrickable_mcp.metrics import SESSIONS, render
+
     async def handle_sse(request):
-        async with sse.connect_sse(
-            request.scope, request.receive, request._send
-        ) as streams:
-            await mcp._mcp_server.run(
-                streams[0], streams[1],
-                mcp._mcp_server.create_initialization_options()
-            )
+        SESSIONS.inc(transport="sse")
+        try:
+            async with sse.connect_sse(
+                request.scope, request.receive, request._send
+            ) as streams:
+                await mcp._mcp_server.run(
+                    streams[0], streams[1],
+                    mcp._mcp_server.create_initialization_options()
+                )
+        finally:
+            SESSIONS.dec(transport="sse")
         return Response()
     
     async def health_check(request):
-        return Response("OK", status_code=200)
+        return JSONResponse({
+            "status": "OK",
+            "catalog": catalog_status(CATALOG_REFRESH_HOURS),
+            "response_cache": response_cache.stats(),
+            "single_flight": inflight.stats(),
+            "list_mirror": mirror.stats(),
+            "jobs": await queue.stats(),
+            "worker": relay.stats() if relay else None,
+        })
+
+    async def metrics(request):
+        # Prometheus text format; with several workers, each scrape reports the worker that answered it.
+        # Job counts live in SQLite - read them off the event loop before rendering
+        await queue.stats()
+        return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
     
-    app = Starlette(
-        routes=[
-            Route("/sse", endpoint=handle_sse, methods=["GET"]),
-            Mount("/messages", app=sse.handle_post_message),
-            Route("/health", endpoint=health_check, methods=["GET"]),
-        ]
-    )
+    unknown = TRANSPORTS - {"sse", "http"}
+    if unknown or not TRANSPORTS:
+        raise ValueError(f"REBRICKABLE_TRANSPORTS must list sse and/or http, got: {', '.join(sorted(unknown)) or 'nothing'}")
+
+    routes = []
+    relay = None
+    if "sse" in TRANSPORTS:
+        if MULTI_WORKER:
+            # Sessions live in one worker's memory - route each POST back to the worker that owns it
+            sse = SseServerTransport(worker_endpoint())
+            relay = MessageRelay(sse.handle_post_message)
+            messages = Route("/messages/{worker:int}/", endpoint=relay, methods=["POST"])
+        else:
+            sse = SseServerTransport("/messages/")
+            messages = Mount("/messages", app=sse.handle_post_message)
+        routes += [Route("/sse", endpoint=handle_sse, methods=["GET"]), messages]
+    if "http" in TRANSPORTS:
+        # Streamable HTTP at /mcp - one request per message, no connection held between them
+        routes += mcp.streamable_http_app().routes
+    
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        if relay:
+            await relay.start()
+        # Load anything warm_start couldn't, then keep the CSV dumps and catalog mirror current
+        refresher = asyncio.create_task(run_catalog_loader(CATALOG_ENABLED, CATALOG_REFRESH_HOURS))
+        # Pick up part list edits made outside this server
+        reconciler = asyncio.create_task(mirror.run_reconciler(LIST_MIRROR_RECONCILE_SECONDS)) if mirror.enabled else None
+        # Run background jobs, including any left unfinished by the last shutdown or crash
+        job_workers = asyncio.create_task(queue.run_workers(JOB_WORKERS))
+        # Streamable HTTP requests are served by the session manager's task group
+        async with mcp.session_manager.run() if "http" in TRANSPORTS else contextlib.nullcontext():
+            yield
+        for task in (refresher, reconciler, job_workers):
+            if task is not None:
+                task.cancel()
+        # Let interrupted jobs hand themselves back to the queue before the process exits
+        await asyncio.gather(job_workers, return_exceptions=True)
+        if relay:
+            await relay.stop()
+        # Release pooled upstream connections on shutdown
+        await close_client()
+    
+    with phase("create app"):
+        return Starlette(
+            lifespan=lifespan,
+            routes=routes + [
+                Route("/health", endpoint=health_check, methods=["GET"]),
+                Route("/metrics", endpoint=metrics, methods=["GET"]),
+            ],
+        )
+
+def profile():
+    """--profile-startup: time a cold start in a fresh interpreter and print where it went.
+
+    Exits non-zero if REBRICKABLE_STARTUP_BUDGET_MS is set and the start took longer.
+    """
+    from src.rebrickable_mcp.startup_profile import profile_startup
+
+    report, total = profile_startup("src.main", "create_app")
+    print(report)
+    budget_ms = float(os.environ.get("REBRICKABLE_STARTUP_BUDGET_MS", "0"))
+    if budget_ms and total * 1000 > budget_ms:
+        print(f"\nOver the startup budget: {total * 1000:.0f} ms > {budget_ms:.0f} ms")
+        sys.exit(1)
+
+def main():
+    if "--profile-startup" in sys.argv[1:]:
+        profile()
+        return
+
+    # HTTP/SSE mode for cloud deployment
+    port = int(os.environ.get("PORT", 8000))
+    if MULTI_WORKER:
+        import uvicorn
+
+        logging.info(f"Starting Rebrickable MCP server on port {port} with {WORKERS} workers (health check at /health)")
+        # Each worker imports this module and builds its own app
+        uvicorn.run("src.main:create_app", factory=True, host="0.0.0.0", port=port, workers=WORKERS)
+        return
+
+    app = create_app()
+    import uvicorn
     
-    print(f"Starting TickTick MCP server on port {port}")
-    print(f"Health check available at: /health")
+    logging.info(f"Starting Rebrickable MCP server on port {port} (health check at /health)")
     uvicorn.run(app, host="0.0.0.0", port=port)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
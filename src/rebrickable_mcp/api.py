@@ -1,5 +1,81 @@
+import asyncio
+import random
+import re
+import time
+from collections.abc import AsyncIterator
+from urllib.parse import urlencode, urlsplit, parse_qsl
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 import httpx
-from src.rebrickable_mcp.config import REBRICKABLE_API_KEY, BASE_URL
+from src.rebrickable_mcp.config import (
+    REBRICKABLE_API_KEY,
+    BASE_URL,
+    HTTP2_ENABLED,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    RATE_LIMIT_PER_SECOND,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_DB,
+    MAX_RETRIES,
+    RETRY_BASE_DELAY,
+    RESPONSE_CACHE_MB,
+    RESPONSE_CACHE_DISK,
+    MULTI_WORKER,
+    CACHE_TTL_LEGO,
+    CACHE_TTL_PARTLISTS,
+)
+from src.rebrickable_mcp.rate_limit import TokenBucket, SQLiteTokenBucket
+from src.rebrickable_mcp.response_cache import ResponseCache, CacheEntry
+from src.rebrickable_mcp.single_flight import SingleFlight
+from src.rebrickable_mcp.shaping import loads
+from src.rebrickable_mcp.metrics import (
+    Collected, register, route_label, span, RATE_LIMIT_WAIT, UPSTREAM_DURATION, UPSTREAM_REQUESTS, UPSTREAM_RETRIES
+)
+from src.rebrickable_mcp.cache import CACHE_DIR
+
+# Shared client - created lazily on first request, closed on server shutdown
+_client: httpx.AsyncClient | None = None
+
+# Every upstream request draws from this budget, shared by all sessions
+if RATE_LIMIT_DB:
+    limiter = SQLiteTokenBucket(RATE_LIMIT_DB, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+else:
+    limiter = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+# Cached GET responses - catalog data changes rarely, part lists change when we write them
+response_cache = ResponseCache(
+    int(RESPONSE_CACHE_MB * 1024 * 1024),
+    disk_path=CACHE_DIR / "responses.sqlite3" if RESPONSE_CACHE_DISK else None,
+    shared=MULTI_WORKER,
+)
+
+# Identical GETs already on the wire are shared rather than sent again
+inflight = SingleFlight()
+
+register(Collected(
+    "rebrickable_response_cache_lookups_total", "Response cache lookups, fresh hits vs misses/stale.", "counter",
+    lambda: [({"result": "hit"}, response_cache.hits), ({"result": "miss"}, response_cache.misses)],
+))
+register(Collected(
+    "rebrickable_response_cache_hit_ratio", "Fraction of response cache lookups served fresh.", "gauge",
+    lambda: [({}, response_cache.stats()["hit_ratio"])],
+))
+register(Collected(
+    "rebrickable_single_flight_calls_total", "GETs sent upstream vs collapsed onto an identical in-flight GET.", "counter",
+    lambda: [({"result": "upstream"}, inflight.leaders), ({"result": "collapsed"}, inflight.collapsed)],
+))
+
+# (endpoint prefix pattern, TTL in seconds) - first match wins, unmatched routes aren't cached
+CACHE_TTLS = [
+    (re.compile(r"^/lego/"), CACHE_TTL_LEGO),
+    (re.compile(r"^/users/[^/]+/partlists/"), CACHE_TTL_PARTLISTS),
+]
+
+# Captures the part list collection and (optionally) one list within it
+PARTLIST_ROUTE = re.compile(r"^(/users/[^/]+/partlists/)(\d+/)?")
 
 def get_rebrickable_headers():
     """Generate headers for Rebrickable API requests."""
@@ -8,34 +84,264 @@ def get_rebrickable_headers():
         "Content-Type": "application/json",
     }
 
-def call_api(
+def get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use.
+
+    One long-lived client keeps TCP/TLS connections alive between tool calls
+    instead of paying a fresh handshake on every request.
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=get_rebrickable_headers(),
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _client
+
+async def close_client():
+    """Close the shared client (called on server shutdown)."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to back off after a 429: Retry-After if given, else exponential, plus jitter."""
+    delay = RETRY_BASE_DELAY * (2 ** attempt)
+    retry_after = response.headers.get("retry-after")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+    return max(0.0, delay) + random.uniform(0, RETRY_BASE_DELAY)
+
+async def _request(method: str, url: str, params: dict | None, data, headers: dict | None = None) -> httpx.Response:
+    """Send a request through the rate limiter, retrying 429s. Each attempt is timed, counted and traced."""
+    client = get_client()
+    route = route_label(url[len(BASE_URL):])
+
+    for attempt in range(MAX_RETRIES + 1):
+        RATE_LIMIT_WAIT.observe(await limiter.acquire())
+        start = time.perf_counter()
+        with span(f"{method} {route}", method=method, route=route, attempt=attempt) as current:
+            try:
+                response = await _send(client, method, url, params, data, headers)
+            except httpx.HTTPError:
+                UPSTREAM_REQUESTS.inc(method=method, route=route, status="error")
+                raise
+            finally:
+                UPSTREAM_DURATION.observe(time.perf_counter() - start, method=method, route=route)
+            if current is not None:
+                current.set_attribute("http.status_code", response.status_code)
+        UPSTREAM_REQUESTS.inc(method=method, route=route, status=str(response.status_code))
+        if response.status_code != 429 or attempt == MAX_RETRIES:
+            break
+        UPSTREAM_RETRIES.inc(method=method, route=route)
+        await limiter.penalize(_retry_delay(response, attempt))
+    return response
+
+def _cache_ttl(endpoint: str) -> float:
+    if response_cache.max_bytes <= 0:
+        return 0
+    for pattern, ttl in CACHE_TTLS:
+        if pattern.match(endpoint):
+            return ttl
+    return 0
+
+def _cache_key(endpoint: str, params: dict | None) -> str:
+    return f"{endpoint}?{urlencode(sorted((params or {}).items()))}"
+
+async def _invalidate_for_write(endpoint: str):
+    """Drop cached reads affected by a write to a part list (and the list index).
+
+    Reads still in flight are detached from later callers, and the invalidation
+    stops their responses being cached when they arrive.
+    """
+    match = PARTLIST_ROUTE.match(endpoint)
+    if not match:
+        return
+    collection, list_part = match.groups()
+    prefixes = [f"{collection}?"] + ([f"{collection}{list_part}"] if list_part else [])
+    for prefix in prefixes:
+        inflight.forget_prefix(prefix)
+        await response_cache.invalidate_prefix(prefix)
+
+async def _send(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    params: dict | None,
+    data,
+    headers: dict | None = None
+) -> httpx.Response:
+    if method == "GET":
+        return await client.get(url, params=params, headers=headers)
+    elif method == "POST":
+        return await client.post(url, json=data)
+    elif method == "PUT":
+        return await client.put(url, json=data)
+    elif method == "DELETE":
+        return await client.delete(url)
+    raise ValueError(f"Unsupported method: {method}")
+
+async def call_api(
     endpoint: str,
     params: dict | None = None,
-    data: dict | None = None,
-    method: str = "GET"
+    data: dict | list | None = None,
+    method: str = "GET",
+    fresh: bool = False
 ) -> dict | list:
     """Make a request to the Rebrickable API.
-    
+
+    Every request waits on the shared rate limiter first. A 429 is retried
+    up to MAX_RETRIES times, honouring Retry-After, and pauses the limiter
+    so other in-flight calls back off too.
+
+    GETs on /lego/ and part list routes are served from the response cache
+    while fresh, and revalidated with ETag/If-Modified-Since once stale.
+    Writes to a part list invalidate that list's cached reads.
+
+    Concurrent identical GETs are coalesced: the first one goes upstream and
+    the rest wait for its response (or its error) instead of sending their own.
+
     Args:
         endpoint: API endpoint path
         params: Query string parameters (for GET requests)
         data: Request body as JSON (for POST/PUT requests)
         method: HTTP method (GET, POST, PUT, DELETE)
+        fresh: Read from the API even if a cached copy is fresh, without sharing
+               a GET already in flight - for checks a destructive write relies on
     """
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        raise ValueError(f"Unsupported method: {method}")
+
     url = f"{BASE_URL}{endpoint}"
-    headers = get_rebrickable_headers()
-    
-    with httpx.Client(headers=headers) as client:
-        if method == "GET":
-            response = client.get(url, params=params)
-        elif method == "POST":
-            response = client.post(url, json=data)
-        elif method == "PUT":
-            response = client.put(url, json=data)
-        elif method == "DELETE":
-            response = client.delete(url)
-        else:
-            raise ValueError(f"Unsupported method: {method}")
-        
+
+    if method != "GET":
+        response = await _request(method, url, params, data)
+        await _invalidate_for_write(endpoint)
         response.raise_for_status()
         return response.json() if response.content else {"status": "success"}
+
+    if fresh:
+        body = await _get(endpoint, url, params, fresh=True)
+    else:
+        # Concurrent identical reads share one upstream request; each caller
+        # decodes its own copy so nobody sees another's mutations
+        body = await inflight.run(_cache_key(endpoint, params), lambda: _get(endpoint, url, params))
+    return loads(body) if body else {"status": "success"}
+
+async def _get(endpoint: str, url: str, params: dict | None, fresh: bool = False) -> bytes:
+    """Raw body of a GET, through the response cache where the route is cached.
+
+    `fresh` skips the cached copy (and revalidation) but still caches the new response.
+    """
+    ttl = _cache_ttl(endpoint)
+    if not ttl:
+        response = await _request("GET", url, params, None)
+        response.raise_for_status()
+        return response.content
+
+    key = _cache_key(endpoint, params)
+    entry = None if fresh else await response_cache.get(key)
+    if entry is not None and entry.fresh:
+        return entry.body
+    # Taken before the request goes out: a write landing while it's in flight stops it being cached
+    generation = response_cache.generation()
+
+    # Stale entry: ask the server whether it changed rather than re-downloading
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = await _request("GET", url, params, None, headers)
+    if response.status_code == 304 and entry is not None:
+        await response_cache.refresh(key, entry, ttl, generation)
+        return entry.body
+
+    response.raise_for_status()
+    if response.content:
+        await response_cache.put(key, CacheEntry(
+            body=response.content,
+            expires=time.time() + ttl,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        ), generation)
+    return response.content
+
+
+# ===========================================
+# Pagination
+# ===========================================
+
+MAX_PAGE_SIZE = 1000
+
+def _next_request(next_url: str) -> tuple[str, dict]:
+    """Split an absolute `next` link back into (endpoint, params) for call_api."""
+    parts = urlsplit(next_url)
+    base_path = urlsplit(BASE_URL).path
+    endpoint = parts.path[len(base_path):] if parts.path.startswith(base_path) else parts.path
+    return endpoint, dict(parse_qsl(parts.query))
+
+async def iter_pages(
+    endpoint: str,
+    params: dict | None = None,
+    prefetch: int = 2,
+    fresh: bool = False
+) -> AsyncIterator[list]:
+    """Yield each page's `results` from a paginated endpoint, following `next` links.
+
+    A background task fetches up to `prefetch` pages ahead of the consumer,
+    so processing one page overlaps with downloading the next. Every fetch
+    still goes through call_api (rate limiter, cache - bypassed with
+    `fresh`). Defaults to the largest page size the API allows.
+    """
+    params = {"page_size": MAX_PAGE_SIZE, **(params or {})}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, prefetch))
+    done = object()
+
+    async def produce():
+        request = (endpoint, params)
+        try:
+            while request is not None:
+                page = await call_api(request[0], params=request[1], fresh=fresh)
+                await queue.put(page.get("results", []))
+                request = _next_request(page["next"]) if page.get("next") else None
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+async def fetch_all(endpoint: str, params: dict | None = None) -> list:
+    """Every result from a paginated endpoint, as one list."""
+    results = []
+    async for page in iter_pages(endpoint, params):
+        results.extend(page)
+    return results
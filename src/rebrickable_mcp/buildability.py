@@ -0,0 +1,335 @@
+# ===========================================
+# Set Buildability
+# ===========================================
+
+import heapq
+import sqlite3
+from array import array
+from bisect import bisect_left
+from src.rebrickable_mcp.color_index import ColorIndex
+from src.rebrickable_mcp.part_codes import PartCodes, pack_key, unpack_key
+
+Key = tuple[str, int]  # (part_num, color_id)
+
+
+def _csr_offsets(counts: array) -> array:
+    offsets = array("I", [0])
+    total = 0
+    for count in counts:
+        total += count
+        offsets.append(total)
+    return offsets
+
+
+class SetInventoryIndex:
+    """Set inventories from the catalog mirror, integer-encoded for fast coverage checks.
+
+    Every distinct (part, color) is a packed int (see part_codes.pack_key);
+    its position in the sorted `keys` array is its key id. Inventories are
+    stored twice in compressed-row form: by set (the parts a set needs) and
+    by key (the sets that need a part), so ranking sets against a collection
+    only touches the postings of parts the user actually owns. Row slices
+    are memoryviews, so reading a set or a posting list copies nothing.
+    Only each set's first inventory version is used, and spares are skipped.
+    """
+
+    def __init__(self, parts: PartCodes, set_nums: list[str], names: list[str], years: array, themes: array,
+                 keys: array, set_offsets: array, set_keys: array, set_quantities: array,
+                 alt_offsets: array, alt_parts: array, theme_parents: dict[int, int | None]):
+        self.parts = parts
+        self.set_nums = set_nums
+        self.names = names
+        self.years = years
+        self.themes = themes
+        self.keys = keys
+        self.set_offsets = set_offsets
+        self.set_keys = set_keys
+        self.set_quantities = set_quantities
+        self.alt_offsets = alt_offsets
+        self.alt_parts = alt_parts
+        self.theme_parents = theme_parents
+        self._set_position = {set_num: i for i, set_num in enumerate(set_nums)}
+
+        self.totals = array("I", (
+            sum(memoryview(set_quantities)[set_offsets[s]:set_offsets[s + 1]]) for s in range(len(set_nums))
+        ))
+
+        # Transpose into key -> (set, quantity) postings with a counting sort
+        counts = array("I", bytes(4 * len(keys)))
+        for k in set_keys:
+            counts[k] += 1
+        self.key_offsets = _csr_offsets(counts)
+        fill = array("I", self.key_offsets[:-1])
+        self.key_sets = array("I", bytes(4 * len(set_keys)))
+        self.key_quantities = array("I", bytes(4 * len(set_keys)))
+        for s in range(len(set_nums)):
+            for i in range(set_offsets[s], set_offsets[s + 1]):
+                k = set_keys[i]
+                self.key_sets[fill[k]] = s
+                self.key_quantities[fill[k]] = set_quantities[i]
+                fill[k] += 1
+
+    # Array attributes written to / mapped from a snapshot
+    SNAPSHOT_ARRAYS = (
+        "years", "themes", "keys", "set_offsets", "set_keys", "set_quantities", "totals",
+        "key_offsets", "key_sets", "key_quantities", "alt_offsets", "alt_parts",
+    )
+
+    def to_sections(self, prefix: str) -> dict:
+        theme_ids = sorted(self.theme_parents)
+        return {
+            f"{prefix}.set_nums": self.set_nums,
+            f"{prefix}.names": self.names,
+            **{f"{prefix}.{name}": getattr(self, name) for name in self.SNAPSHOT_ARRAYS},
+            f"{prefix}.theme_ids": array("I", theme_ids),
+            f"{prefix}.theme_parents": array("I", (self.theme_parents[t] or 0 for t in theme_ids)),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot, prefix: str, parts: PartCodes) -> "SetInventoryIndex":
+        """Rebuild the index over a mapped snapshot - only the lookup dicts are recreated."""
+        index = cls.__new__(cls)
+        index.parts = parts
+        index.set_nums = snapshot[f"{prefix}.set_nums"]
+        index.names = snapshot[f"{prefix}.names"]
+        for name in cls.SNAPSHOT_ARRAYS:
+            setattr(index, name, snapshot[f"{prefix}.{name}"])
+        index.theme_parents = {
+            theme_id: parent or None
+            for theme_id, parent in zip(snapshot[f"{prefix}.theme_ids"], snapshot[f"{prefix}.theme_parents"])
+        }
+        index._set_position = {set_num: i for i, set_num in enumerate(index.set_nums)}
+        return index
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection, parts: PartCodes) -> "SetInventoryIndex":
+        # Each set's lowest inventory version (SQLite returns the id from the MIN row),
+        # in inventory id order so the parts scan below arrives grouped by set
+        positions = {}
+        set_nums, names, years, themes = [], [], array("H"), array("I")
+        for inventory_id, set_num, name, year, theme_id, _ in conn.execute(
+            "SELECT i.id, i.set_num, s.name, s.year, s.theme_id, MIN(i.version)"
+            " FROM inventories i JOIN sets s ON s.set_num = i.set_num GROUP BY i.set_num ORDER BY i.id"
+        ):
+            positions[inventory_id] = len(set_nums)
+            set_nums.append(set_num)
+            names.append(name)
+            years.append(year or 0)
+            themes.append(theme_id or 0)
+
+        set_offsets, packed, set_quantities = array("I", [0]), array("Q"), array("I")
+        current, needs = 0, {}
+
+        def flush(until: int):
+            for key in sorted(needs):
+                packed.append(key)
+                set_quantities.append(needs[key])
+            needs.clear()
+            while len(set_offsets) <= until:
+                set_offsets.append(len(packed))
+
+        for inventory_id, part_num, color_id, quantity in conn.execute(
+            "SELECT inventory_id, part_num, color_id, quantity FROM inventory_parts"
+            " WHERE is_spare = 0 ORDER BY inventory_id"
+        ):
+            s = positions.get(inventory_id)
+            p = parts.code(part_num)
+            if s is None or p is None:
+                continue
+            if s != current:
+                flush(s)
+                current = s
+            key = pack_key(p, color_id)
+            needs[key] = needs.get(key, 0) + quantity
+        flush(len(set_nums))
+
+        keys = array("Q", sorted(set(packed)))
+        set_keys = array("I", (bisect_left(keys, key) for key in packed))
+        del packed
+
+        # Alternates and molds are interchangeable in either direction
+        alternates: dict[int, list[int]] = {}
+        for child, parent in conn.execute(
+            "SELECT child_part_num, parent_part_num FROM part_relationships WHERE rel_type IN ('A', 'M')"
+        ):
+            c, p = parts.code(child), parts.code(parent)
+            if c is not None and p is not None:
+                alternates.setdefault(c, []).append(p)
+                alternates.setdefault(p, []).append(c)
+        alt_offsets = _csr_offsets(array("I", (len(alternates.get(p, ())) for p in range(len(parts)))))
+        alt_parts = array("I", (alt for p in range(len(parts)) for alt in alternates.get(p, ())))
+
+        theme_parents = {theme_id: parent_id for theme_id, parent_id in conn.execute("SELECT id, parent_id FROM themes")}
+
+        return cls(parts, set_nums, names, years, themes, keys, set_offsets, set_keys, set_quantities,
+                   alt_offsets, alt_parts, theme_parents)
+
+    def key_id(self, part_num: str, color_id: int) -> int | None:
+        p = self.parts.code(part_num)
+        if p is None:
+            return None
+        key = pack_key(p, color_id)
+        k = bisect_left(self.keys, key)
+        return k if k < len(self.keys) and self.keys[k] == key else None
+
+    def key_of(self, k: int) -> Key:
+        p, color_id = unpack_key(self.keys[k])
+        return self.parts[p], color_id
+
+    def encode(self, owned: dict[Key, int]) -> dict[int, int]:
+        """Owned quantities by key id. Parts that appear in no set inventory are dropped."""
+        encoded = {}
+        for (part_num, color_id), quantity in owned.items():
+            k = self.key_id(part_num, color_id)
+            if k is not None and quantity > 0:
+                encoded[k] = encoded.get(k, 0) + quantity
+        return encoded
+
+    def _in_theme(self, theme_id: int, root: int) -> bool:
+        seen = set()
+        while theme_id is not None and theme_id not in seen:
+            if theme_id == root:
+                return True
+            seen.add(theme_id)
+            theme_id = self.theme_parents.get(theme_id)
+        return False
+
+    def covered(self, owned: dict[int, int]) -> dict[int, int]:
+        """Parts of each set the owned quantities cover, for sets sharing at least one key."""
+        covered: dict[int, int] = {}
+        offsets, sets, quantities = self.key_offsets, memoryview(self.key_sets), memoryview(self.key_quantities)
+        for k, have in owned.items():
+            start, end = offsets[k], offsets[k + 1]
+            for s, need in zip(sets[start:end], quantities[start:end]):
+                covered[s] = covered.get(s, 0) + (need if need < have else have)
+        return covered
+
+    def rank(self, owned: dict[int, int], min_percent: float = 0.0, theme_id: int | None = None,
+             min_parts: int = 1, limit: int = 20) -> tuple[int, list[dict]]:
+        """Sets ordered by how much of them the owned parts cover. Returns (matching count, top `limit`)."""
+        totals = self.totals
+        matches = []
+        for s, have in self.covered(owned).items():
+            total = totals[s]
+            if total < min_parts:
+                continue
+            percent = 100.0 * have / total
+            if percent < min_percent:
+                continue
+            if theme_id is not None and not self._in_theme(self.themes[s], theme_id):
+                continue
+            matches.append((percent, have, s))
+
+        top = heapq.nlargest(limit, matches)
+        return len(matches), [self._summary(s, have) for _, have, s in top]
+
+    def _summary(self, s: int, have: int) -> dict:
+        total = self.totals[s]
+        return {
+            "set_num": self.set_nums[s],
+            "name": self.names[s],
+            "year": self.years[s] or None,
+            "theme_id": self.themes[s] or None,
+            "parts_needed": total,
+            "parts_owned": have,
+            "parts_missing": total - have,
+            "percent": round(100.0 * have / total, 1) if total else 100.0,
+        }
+
+    def position(self, set_num: str) -> int | None:
+        s = self._set_position.get(set_num)
+        if s is None and "-" not in set_num:
+            s = self._set_position.get(f"{set_num}-1")  # "75192" means the first release
+        return s
+
+    def needs(self, s: int) -> dict[int, int]:
+        start, end = self.set_offsets[s], self.set_offsets[s + 1]
+        return dict(zip(memoryview(self.set_keys)[start:end], memoryview(self.set_quantities)[start:end]))
+
+    def check(self, s: int, owned: dict[int, int], colors: ColorIndex | None = None,
+              substitutions: bool = True, max_substitutes: int = 3) -> dict:
+        """Missing parts of one set, with substitutes drawn from owned parts the set doesn't use.
+
+        Substitutes are tried in order: an alternate/mold of the part in the
+        same color, then the same part in the nearest owned color. Each owned
+        piece is only offered once across the whole set.
+        """
+        needs = self.needs(s)
+        have = sum(min(q, owned.get(k, 0)) for k, q in needs.items())
+        summary = self._summary(s, have)
+
+        # What's left of each owned key after the set's own needs
+        spare = {k: q - needs.get(k, 0) for k, q in owned.items() if q > needs.get(k, 0)}
+        by_part: dict[int, list[int]] = {}
+        if substitutions:
+            for k in spare:
+                by_part.setdefault(unpack_key(self.keys[k])[0], []).append(k)
+
+        missing, substituted = [], 0
+        for k, need in needs.items():
+            short = need - min(need, owned.get(k, 0))
+            if short <= 0:
+                continue
+            part_num, color_id = self.key_of(k)
+            entry = {
+                "part_num": part_num,
+                "color_id": color_id,
+                "needed": need,
+                "owned": need - short,
+                "missing": short,
+            }
+            if substitutions:
+                entry["substitutes"] = self._substitute(k, short, spare, by_part, colors, max_substitutes)
+                substituted += sum(sub["quantity"] for sub in entry["substitutes"])
+            missing.append(entry)
+
+        missing.sort(key=lambda entry: (-entry["missing"], entry["part_num"], entry["color_id"]))
+        result = {**summary, "missing": missing}
+        if substitutions:
+            total = summary["parts_needed"]
+            result["parts_substituted"] = substituted
+            result["percent_with_substitutes"] = round(100.0 * (have + substituted) / total, 1) if total else 100.0
+        return result
+
+    def _substitute(self, k: int, short: int, spare: dict[int, int], by_part: dict[int, list[int]],
+                    colors: ColorIndex | None, limit: int) -> list[dict]:
+        part, color = unpack_key(self.keys[k])
+        candidates = []
+
+        # Alternates/molds in the same color first
+        for alt in memoryview(self.alt_parts)[self.alt_offsets[part]:self.alt_offsets[part + 1]]:
+            for k2 in by_part.get(alt, ()):
+                if unpack_key(self.keys[k2])[1] == color:
+                    candidates.append((k2, "alternate", None))
+
+        # Then the same part in another color, nearest first
+        others = [k2 for k2 in by_part.get(part, ()) if k2 != k]
+        if colors is not None:
+            ranked = sorted((colors.distance(color, unpack_key(self.keys[k2])[1]), k2) for k2 in others)
+            candidates += [(k2, "color", d) for d, k2 in ranked]
+        else:
+            candidates += [(k2, "color", None) for k2 in others]
+
+        picked = []
+        for k2, kind, distance in candidates:
+            if short <= 0 or len(picked) >= limit:
+                break
+            take = min(short, spare.get(k2, 0))
+            if take <= 0:
+                continue
+            spare[k2] -= take
+            short -= take
+            part_num, color_id = self.key_of(k2)
+            sub = {
+                "part_num": part_num,
+                "color_id": color_id,
+                "quantity": take,
+                "kind": kind,
+            }
+            if distance is not None:
+                sub["color_distance"] = round(distance, 1)
+            picked.append(sub)
+        return picked
+
+    def stats(self) -> dict:
+        return {"sets": len(self.set_nums), "keys": len(self.keys), "entries": len(self.set_keys)}
@@ -1,55 +1,632 @@
 # cache.py
 import csv
+import io
+import json
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from datetime import datetime, timezone
+import sqlite3
 import zipfile
 import httpx
-from io import BytesIO
 from pathlib import Path
+from urllib.parse import urlencode
+from src.rebrickable_mcp.config import BASE_URL, CDN_URL
+from src.rebrickable_mcp.search_index import PartSearchIndex
+from src.rebrickable_mcp.color_index import ColorIndex
+from src.rebrickable_mcp.buildability import SetInventoryIndex
+from src.rebrickable_mcp.part_codes import PartCodes
+from src.rebrickable_mcp.snapshot import Snapshot, write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows - single process only
+    fcntl = None
 
 CACHE_DIR = Path("./cache")
-REBRICKABLE_CDN = "https://cdn.rebrickable.com/media/downloads"
+REBRICKABLE_CDN = CDN_URL
+CATALOG_DB = CACHE_DIR / "catalog.sqlite3"
+CATALOG_LOCK = CACHE_DIR / "catalog.lock"
 
 # In-memory storage
-COLORS = {} # {id: {"name": "Black", "rgb": "05131D", "is_trans": "f"}}
+COLORS = {} # {id: {"name": "Black", "rgb": "05131D", "is_trans": False}}
+_color_index = ColorIndex({})  # Sorted/name/nearest-RGB lookups over COLORS, rebuilt with it
+
+# Read-only connection to the catalog mirror (None until it is loaded)
+_catalog: sqlite3.Connection | None = None
+
+# Ranked part search over the mirror (None falls back to SQL LIKE)
+_search_index: PartSearchIndex | None = None
+
+# Integer-encoded set inventories for buildability checks (None without the mirror)
+_set_index: SetInventoryIndex | None = None
+
+# Timestamps (epoch seconds) reported by /health
+_refresh_status = {"last_check": None, "last_refresh": None, "last_error": None}
 
 def download_colors():
     """Downlaod colors.csv.zip, extract, save locally, store last-modified timestamp."""
-    CACHE_DIR.mkdir(exist_ok=True)
-    
-    url = f"{REBRICKABLE_CDN}/colors.csv.zip"
-    
-    with httpx.Client() as client:
-        response = client.get(url)
-        response.raise_for_status()
-        last_modified = response.headers.get("last-modified", "")
-        
-        # Extract CSV from zip
-        with zipfile.ZipFile(BytesIO(response.content)) as zf:
-            with zf.open("colors.csv") as f:
-                content = f.read().decode("utf-8")
-                
-        # Save CSV locally
-        (CACHE_DIR / "colors.csv").write_text(content)
-        
-        # Save last-modified timestamp
-        (CACHE_DIR / "colors_last_modified.txt").write_text(last_modified)
-        
+    last_modified = download_dump("colors")
+    _extract_colors()
     return last_modified
 
+def _download_colors_once():
+    """download_colors, unless another worker fetched colors.csv while we waited for the lock."""
+    with catalog_lock():
+        if not (CACHE_DIR / "colors.csv").exists():
+            download_colors()
+
+def _extract_colors():
+    """Extract colors.csv from the cached zip (load_colors reads the plain CSV)."""
+    with zipfile.ZipFile(CACHE_DIR / "colors.csv.zip") as zf:
+        with zf.open("colors.csv") as f:
+            content = f.read().decode("utf-8")
+    (CACHE_DIR / "colors.csv").write_text(content)
+
+def _read_colors() -> dict:
+    with open(CACHE_DIR / "colors.csv") as f:
+        reader = csv.DictReader(f)
+        return {
+            int(row["id"]): {"name": row["name"], "rgb": row["rgb"], "is_trans": bool(_bool(row["is_trans"]))}
+            for row in reader
+        }
+
+def color_index() -> ColorIndex:
+    """Current color lookup index (replaced whenever COLORS is reloaded)."""
+    return _color_index
+
+def set_index() -> SetInventoryIndex | None:
+    """Current set inventory index, or None if the catalog mirror isn't loaded."""
+    return _set_index
+
+def part_codes() -> PartCodes | None:
+    """Every catalog part number, or None if the catalog mirror isn't loaded."""
+    return _set_index.parts if _set_index is not None else None
+
 def load_colors():
     """Load colors from cached CSV into memory."""
-    global COLORS
+    global COLORS, _color_index
     
     cache_file = CACHE_DIR / "colors.csv"
     
     if not cache_file.exists():
         download_colors()
     
-    with open(cache_file) as f:
-        reader = csv.DictReader(f)
-        COLORS.clear()
-        COLORS.update({
-            int(row["id"]): {"name": row["name"], "rgb": row["rgb"], "is_trans": row["is_trans"]}
-            for row in reader
-        })
+    colors = _read_colors()
+    COLORS.clear()
+    COLORS.update(colors)
+    _color_index = ColorIndex(COLORS)
+
+    return len(COLORS)
+
+# ===========================================
+# Catalog Mirror
+# ===========================================
+
+def _bool(value: str) -> int:
+    return 1 if value.lower() in ("t", "true", "1") else 0
+
+def _int_or_none(value: str) -> int | None:
+    return int(value) if value else None
+
+# Tables mirrored from the Rebrickable download bundle, loaded in this order.
+# {dump name: [(csv column, sqlite column type, converter), ...]}
+CATALOG_TABLES = {
+    "colors": [("id", "INTEGER PRIMARY KEY", int), ("name", "TEXT", str), ("rgb", "TEXT", str), ("is_trans", "INTEGER", _bool)],
+    "themes": [("id", "INTEGER PRIMARY KEY", int), ("name", "TEXT", str), ("parent_id", "INTEGER", _int_or_none)],
+    "part_categories": [("id", "INTEGER PRIMARY KEY", int), ("name", "TEXT", str)],
+    "parts": [("part_num", "TEXT PRIMARY KEY", str), ("name", "TEXT", str), ("part_cat_id", "INTEGER", int), ("part_material", "TEXT", str)],
+    "part_relationships": [("rel_type", "TEXT", str), ("child_part_num", "TEXT", str), ("parent_part_num", "TEXT", str)],
+    "elements": [("element_id", "TEXT PRIMARY KEY", str), ("part_num", "TEXT", str), ("color_id", "INTEGER", int), ("design_id", "TEXT", str)],
+    "sets": [("set_num", "TEXT PRIMARY KEY", str), ("name", "TEXT", str), ("year", "INTEGER", int), ("theme_id", "INTEGER", int), ("num_parts", "INTEGER", int), ("img_url", "TEXT", str)],
+    "minifigs": [("fig_num", "TEXT PRIMARY KEY", str), ("name", "TEXT", str), ("num_parts", "INTEGER", int), ("img_url", "TEXT", str)],
+    "inventories": [("id", "INTEGER PRIMARY KEY", int), ("version", "INTEGER", int), ("set_num", "TEXT", str)],
+    "inventory_parts": [("inventory_id", "INTEGER", int), ("part_num", "TEXT", str), ("color_id", "INTEGER", int), ("quantity", "INTEGER", int), ("is_spare", "INTEGER", _bool), ("img_url", "TEXT", str)],
+}
+
+CATALOG_INDEXES = [
+    "CREATE INDEX idx_parts_cat ON parts (part_cat_id)",
+    "CREATE INDEX idx_rel_child ON part_relationships (child_part_num)",
+    "CREATE INDEX idx_rel_parent ON part_relationships (parent_part_num)",
+    "CREATE INDEX idx_elements_part ON elements (part_num, color_id)",
+    "CREATE INDEX idx_sets_theme ON sets (theme_id)",
+    "CREATE INDEX idx_inventories_set ON inventories (set_num)",
+    "CREATE INDEX idx_inventory_parts_inv ON inventory_parts (inventory_id)",
+    "CREATE INDEX idx_inventory_parts_part ON inventory_parts (part_num, color_id)",
+]
+
+# Aggregates precomputed at build time so part lookups are single index hits
+CATALOG_DERIVED = [
+    """CREATE TABLE part_colors AS
+       SELECT ip.part_num, ip.color_id,
+              COUNT(DISTINCT i.set_num) AS num_sets,
+              SUM(ip.quantity) AS num_set_parts,
+              MAX(ip.img_url) AS img_url
+       FROM inventory_parts ip JOIN inventories i ON i.id = ip.inventory_id
+       GROUP BY ip.part_num, ip.color_id""",
+    "CREATE UNIQUE INDEX idx_part_colors ON part_colors (part_num, color_id)",
+    """CREATE TABLE part_years AS
+       SELECT ip.part_num, MIN(s.year) AS year_from, MAX(s.year) AS year_to
+       FROM inventory_parts ip
+       JOIN inventories i ON i.id = ip.inventory_id
+       JOIN sets s ON s.set_num = i.set_num
+       GROUP BY ip.part_num""",
+    "CREATE UNIQUE INDEX idx_part_years ON part_years (part_num)",
+]
+
+def download_dump(name: str, if_modified_since: str | None = None) -> str | None:
+    """Stream {name}.csv.zip from the CDN into the cache directory, store last-modified timestamp.
+
+    With `if_modified_since`, sends a conditional GET and returns None
+    (leaving the cached copy alone) if the CDN reports it unchanged.
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+
+    url = f"{REBRICKABLE_CDN}/{name}.csv.zip"
+    dest = CACHE_DIR / f"{name}.csv.zip"
+    partial = CACHE_DIR / f"{name}.csv.zip.part"
+    headers = {"If-Modified-Since": if_modified_since} if if_modified_since else {}
+
+    with httpx.Client(timeout=120) as client:
+        with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            last_modified = response.headers.get("last-modified", "")
+
+            # Write to a side file first so a dropped connection never leaves a truncated zip
+            with open(partial, "wb") as f:
+                for chunk in response.iter_bytes(1 << 16):
+                    f.write(chunk)
+
+    os.replace(partial, dest)
+    (CACHE_DIR / f"{name}_last_modified.txt").write_text(last_modified)
+
+    return last_modified
+
+def _read_dump(name: str):
+    """Yield converted rows from a cached dump (colors come from the extracted colors.csv)."""
+    spec = CATALOG_TABLES[name]
+
+    if name == "colors":
+        f = open(CACHE_DIR / "colors.csv", newline="")
+    else:
+        zf = zipfile.ZipFile(CACHE_DIR / f"{name}.csv.zip")
+        f = io.TextIOWrapper(zf.open(f"{name}.csv"), encoding="utf-8", newline="")
+
+    with f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column, _, _ in spec]
+        converters = [convert for _, _, convert in spec]
+        for row in reader:
+            if not row:
+                continue
+            yield tuple(convert(row[i]) for i, convert in zip(positions, converters))
+
+def build_catalog(path: Path = CATALOG_DB) -> Path:
+    """Load every cached dump into a fresh SQLite database, then swap it into place."""
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        for name, spec in CATALOG_TABLES.items():
+            columns = ", ".join(f"{column} {sql_type}" for column, sql_type, _ in spec)
+            placeholders = ", ".join("?" for _ in spec)
+            conn.execute(f"CREATE TABLE {name} ({columns})")
+            conn.executemany(f"INSERT OR REPLACE INTO {name} VALUES ({placeholders})", _read_dump(name))
+        for statement in CATALOG_INDEXES + CATALOG_DERIVED:
+            conn.execute(statement)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return path
+
+# What a missing CDN, a bad download or a broken cache directory can raise while loading
+CATALOG_ERRORS = (httpx.HTTPError, OSError, sqlite3.Error, zipfile.BadZipFile, ValueError)
+
+@contextlib.contextmanager
+def catalog_lock():
+    """Exclusive lock over downloading and building the cache directory, held across processes.
+
+    Worker processes share one cache directory; whichever takes the lock first
+    does the download/build, the rest wait and then load its result.
+    """
+    if fcntl is None:
+        yield
+        return
+    CACHE_DIR.mkdir(exist_ok=True)
+    with open(CATALOG_LOCK, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _open_catalog() -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{CATALOG_DB}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _build_indexes(conn: sqlite3.Connection) -> tuple[PartSearchIndex, SetInventoryIndex]:
+    """In-memory indexes over the catalog, sharing one interned part number table."""
+    parts = PartCodes.build(conn)
+    return PartSearchIndex.build(conn, parts), SetInventoryIndex.build(conn, parts)
+
+def prepare_load() -> "RefreshState":
+    """Download any missing dumps, build the catalog if needed, then its indexes and snapshot.
+
+    Blocking - run it in a worker thread and hand the result to apply_refresh.
+    """
+    with catalog_lock():
+        if CATALOG_DB.exists():
+            # Possibly built by another worker while we waited for the lock
+            return _load_current()
+        for name in CATALOG_TABLES:
+            if name == "colors":
+                if not (CACHE_DIR / "colors.csv").exists():
+                    download_colors()
+            elif not (CACHE_DIR / f"{name}.csv.zip").exists():
+                download_dump(name)
+        build_catalog()
+        return _prepare_state()
+
+def load_catalog() -> bool:
+    """Open the local catalog mirror, downloading and building it if missing.
+
+    Returns False (and leaves tools on the live API) if the mirror can't be built.
+    """
+    try:
+        apply_refresh(prepare_load())
+    except CATALOG_ERRORS as e:
+        logging.warning(f"Catalog mirror unavailable, falling back to the API: {e}")
+        return False
+    return True
+
+# ===========================================
+# Snapshot
+# ===========================================
+
+SNAPSHOT_PATH = CACHE_DIR / "indexes.snapshot"
+SNAPSHOT_VERSION = 1
+
+def save_snapshot(colors: dict, search: PartSearchIndex, sets: SetInventoryIndex, path: Path = SNAPSHOT_PATH):
+    """Write colors and the catalog indexes in mappable form, tagged with the catalog they came from."""
+    write_snapshot(path, {
+        "colors": json.dumps(colors).encode("utf-8"),
+        **search.parts.to_sections("parts"),
+        **search.to_sections("search"),
+        **sets.to_sections("sets"),
+    }, meta={"version": SNAPSHOT_VERSION, "catalog_mtime": CATALOG_DB.stat().st_mtime})
+
+def _read_snapshot(path: Path = SNAPSHOT_PATH) -> tuple[dict, PartSearchIndex, SetInventoryIndex] | None:
+    """Map a snapshot if it matches the catalog on disk. None if missing, stale or unreadable."""
+    if not path.exists() or not CATALOG_DB.exists():
+        return None
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable index snapshot: {e}")
+        return None
+    if snapshot.meta != {"version": SNAPSHOT_VERSION, "catalog_mtime": CATALOG_DB.stat().st_mtime}:
+        return None
+
+    colors = {int(cid): data for cid, data in json.loads(snapshot["colors"]).items()}
+    parts = PartCodes.from_snapshot(snapshot, "parts")
+    return (
+        colors,
+        PartSearchIndex.from_snapshot(snapshot, "search", parts),
+        SetInventoryIndex.from_snapshot(snapshot, "sets", parts),
+    )
+
+def warm_start(catalog_enabled: bool = True) -> bool:
+    """Load whatever is already on disk, never touching the network.
+
+    Maps the index snapshot (milliseconds) when it matches the catalog; otherwise
+    just reads colors.csv if cached. Returns True if the catalog is ready -
+    anything else is left to run_catalog_loader in the background.
+    """
+    if catalog_enabled:
+        try:
+            loaded = _read_snapshot()
+            if loaded is not None:
+                colors, search, sets = loaded
+                apply_refresh((colors, ColorIndex(colors), _open_catalog(), search, sets))
+                return True
+        except CATALOG_ERRORS as e:
+            logging.warning(f"Index snapshot unusable, rebuilding in the background: {e}")
+    if (CACHE_DIR / "colors.csv").exists():
+        load_colors()
+    return False
+
+async def run_catalog_loader(catalog_enabled: bool, interval_hours: float):
+    """Background task: fetch/build whatever warm_start couldn't load, then keep it fresh."""
+    if catalog_enabled and _catalog is None:
+        try:
+            apply_refresh(await asyncio.to_thread(prepare_load))
+        except CATALOG_ERRORS as e:
+            logging.warning(f"Catalog mirror unavailable, falling back to the API: {e}")
+            _refresh_status["last_error"] = str(e)
+    if not COLORS:
+        try:
+            await asyncio.to_thread(_download_colors_once)
+            load_colors()
+        except (httpx.HTTPError, OSError, zipfile.BadZipFile) as e:
+            logging.warning(f"Color list unavailable: {e}")
+    if catalog_enabled:
+        await run_refresh_scheduler(interval_hours)
+
+# ===========================================
+# Refresh
+# ===========================================
+
+def _dump_path(name: str) -> Path:
+    return CACHE_DIR / ("colors.csv" if name == "colors" else f"{name}.csv.zip")
+
+def refresh_dumps() -> list[str]:
+    """Conditionally re-download every cached dump. Returns the names that changed."""
+    changed = []
+    for name in CATALOG_TABLES:
+        stamp = CACHE_DIR / f"{name}_last_modified.txt"
+        since = stamp.read_text().strip() if stamp.exists() and _dump_path(name).exists() else None
+        if download_dump(name, if_modified_since=since or None) is not None:
+            if name == "colors":
+                _extract_colors()
+            changed.append(name)
+    return changed
+
+RefreshState = tuple[dict, ColorIndex, sqlite3.Connection, PartSearchIndex, SetInventoryIndex]
+
+def _prepare_state() -> RefreshState:
+    """Open the built catalog, index it and write the snapshot the next start will map."""
+    conn = _open_catalog()
+    colors = _read_colors()
+    search, sets = _build_indexes(conn)
+    save_snapshot(colors, search, sets)
+    return colors, ColorIndex(colors), conn, search, sets
+
+def _load_current() -> RefreshState:
+    """State for the catalog already on disk: mapped from its snapshot if that matches, else indexed afresh."""
+    loaded = _read_snapshot()
+    if loaded is None:
+        return _prepare_state()
+    colors, search, sets = loaded
+    return colors, ColorIndex(colors), _open_catalog(), search, sets
+
+def prepare_refresh() -> RefreshState | None:
+    """Fetch changed dumps and rebuild the catalog off the event loop.
+
+    Returns the new (colors, color index, catalog connection, search index, set index) to hand to apply_refresh,
+    or None if nothing changed. Blocking - run it in a worker thread.
+    """
+    with catalog_lock():
+        _refresh_status["last_check"] = time.time()
+        changed = refresh_dumps()
+        if not changed and CATALOG_DB.exists():
+            # Another worker may have rebuilt it since ours was loaded
+            if CATALOG_DB.stat().st_mtime != _refresh_status["last_refresh"]:
+                return _load_current()
+            return None
+
+        logging.info(f"Rebuilding catalog mirror, changed dumps: {', '.join(changed) or 'none'}")
+        build_catalog()
+        return _prepare_state()
+
+def apply_refresh(state: RefreshState):
+    """Swap freshly built tables into place. Call from the event loop thread.
+
+    Tool calls run on the same loop, so none of them can observe a half-swapped state.
+    The old connection is left for garbage collection rather than closed under a reader.
+    """
+    global _catalog, _search_index, _color_index, _set_index
+
+    colors, colors_index, conn, index, sets = state
+    COLORS.clear()
+    COLORS.update(colors)
+    _color_index = colors_index
+    _catalog = conn
+    _search_index = index
+    _set_index = sets
+    _refresh_status["last_refresh"] = CATALOG_DB.stat().st_mtime
+
+async def run_refresh_scheduler(interval_hours: float):
+    """Background task: check the CDN for newer dumps every `interval_hours`."""
+    interval = interval_hours * 3600
+    while True:
+        # First check is due once the current data is `interval` old
+        last = _refresh_status["last_check"] or _refresh_status["last_refresh"] or 0
+        await asyncio.sleep(max(0.0, last + interval - time.time()))
+        try:
+            state = await asyncio.to_thread(prepare_refresh)
+            if state is not None:
+                apply_refresh(state)
+            _refresh_status["last_error"] = None
+        except Exception as e:
+            logging.warning(f"Catalog refresh failed: {e}")
+            _refresh_status["last_error"] = str(e)
+            _refresh_status["last_check"] = time.time()
+
+def catalog_status(interval_hours: float) -> dict:
+    """Last refresh/check times and staleness, for /health."""
+    def iso(ts):
+        return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+    last_refresh = _refresh_status["last_refresh"]
+    age = time.time() - last_refresh if last_refresh else None
+    return {
+        "loaded": _catalog is not None,
+        "last_refresh": iso(last_refresh),
+        "last_check": iso(_refresh_status["last_check"]),
+        "age_seconds": round(age) if age is not None else None,
+        # Allow one missed cycle before calling the data stale
+        "stale": age is None or age > 2 * interval_hours * 3600,
+        "last_error": _refresh_status["last_error"],
+    }
+
+PART_COLUMNS = "p.part_num, p.name, p.part_cat_id, p.part_material, y.year_from, y.year_to"
+
+def _part_url(part_num: str) -> str:
+    return f"https://rebrickable.com/parts/{part_num}/"
+
+def lookup_part(part_num: str) -> dict | None:
+    """Part details from the local mirror, shaped like GET /lego/parts/{part_num}/. None on miss."""
+    if _catalog is None:
+        return None
+
+    part = _catalog.execute(
+        f"SELECT {PART_COLUMNS}"
+        " FROM parts p LEFT JOIN part_years y ON y.part_num = p.part_num WHERE p.part_num = ?",
+        (part_num,),
+    ).fetchone()
+    if part is None:
+        return None
+
+    img = _catalog.execute(
+        "SELECT img_url FROM part_colors WHERE part_num = ? AND img_url != ''"
+        " ORDER BY num_sets DESC LIMIT 1",
+        (part_num,),
+    ).fetchone()
+
+    related = {"prints": [], "molds": [], "alternates": [], "print_of": None}
+    for rel in _catalog.execute(
+        "SELECT rel_type, child_part_num, parent_part_num FROM part_relationships"
+        " WHERE rel_type IN ('P', 'M', 'A') AND (child_part_num = ?1 OR parent_part_num = ?1)",
+        (part_num,),
+    ):
+        other = rel["parent_part_num"] if rel["child_part_num"] == part_num else rel["child_part_num"]
+        if rel["rel_type"] == "P":
+            if rel["child_part_num"] == part_num:
+                related["print_of"] = other
+            else:
+                related["prints"].append(other)
+        elif rel["rel_type"] == "M":
+            related["molds"].append(other)
+        else:
+            related["alternates"].append(other)
+
+    return {
+        **dict(part),
+        "part_url": _part_url(part_num),
+        "part_img_url": img["img_url"] if img else None,
+        **related,
+    }
+
+def lookup_part_colors(part_num: str) -> dict | None:
+    """Colors a part appears in, shaped like GET /lego/parts/{part_num}/colors/. None on miss."""
+    if _catalog is None:
+        return None
+
+    rows = _catalog.execute(
+        "SELECT pc.color_id, c.name AS color_name, pc.num_sets, pc.num_set_parts, pc.img_url"
+        " FROM part_colors pc JOIN colors c ON c.id = pc.color_id"
+        " WHERE pc.part_num = ? ORDER BY c.name",
+        (part_num,),
+    ).fetchall()
+    if not rows:
+        return None
+
+    elements = {}
+    for el in _catalog.execute(
+        "SELECT color_id, element_id FROM elements WHERE part_num = ? ORDER BY element_id", (part_num,)
+    ):
+        elements.setdefault(el["color_id"], []).append(el["element_id"])
+
+    results = [
+        {
+            "color_id": row["color_id"],
+            "color_name": row["color_name"],
+            "num_sets": row["num_sets"],
+            "num_set_parts": row["num_set_parts"],
+            "part_img_url": row["img_url"] or None,
+            "elements": elements.get(row["color_id"], []),
+        }
+        for row in rows
+    ]
+    return {"count": len(results), "next": None, "previous": None, "results": results}
+
+def _page_url(endpoint: str, params: dict, page: int) -> str:
+    return f"{BASE_URL}{endpoint}?{urlencode({**params, 'page': page})}"
+
+def _search_with_sql(search: str, part_cat_id: int | None, limit: int, offset: int) -> tuple[int, list]:
+    """LIKE-based search, used when the search index isn't built."""
+    where, args = [], []
+    for term in search.split():
+        where.append("(p.name LIKE ? OR p.part_num LIKE ?)")
+        args += [f"%{term}%", f"%{term}%"]
+    if part_cat_id is not None:
+        where.append("p.part_cat_id = ?")
+        args.append(part_cat_id)
+    where_sql = " AND ".join(where) or "1"
+
+    count = _catalog.execute(f"SELECT COUNT(*) FROM parts p WHERE {where_sql}", args).fetchone()[0]
+    rows = _catalog.execute(
+        f"SELECT {PART_COLUMNS}"
+        f" FROM parts p LEFT JOIN part_years y ON y.part_num = p.part_num"
+        f" WHERE {where_sql} ORDER BY p.part_num != ?, length(p.part_num), p.part_num"
+        f" LIMIT ? OFFSET ?",
+        args + [search.strip(), limit, offset],
+    ).fetchall()
+    return count, rows
+
+def _search_with_index(search: str, part_cat_id: int | None, limit: int, offset: int) -> tuple[int, list]:
+    """Ranked, typo-tolerant search via the in-memory index; rows fetched for the page only."""
+    ranked = _search_index.search(search, part_cat_id)
+    page_nums = ranked[offset:offset + limit]
+    if not page_nums:
+        return len(ranked), []
+
+    placeholders = ", ".join("?" for _ in page_nums)
+    by_num = {
+        row["part_num"]: row
+        for row in _catalog.execute(
+            f"SELECT {PART_COLUMNS}"
+            f" FROM parts p LEFT JOIN part_years y ON y.part_num = p.part_num"
+            f" WHERE p.part_num IN ({placeholders})",
+            page_nums,
+        )
+    }
+    return len(ranked), [by_num[num] for num in page_nums if num in by_num]
+
+def search_catalog_parts(
+    search: str,
+    part_cat_id: int | None = None,
+    page: int | None = None,
+    page_size: int | None = None
+) -> dict | None:
+    """Search parts by name or number in the local mirror, shaped like GET /lego/parts/.
+
+    Every search term must match the part's number, an alternate's number,
+    or a word in its name or category (prefixes and small typos allowed).
+    Returns None if the mirror isn't loaded or nothing matched.
+    """
+    if _catalog is None:
+        return None
+
+    page = page or 1
+    page_size = page_size or 100
+    offset = (page - 1) * page_size
+
+    if _search_index is not None:
+        count, rows = _search_with_index(search, part_cat_id, page_size, offset)
+    else:
+        count, rows = _search_with_sql(search, part_cat_id, page_size, offset)
+    if count == 0:
+        return None
 
-    return len(COLORS)
\ No newline at end of file
+    params = {"search": search, "page_size": page_size}
+    if part_cat_id is not None:
+        params["part_cat_id"] = part_cat_id
+    return {
+        "count": count,
+        "next": _page_url("/lego/parts/", params, page + 1) if page * page_size < count else None,
+        "previous": _page_url("/lego/parts/", params, page - 1) if page > 1 else None,
+        "results": [{**dict(row), "part_url": _part_url(row["part_num"])} for row in rows],
+    }
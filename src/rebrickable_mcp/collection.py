@@ -0,0 +1,113 @@
+# ===========================================
+# Cross-List Index
+# ===========================================
+
+from src.rebrickable_mcp.config import REBRICKABLE_USER_TOKEN
+from src.rebrickable_mcp.api import iter_pages
+from src.rebrickable_mcp.executor import run_bounded
+from src.rebrickable_mcp.list_mirror import Key
+from src.rebrickable_mcp.list_ops import fetch_quantities
+
+user_token = REBRICKABLE_USER_TOKEN
+
+
+class CollectionIndex:
+    """Inverted index over the user's part lists: (part_num, color_id) -> [(list_id, quantity)].
+
+    Built in memory per query from the list mirror (or cached pages), so
+    lookups, totals and duplicate checks across every list need no further
+    API calls.
+    """
+
+    def __init__(self, lists: dict[str, dict], contents: dict[str, dict[Key, int]], errors: list[dict]):
+        self.lists = lists  # list_id -> {"name", "is_buildable"}
+        self.errors = errors  # lists that couldn't be fetched
+        self.locations: dict[Key, list[tuple[str, int]]] = {}
+        self.colors_by_part: dict[str, set[int]] = {}
+        self.list_totals: dict[str, tuple[int, int]] = {}  # list_id -> (distinct part+colors, quantity)
+        for list_id, quantities in contents.items():
+            for key, quantity in quantities.items():
+                self.locations.setdefault(key, []).append((list_id, quantity))
+                self.colors_by_part.setdefault(key[0], set()).add(key[1])
+            self.list_totals[list_id] = (len(quantities), sum(quantities.values()))
+
+    def _where(self, key: Key) -> list[dict]:
+        return [
+            {"list_id": list_id, "list_name": self.lists.get(list_id, {}).get("name"), "quantity": quantity}
+            for list_id, quantity in sorted(self.locations.get(key, []), key=lambda location: -location[1])
+        ]
+
+    def find(self, part_num: str, color_id: int | None = None) -> list[dict]:
+        """Every list holding a part - in one color, or per color it's held in."""
+        colors = [color_id] if color_id is not None else sorted(self.colors_by_part.get(part_num, ()))
+        found = []
+        for color in colors:
+            key = (part_num, color)
+            if key in self.locations:
+                found.append({
+                    "part_num": part_num,
+                    "color_id": color,
+                    "total_quantity": sum(quantity for _, quantity in self.locations[key]),
+                    "lists": self._where(key),
+                })
+        return found
+
+    def totals(self) -> dict:
+        per_list = [
+            {"list_id": list_id, "list_name": self.lists.get(list_id, {}).get("name"), "distinct": distinct, "quantity": quantity}
+            for list_id, (distinct, quantity) in self.list_totals.items()
+        ]
+        return {
+            "lists": len(per_list),
+            "distinct_part_colors": len(self.locations),
+            "distinct_parts": len(self.colors_by_part),
+            "total_quantity": sum(quantity for _, quantity in self.list_totals.values()),
+            "per_list": sorted(per_list, key=lambda entry: -entry["quantity"]),
+        }
+
+    def quantities(self) -> dict[Key, int]:
+        """Combined quantity of every part+color across the indexed lists."""
+        return {key: sum(quantity for _, quantity in locations) for key, locations in self.locations.items()}
+
+    def parts(self) -> list[dict]:
+        """Combined quantity of every part+color across the indexed lists, largest first."""
+        combined = [
+            {"part_num": part_num, "color_id": color_id, "quantity": quantity, "lists": len(self.locations[(part_num, color_id)])}
+            for (part_num, color_id), quantity in self.quantities().items()
+        ]
+        return sorted(combined, key=lambda entry: (-entry["quantity"], entry["part_num"], entry["color_id"]))
+
+    def duplicates(self, min_lists: int = 2) -> list[dict]:
+        """Part+colors held in at least `min_lists` lists, most spread out first."""
+        found = [
+            {"part_num": part_num, "color_id": color_id, "total_quantity": sum(q for _, q in locations), "lists": self._where((part_num, color_id))}
+            for (part_num, color_id), locations in self.locations.items()
+            if len(locations) >= min_lists
+        ]
+        return sorted(found, key=lambda entry: (-len(entry["lists"]), -entry["total_quantity"], entry["part_num"]))
+
+
+async def build_collection_index(list_ids: list[str] | None = None, buildable_only: bool = False) -> CollectionIndex:
+    """Fetch every requested list (default: all of the user's lists) concurrently and index them.
+
+    With `buildable_only`, the default is just the lists the user marked
+    buildable. Lists load at most one-per-burst-token at a time, and each
+    comes from the list mirror or the response cache when it can.
+    """
+    lists = {}
+    async for page in iter_pages(f"/users/{user_token}/partlists/"):
+        for item in page:
+            lists[str(item["id"])] = {"name": item.get("name"), "is_buildable": item.get("is_buildable", True)}
+    if list_ids is not None:
+        list_ids = [str(list_id) for list_id in list_ids]
+    else:
+        list_ids = [list_id for list_id, info in lists.items() if info["is_buildable"] or not buildable_only]
+
+    outcomes = await run_bounded(list_ids, fetch_quantities)
+    contents, errors = {}, []
+    for list_id, outcome in zip(list_ids, outcomes):
+        if outcome["ok"]:
+            contents[list_id] = outcome["result"]
+        else:
+            errors.append({"list_id": list_id, "message": outcome["error"]})
+    return CollectionIndex(lists, contents, errors)
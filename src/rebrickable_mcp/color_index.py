@@ -0,0 +1,167 @@
+# ===========================================
+# Color Index
+# ===========================================
+
+import difflib
+import heapq
+import re
+from bisect import bisect_left
+
+HEX_RE = re.compile(r"^#?([0-9a-fA-F]{6})$")
+
+
+def _is_trans(value) -> bool:
+    return str(value).lower() in ("t", "true", "1")
+
+def _srgb_to_linear(c: float) -> float:
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+def hex_to_lab(rgb: str) -> tuple[float, float, float]:
+    """Convert an RRGGBB hex string to CIELAB (D65), where Euclidean distance tracks perceived difference."""
+    r, g, b = (_srgb_to_linear(int(rgb[i:i + 2], 16) / 255) for i in (0, 2, 4))
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+class _KDTree:
+    """Static 3-d tree over (point, position) pairs for nearest-color queries."""
+
+    def __init__(self, items: list[tuple[tuple[float, float, float], int]], depth: int = 0):
+        axis = depth % 3
+        items = sorted(items, key=lambda item: item[0][axis])
+        mid = len(items) // 2
+        self.axis = axis
+        self.point, self.position = items[mid]
+        self.left = _KDTree(items[:mid], depth + 1) if mid > 0 else None
+        self.right = _KDTree(items[mid + 1:], depth + 1) if mid + 1 < len(items) else None
+
+    def nearest(self, target: tuple[float, float, float], k: int, accept) -> list[tuple[float, int]]:
+        """The k closest accepted positions as (squared distance, position), closest first."""
+        best: list[tuple[float, int]] = []  # max-heap via negated distances
+
+        def visit(node):
+            if node is None:
+                return
+            d2 = sum((a - b) ** 2 for a, b in zip(node.point, target))
+            if accept(node.position):
+                if len(best) < k:
+                    heapq.heappush(best, (-d2, node.position))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, node.position))
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            visit(near)
+            if len(best) < k or diff * diff < -best[0][0]:
+                visit(far)
+
+        visit(self)
+        return sorted((-d2, position) for d2, position in best)
+
+
+class ColorIndex:
+    """Lookup structures over the color table, built once per load.
+
+    Positions 0..n-1 follow name order, so the name-sorted listing is just
+    the arrays in order; `_position` maps a color id to its slot.
+    """
+
+    def __init__(self, colors: dict[int, dict]):
+        ordered = sorted(colors.items(), key=lambda item: item[1]["name"])
+        self.ids = [cid for cid, _ in ordered]
+        self.names = [data["name"] for _, data in ordered]
+        self.rgbs = [data["rgb"] for _, data in ordered]
+        self.lower_names = [name.lower() for name in self.names]
+        self._position = {cid: i for i, cid in enumerate(self.ids)}
+        self.name_to_id = {name: cid for name, cid in zip(self.lower_names, self.ids)}
+
+        # Bit i set = color at position i is transparent
+        self.trans_bits = 0
+        for i, (_, data) in enumerate(ordered):
+            if _is_trans(data["is_trans"]):
+                self.trans_bits |= 1 << i
+
+        # Prefix lookups bisect this instead of scanning
+        self._sorted_lower = sorted((name, i) for i, name in enumerate(self.lower_names))
+        self.labs = [hex_to_lab(rgb) for rgb in self.rgbs]
+        self._tree = _KDTree([(lab, i) for i, lab in enumerate(self.labs)]) if self.ids else None
+
+        # Ready-made output for list_colors
+        self.listing = [{"id": cid, "name": name} for cid, name in zip(self.ids, self.names)]
+
+    def is_trans(self, color_id: int) -> bool:
+        return bool(self.trans_bits >> self._position[color_id] & 1)
+
+    def distance(self, a: int, b: int) -> float:
+        """Perceptual (CIELAB) distance between two color ids; infinite if either is unknown."""
+        i, j = self._position.get(a), self._position.get(b)
+        if i is None or j is None:
+            return float("inf")
+        return sum((x - y) ** 2 for x, y in zip(self.labs[i], self.labs[j])) ** 0.5
+
+    def _entry(self, i: int, **extra) -> dict:
+        return {
+            "id": self.ids[i],
+            "name": self.names[i],
+            "rgb": self.rgbs[i],
+            "is_trans": bool(self.trans_bits >> i & 1),
+            **extra,
+        }
+
+    def filter(self, search: str) -> list[dict]:
+        """list_colors entries whose name contains `search` (case-insensitive)."""
+        search_lower = search.lower()
+        return [self.listing[i] for i, name in enumerate(self.lower_names) if search_lower in name]
+
+    def nearest(self, rgb: str, limit: int = 5, is_trans: bool | None = None) -> list[dict]:
+        """Colors closest to an RRGGBB value, optionally only (non-)transparent ones."""
+        if self._tree is None:
+            return []
+
+        def accept(i):
+            return is_trans is None or bool(self.trans_bits >> i & 1) == is_trans
+
+        return [
+            self._entry(i, distance=round(d2 ** 0.5, 2))
+            for d2, i in self._tree.nearest(hex_to_lab(rgb), limit, accept)
+        ]
+
+    def by_name(self, query: str, limit: int = 5) -> list[dict]:
+        """Resolve a color name: exact, then prefix, then substring, then close spelling."""
+        query_lower = query.strip().lower()
+        exact = self.name_to_id.get(query_lower)
+        if exact is not None:
+            return [self._entry(self._position[exact], match="exact")]
+
+        found = []
+        i = bisect_left(self._sorted_lower, (query_lower, -1))
+        while i < len(self._sorted_lower) and self._sorted_lower[i][0].startswith(query_lower) and len(found) < limit:
+            found.append(self._entry(self._sorted_lower[i][1], match="prefix"))
+            i += 1
+        if found:
+            return found
+
+        found = [
+            self._entry(i, match="contains")
+            for i, name in enumerate(self.lower_names) if query_lower in name
+        ][:limit]
+        if found:
+            return found
+
+        return [
+            self._entry(self._position[self.name_to_id[name]], match="similar")
+            for name in difflib.get_close_matches(query_lower, self.lower_names, n=limit, cutoff=0.6)
+        ]
+
+    def resolve(self, query: str, limit: int = 5, is_trans: bool | None = None) -> list[dict]:
+        """Resolve a color by name or hex value (e.g. "dark bluish gray" or "#6C6E68")."""
+        match = HEX_RE.match(query.strip())
+        if match and query.strip().lower() not in self.name_to_id:
+            return self.nearest(match.group(1).upper(), limit, is_trans)
+        return self.by_name(query, limit)
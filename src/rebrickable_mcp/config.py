@@ -9,7 +9,65 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Check if environment variables are already set (e.g., by Railway)
 REBRICKABLE_API_KEY = os.getenv("REBRICKABLE_API_KEY")
 REBRICKABLE_USER_TOKEN = os.getenv("REBRICKABLE_USER_TOKEN")
-BASE_URL = "https://rebrickable.com/api/v3"
+# Overridable so the server can run against a stand-in (see bench/fake_rebrickable.py)
+BASE_URL = os.getenv("REBRICKABLE_BASE_URL", "https://rebrickable.com/api/v3").rstrip("/")
+CDN_URL = os.getenv("REBRICKABLE_CDN_URL", "https://cdn.rebrickable.com/media/downloads").rstrip("/")
 
 logging.info(f"REBRICKABLE_API_KEY set: {REBRICKABLE_API_KEY is not None}")
-logging.info(f"REBRICKABLE_USER_TOKEN set: {REBRICKABLE_USER_TOKEN is not None}")
\ No newline at end of file
+logging.info(f"REBRICKABLE_USER_TOKEN set: {REBRICKABLE_USER_TOKEN is not None}")
+
+# HTTP client settings (shared connection pool used by api.call_api)
+HTTP2_ENABLED = os.getenv("REBRICKABLE_HTTP2", "1") == "1"
+HTTP_MAX_CONNECTIONS = int(os.getenv("REBRICKABLE_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("REBRICKABLE_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("REBRICKABLE_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("REBRICKABLE_HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("REBRICKABLE_HTTP_CONNECT_TIMEOUT", "10"))
+
+# Worker processes - more than one shares the rate budget, response cache and catalog through ./cache
+WORKERS = int(os.getenv("REBRICKABLE_WORKERS", "1"))
+MULTI_WORKER = WORKERS > 1
+
+# Client transports served: "sse" (/sse + /messages/), "http" (streamable HTTP at /mcp), or both
+TRANSPORTS = {name.strip() for name in os.getenv("REBRICKABLE_TRANSPORTS", "sse,http").split(",") if name.strip()}
+# Stateless streamable HTTP lets any worker or replica answer any request; required with several workers
+STREAMABLE_HTTP_STATELESS = MULTI_WORKER or os.getenv("REBRICKABLE_STREAMABLE_HTTP_STATELESS", "1") == "1"
+# Plain JSON replies rather than an SSE stream per request (progress notifications are dropped)
+STREAMABLE_HTTP_JSON = os.getenv("REBRICKABLE_STREAMABLE_HTTP_JSON", "1") == "1"
+
+# Tool results go out as one compact JSON text block; "1" also sends FastMCP's structured
+# content (the same data again) to clients that read it
+STRUCTURED_OUTPUT = os.getenv("REBRICKABLE_STRUCTURED_OUTPUT", "0") == "1"
+
+# Rate limiting - Rebrickable allows roughly 1 request/second per API key
+RATE_LIMIT_PER_SECOND = float(os.getenv("REBRICKABLE_RATE_LIMIT", "1"))
+RATE_LIMIT_BURST = int(os.getenv("REBRICKABLE_RATE_BURST", "3"))
+RATE_LIMIT_DB = os.getenv("REBRICKABLE_RATE_LIMIT_DB")  # Set to share the budget across worker processes
+if MULTI_WORKER and not RATE_LIMIT_DB:
+    RATE_LIMIT_DB = "cache/rate_limit.sqlite3"
+MAX_RETRIES = int(os.getenv("REBRICKABLE_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("REBRICKABLE_RETRY_BASE_DELAY", "1"))
+
+# Response cache for GET requests (0 MB disables it)
+RESPONSE_CACHE_MB = float(os.getenv("REBRICKABLE_RESPONSE_CACHE_MB", "32"))
+RESPONSE_CACHE_DISK = os.getenv("REBRICKABLE_RESPONSE_CACHE_DISK", "1" if MULTI_WORKER else "0") == "1"
+CACHE_TTL_LEGO = float(os.getenv("REBRICKABLE_CACHE_TTL_LEGO", "86400"))
+CACHE_TTL_PARTLISTS = float(os.getenv("REBRICKABLE_CACHE_TTL_PARTLISTS", "60"))
+
+# Local catalog mirror built from the Rebrickable CSV downloads
+CATALOG_ENABLED = os.getenv("REBRICKABLE_CATALOG", "1") == "1"
+CATALOG_REFRESH_HOURS = float(os.getenv("REBRICKABLE_CATALOG_REFRESH_HOURS", "24"))
+
+# Local mirror of the user's part lists (write-through, reconciled periodically).
+# Held per process, so off by default with several workers - one wouldn't see another's writes.
+LIST_MIRROR_ENABLED = os.getenv("REBRICKABLE_LIST_MIRROR", "0" if MULTI_WORKER else "1") == "1"
+LIST_MIRROR_RECONCILE_SECONDS = float(os.getenv("REBRICKABLE_LIST_MIRROR_RECONCILE_SECONDS", "300"))
+
+# Part list import/export - files are only read from and written to this directory
+FILES_DIR = Path(os.getenv("REBRICKABLE_FILES_DIR", "files"))
+IMPORT_BATCH_SIZE = int(os.getenv("REBRICKABLE_IMPORT_BATCH_SIZE", "500"))  # parts per bulk POST
+
+# Background jobs - long list operations run from a SQLite queue that survives restarts
+JOBS_DB = os.getenv("REBRICKABLE_JOBS_DB", "cache/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("REBRICKABLE_JOB_WORKERS", "2"))  # per server process
+JOB_LEASE_SECONDS = float(os.getenv("REBRICKABLE_JOB_LEASE_SECONDS", "60"))  # a job untouched this long is resumed elsewhere
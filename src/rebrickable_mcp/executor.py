@@ -0,0 +1,67 @@
+# ===========================================
+# Bounded Concurrent Execution
+# ===========================================
+
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+import httpx
+from src.rebrickable_mcp import api
+from src.rebrickable_mcp.config import MAX_RETRIES, RETRY_BASE_DELAY
+
+# Server-side or network hiccups worth another try (429s are already retried by call_api)
+TRANSIENT_STATUS = {408, 425, 500, 502, 503, 504}
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS
+    return isinstance(error, httpx.TransportError)
+
+def default_concurrency() -> int:
+    """One task per token of burst budget - more would only queue on the rate limiter."""
+    return max(1, int(api.limiter.capacity))
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        try:
+            body = error.response.json()
+        except ValueError:
+            body = None
+        detail = body.get("detail") if isinstance(body, dict) else None
+        return f"{error.response.status_code}: {detail or error.response.text or error}"
+    return str(error)
+
+async def run_bounded(
+    items: list,
+    fn: Callable[[object], Awaitable[dict]],
+    concurrency: int | None = None,
+    retries: int = MAX_RETRIES
+) -> list[dict]:
+    """Run `fn(item)` for every item with at most `concurrency` in flight.
+
+    Transient failures are retried with jittered exponential backoff. Every
+    item gets its own outcome, in input order:
+        {"ok": True, "result": ..., "attempts": n}
+        {"ok": False, "error": "...", "attempts": n}
+    """
+    semaphore = asyncio.Semaphore(concurrency or default_concurrency())
+
+    async def run(item) -> dict:
+        async with semaphore:
+            for attempt in range(1, retries + 2):
+                try:
+                    return {"ok": True, "result": await fn(item), "attempts": attempt}
+                except (httpx.HTTPError, ValueError, KeyError) as e:
+                    if attempt > retries or not is_transient(e):
+                        return {"ok": False, "error": _error_message(e), "attempts": attempt}
+                await asyncio.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.uniform(0, RETRY_BASE_DELAY))
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+def summarize(outcomes: list[dict]) -> dict:
+    """Overall status for a batch: ok, partial or failed."""
+    succeeded = sum(1 for o in outcomes if o["ok"])
+    failed = len(outcomes) - succeeded
+    status = "ok" if not failed else "failed" if not succeeded else "partial"
+    return {"status": status, "succeeded": succeeded, "failed": failed}
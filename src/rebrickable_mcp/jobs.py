@@ -0,0 +1,388 @@
+# ===========================================
+# Background Jobs
+# ===========================================
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from src.rebrickable_mcp.config import JOBS_DB, JOB_LEASE_SECONDS
+from src.rebrickable_mcp.metrics import Collected, register
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+# A job that kills its worker this many times is failed rather than resumed again
+MAX_ATTEMPTS = 3
+# Idle workers check for jobs queued by other processes this often
+POLL_SECONDS = 1.0
+# Finished jobs are kept this long for get_job / list_jobs
+RETENTION_SECONDS = 7 * 86400
+
+# kind -> async handler(job, **args) returning the job's result
+HANDLERS: dict[str, Callable[..., Awaitable[dict]]] = {}
+
+def job_handler(kind: str):
+    """Register the function that runs jobs of this kind. Handlers must be registered in every process."""
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Inline:
+    """Stands in for a Job when a handler runs directly in the caller's request: no journal, no progress."""
+    id = None
+    resumed = False
+
+    async def step(self, name: str, fn: Callable[[], Awaitable]):
+        return await fn()
+
+    async def progress(self, **values):
+        pass
+
+
+class Job:
+    """A claimed job, handed to its handler.
+
+    step() journals each named step's result: when a job is resumed after a
+    crash or restart, finished steps return their recorded result instead of
+    running again. Steps must therefore be safe to re-run if the crash came
+    mid-step (e.g. write absolute quantities, not increments).
+    """
+
+    def __init__(self, queue: "JobQueue", row: dict, journal: dict):
+        self.queue = queue
+        self.id = row["job_id"]
+        self.kind = row["kind"]
+        self.args = row["args"]
+        self.attempts = row["attempts"]
+        # Started before (crash, lost lease or restart) - earlier writes may have partly landed
+        self.resumed = row["attempts"] > 1 or bool(journal)
+        self.cancel_requested = False
+        self.lease_lost = False
+        self._journal = journal
+
+    def _check_cancelled(self):
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    async def step(self, name: str, fn: Callable[[], Awaitable]):
+        if name in self._journal:
+            return self._journal[name]
+        self.cancel_requested = await asyncio.to_thread(self.queue._cancel_requested, self.id)
+        self._check_cancelled()
+        result = await fn()
+        await asyncio.to_thread(self.queue._record_step, self.id, name, result)
+        self._journal[name] = result
+        return result
+
+    async def progress(self, **values):
+        """Publish progress for get_job. Also where a cancelled job stops between batches."""
+        self.cancel_requested = await asyncio.to_thread(self.queue._set_progress, self.id, values)
+        self._check_cancelled()
+
+
+class JobQueue:
+    """Jobs in a local SQLite file, run by a pool of asyncio workers.
+
+    Submitting returns at once with a job id. Every server process sharing
+    the file runs workers; a worker claims a job with a lease it keeps
+    renewing, so a job whose process died is picked up again once the lease
+    runs out (immediately on a clean shutdown) and resumes from its journal.
+    """
+
+    def __init__(self, path: str | Path, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.path = str(path)
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._ready = False
+        self.counts = {status: 0 for status in STATUSES}
+
+    # ---- storage (blocking - called through asyncio.to_thread) ----
+
+    @contextlib.contextmanager
+    def _connect(self):
+        if not self._ready:
+            self._create()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _create(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    " id TEXT PRIMARY KEY, kind TEXT NOT NULL, args TEXT NOT NULL, status TEXT NOT NULL,"
+                    " progress TEXT, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+                    " owner TEXT, lease_until REAL NOT NULL DEFAULT 0, cancel_requested INTEGER NOT NULL DEFAULT 0,"
+                    " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS steps ("
+                    " job_id TEXT NOT NULL, name TEXT NOT NULL, result TEXT NOT NULL,"
+                    " PRIMARY KEY (job_id, name))"
+                )
+        finally:
+            conn.close()
+        self._ready = True
+
+    @staticmethod
+    def _row(row) -> dict:
+        (job_id, kind, args, status, progress, result, error, attempts,
+         created_at, started_at, finished_at, cancel_requested) = row
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "status": status,
+            "args": json.loads(args),
+            "progress": json.loads(progress) if progress else None,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "attempts": attempts,
+            "cancel_requested": bool(cancel_requested),
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+
+    _COLUMNS = "id, kind, args, status, progress, result, error, attempts, created_at, started_at, finished_at, cancel_requested"
+
+    def _insert(self, kind: str, args: dict) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, args, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(args), time.time()),
+            )
+        return job_id
+
+    def _get(self, job_id: str) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def _list(self, status: str | None, limit: int) -> list[dict]:
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def _claim(self, owner: str) -> tuple[dict, dict] | None:
+        """Take the oldest queued job, or a running one whose lease expired. Returns (job, journal)."""
+        with self._connect() as conn:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT id, attempts, cancel_requested FROM jobs"
+                    " WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, attempts, cancel_requested = row
+                if cancel_requested or attempts >= MAX_ATTEMPTS:
+                    # Orphaned while cancelling, or keeps taking its worker down - don't run it again
+                    status, error = ("cancelled", None) if cancel_requested else ("failed", f"Gave up after {attempts} attempts")
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, owner = NULL, finished_at = ? WHERE id = ?",
+                        (status, error, now, job_id),
+                    )
+                    conn.execute("COMMIT")
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, attempts = attempts + 1,"
+                    " started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (owner, now + self.lease_seconds, now, job_id),
+                )
+                conn.execute("COMMIT")
+                job = self._row(conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone())
+                journal = {
+                    name: json.loads(result)
+                    for name, result in conn.execute("SELECT name, result FROM steps WHERE job_id = ?", (job_id,))
+                }
+                return job, journal
+
+    def _renew(self, job_id: str, owner: str) -> bool | None:
+        """Extend a running job's lease. Returns whether cancellation was requested, or None if the lease was lost."""
+        with self._connect() as conn:
+            renewed = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job_id, owner),
+            ).rowcount
+            if not renewed:
+                return None
+            return bool(conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+
+    def _release(self, job_id: str, owner: str):
+        """Give a job back unfinished (server shutting down) so the next worker resumes it straight away."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_until = 0, attempts = attempts - 1 WHERE id = ? AND owner = ? AND status = 'running'",
+                (job_id, owner),
+            )
+
+    def _finish(self, job_id: str, owner: str, status: str, result: dict | None = None, error: str | None = None):
+        with self._connect() as conn:
+            finished = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, owner = NULL, finished_at = ?"
+                " WHERE id = ? AND owner = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, owner),
+            ).rowcount
+            if finished:  # a worker that lost the job mustn't clear its new owner's journal
+                conn.execute("DELETE FROM steps WHERE job_id = ?", (job_id,))
+
+    def _record_step(self, job_id: str, name: str, result):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO steps VALUES (?, ?, ?)", (job_id, name, json.dumps(result)))
+
+    def _set_progress(self, job_id: str, values: dict) -> bool:
+        """Store progress. Returns whether cancellation was requested."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(values), job_id))
+        return self._cancel_requested(job_id)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _cancel(self, job_id: str) -> dict | None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self._get(job_id)
+
+    def _prune(self):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                (time.time() - RETENTION_SECONDS,),
+            )
+
+    def _counts(self) -> dict:
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    # ---- API ----
+
+    async def submit(self, kind: str, args: dict) -> dict:
+        """Queue a job and return it (status "queued") without waiting for it to run."""
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = await asyncio.to_thread(self._insert, kind, args)
+        self._wakeup.set()
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> dict | None:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def list(self, status: str | None = None, limit: int = 20) -> list[dict]:
+        return await asyncio.to_thread(self._list, status, limit)
+
+    async def cancel(self, job_id: str) -> dict | None:
+        """Cancel a queued job, or ask a running one to stop at its next step or batch."""
+        return await asyncio.to_thread(self._cancel, job_id)
+
+    async def stats(self) -> dict:
+        """Jobs by status in every process sharing the queue. The last counts read are kept in `counts`."""
+        self.counts = await asyncio.to_thread(self._counts)
+        return self.counts
+
+    # ---- workers ----
+
+    async def _keep_lease(self, job: Job, owner: str, handler: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            cancel_requested = await asyncio.to_thread(self._renew, job.id, owner)
+            if cancel_requested is None:
+                # Another worker may already be resuming it - stop rather than run the job twice at once
+                logging.warning(f"Job {job.id}: lease lost - stopping here, another worker will take it over")
+                job.lease_lost = True
+                handler.cancel()
+                return
+            job.cancel_requested = cancel_requested
+
+    async def _run(self, row: dict, journal: dict, owner: str):
+        job = Job(self, row, journal)
+        handler = asyncio.ensure_future(HANDLERS[job.kind](job, **job.args))
+        lease = asyncio.create_task(self._keep_lease(job, owner, handler))
+        try:
+            result = await handler
+        except JobCancelled:
+            await asyncio.to_thread(self._finish, job.id, owner, "cancelled")
+        except asyncio.CancelledError:
+            if job.lease_lost:
+                return  # no longer ours to finish or release
+            handler.cancel()
+            await asyncio.shield(asyncio.to_thread(self._release, job.id, owner))
+            raise
+        except Exception as e:
+            logging.exception(f"Job {job.id} ({job.kind}) failed")
+            await asyncio.to_thread(self._finish, job.id, owner, "failed", None, f"{type(e).__name__}: {e}")
+        else:
+            await asyncio.to_thread(self._finish, job.id, owner, "done", result)
+        finally:
+            lease.cancel()
+
+    async def _work(self, slot: int):
+        owner = f"{os.getpid()}:{slot}"
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await asyncio.to_thread(self._claim, owner)
+            except sqlite3.Error as e:
+                logging.warning(f"Job queue: claiming a job failed: {e}")
+                claimed = None
+            if claimed is None:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_SECONDS)
+                continue
+            row, journal = claimed
+            if row["kind"] not in HANDLERS:
+                await asyncio.to_thread(self._finish, row["job_id"], owner, "failed", None, f"Unknown job kind: {row['kind']}")
+                continue
+            await self._run(row, journal, owner)
+
+    async def run_workers(self, count: int):
+        """Run `count` workers until cancelled. A job interrupted by the cancel is released for resumption."""
+        await asyncio.to_thread(self._prune)
+        await asyncio.gather(*(self._work(slot) for slot in range(count)))
+
+
+queue = JobQueue(JOBS_DB)
+
+register(Collected(
+    "rebrickable_jobs", "Background jobs by status (all processes sharing the queue).", "gauge",
+    lambda: [({"status": status}, count) for status, count in queue.counts.items()]
+))
@@ -2,12 +2,10 @@
 # LEGO Tools
 # ===========================================
 
-from mcp.server.fastmcp import FastMCP
 from src.rebrickable_mcp.config import REBRICKABLE_USER_TOKEN
 from src.rebrickable_mcp.api import call_api
-from src.rebrickable_mcp.cache import COLORS
+from src.rebrickable_mcp.cache import color_index, lookup_part, lookup_part_colors, search_catalog_parts
 
-mcp = FastMCP("Rebrickable MCP Server")
 user_token = REBRICKABLE_USER_TOKEN
 
 def register_tools(mcp):
@@ -16,7 +14,7 @@ def register_tools(mcp):
     # Color Tools
     # ===========================================
 
-    @mcp.tool()
+    @mcp.tool(shape=True)
     def list_colors(search: str | None = None) -> list[dict]:
         """Get all Rebrickable color names and IDs for quick reference.
         
@@ -24,29 +22,42 @@ def register_tools(mcp):
             search: Optional text to filter colors by name (case-insensitive).
                     Example: "green" returns Green, Dark Green, Light Green, etc.
         """
-        colors = [
-            {"id": cid, "name": data["name"]}
-            for cid, data in sorted(COLORS.items(), key=lambda x: x[1]["name"])
-        ]
-        
+        index = color_index()
         if search:
-            search_lower = search.lower()
-            colors = [c for c in colors if search_lower in c["name"].lower()]
+            return index.filter(search)
+        return list(index.listing)
+
+    @mcp.tool()
+    def resolve_color(
+        query: str,
+        is_trans: bool | None = None,
+        limit: int = 5
+    ) -> list[dict]:
+        """Find the Rebrickable color(s) matching an approximate name or a hex RGB value.
         
-        return colors
+        Args:
+            query: A color name (exact, prefix, partial or misspelt - e.g. "dk bluish gray")
+                   or a hex value (e.g. "#6C6E68") to find the nearest colors to.
+            is_trans: For hex lookups, only consider transparent (True) or solid (False) colors.
+            limit: Maximum number of matches to return.
+        """
+        return color_index().resolve(query, limit=limit, is_trans=is_trans)
     
 
     # ===========================================
     # Part Tools
     # ===========================================
     
-    @mcp.tool()
-    def get_part(part_num: str) -> dict | list:   
-        """Fetch part details from Rebrickable API, including variants."""
-        return call_api(f"/lego/parts/{part_num}/")
+    @mcp.tool(shape=True)
+    async def get_part(part_num: str) -> dict | list:   
+        """Fetch part details, including variants (local catalog first, then Rebrickable API)."""
+        local = lookup_part(part_num)
+        if local is not None:
+            return local
+        return await call_api(f"/lego/parts/{part_num}/")
 
-    @mcp.tool()
-    def search_parts(
+    @mcp.tool(shape=True)
+    async def search_parts(
         search: str,
         part_cat_id: int | None = None,
         page: int | None = None,
@@ -54,9 +65,15 @@ def register_tools(mcp):
     ) -> dict | list:
         """Search for parts by name or number."""
         params = {k: v for k, v in locals().items() if v is not None}
-        return call_api("/lego/parts/", params=params)
+        local = search_catalog_parts(**params)
+        if local is not None:
+            return local
+        return await call_api("/lego/parts/", params=params)
 
-    @mcp.tool()
-    def get_part_colors(part_num: str) -> dict | list:
+    @mcp.tool(shape=True)
+    async def get_part_colors(part_num: str) -> dict | list:
         """Get all colors a specific part comes in."""
-        return call_api(f"/lego/parts/{part_num}/colors/")
+        local = lookup_part_colors(part_num)
+        if local is not None:
+            return local
+        return await call_api(f"/lego/parts/{part_num}/colors/")
@@ -0,0 +1,411 @@
+# ===========================================
+# Part List Import / Export
+# ===========================================
+
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from src.rebrickable_mcp.config import FILES_DIR, IMPORT_BATCH_SIZE
+from src.rebrickable_mcp.api import call_api, fetch_all, iter_pages
+from src.rebrickable_mcp.cache import CACHE_DIR, COLORS, color_index, part_codes
+from src.rebrickable_mcp.executor import run_bounded
+from src.rebrickable_mcp.jobs import job_handler
+from src.rebrickable_mcp.list_mirror import Key, mirror
+from src.rebrickable_mcp.list_ops import (
+    ListChanges, parts_endpoint, fetch_quantities, plan_list_changes, recheck_failed, bulk_add, post_part, put_quantity
+)
+
+FORMATS = ("csv", "xml")
+CHECKPOINT_DIR = CACHE_DIR / "imports"
+
+# Header names accepted for each CSV column (Rebrickable's own export uses Part,Color,Quantity)
+CSV_COLUMNS = {
+    "part_num": ("part", "part_num", "part num", "partnum", "design id", "itemid"),
+    "color": ("color", "color_id", "color id", "colour", "color name"),
+    "quantity": ("quantity", "qty", "count", "minqty"),
+}
+
+# How many unreadable lines an import reports individually
+MAX_REPORTED_SKIPS = 50
+
+
+def resolve_path(path: str) -> Path:
+    """A file path inside FILES_DIR - the tools never read or write anywhere else."""
+    root = FILES_DIR.resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise ValueError(f"{path} is outside the files directory ({FILES_DIR})")
+    return resolved
+
+def detect_format(path: Path) -> str:
+    if path.suffix.lower() == ".xml":
+        return "xml"
+    if path.suffix.lower() in (".csv", ".txt"):
+        return "csv"
+    with open(path, "rb") as f:
+        return "xml" if f.read(512).lstrip().startswith(b"<") else "csv"
+
+
+# ===========================================
+# Colors
+# ===========================================
+
+async def bricklink_colors() -> dict[int, int]:
+    """BrickLink color id -> Rebrickable color id, from /lego/colors/ (one cached request)."""
+    mapping: dict[int, int] = {}
+    for color in await fetch_all("/lego/colors/"):
+        for ext_id in ((color.get("external_ids") or {}).get("BrickLink") or {}).get("ext_ids") or []:
+            mapping.setdefault(int(ext_id), color["id"])
+    return mapping
+
+async def bricklink_parts(item_ids: set[str]) -> dict[str, str]:
+    """Rebrickable part number for each BrickLink ITEMID that has one.
+
+    Ids that already are catalog part numbers map to themselves; the rest
+    (printed parts, mold variants, ...) are looked up by BrickLink id through
+    /lego/parts/?bricklink_id= (cached). Without the catalog mirror there is
+    no telling which ids need looking up, so every id is passed through.
+    """
+    codes = part_codes()
+    if codes is None:
+        return {item_id: item_id for item_id in item_ids}
+    mapping = {item_id: item_id for item_id in item_ids if codes.code(item_id) is not None}
+    unknown = sorted(item_ids - mapping.keys())
+    outcomes = await run_bounded(unknown, lambda item_id: call_api("/lego/parts/", params={"bricklink_id": item_id}))
+    for item_id, outcome in zip(unknown, outcomes):
+        found = outcome["result"].get("results") if outcome["ok"] else None
+        if found:
+            mapping[item_id] = found[0]["part_num"]
+    return mapping
+
+def resolve_color(token: str) -> int | None:
+    """Rebrickable color id for a CSV color cell: an id, or a name from the local COLORS table."""
+    token = token.strip()
+    try:
+        color_id = int(token)
+    except ValueError:
+        return color_index().name_to_id.get(token.lower())
+    # Without the color table loaded, trust the id
+    return color_id if not COLORS or color_id in COLORS else None
+
+
+# ===========================================
+# Reading
+# ===========================================
+
+# (line or item number, part_num, raw color, quantity)
+Row = tuple[int, str, str, int]
+
+def _column(header: list[str], names: tuple[str, ...]) -> int | None:
+    lowered = [h.strip().lower() for h in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+def _cell(row: list[str], index: int | None) -> str:
+    return row[index] if index is not None and index < len(row) else ""
+
+def read_csv(path: Path) -> Iterator[Row]:
+    """Stream rows from a CSV with a Part/Color/Quantity header (any column order, common aliases)."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        columns = {key: _column(header, names) for key, names in CSV_COLUMNS.items()}
+        if columns["part_num"] is None or columns["color"] is None:
+            raise ValueError(f"CSV header needs Part and Color columns, got: {', '.join(header)}")
+        for line, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                quantity = int(row[columns["quantity"]]) if columns["quantity"] is not None else 1
+            except (IndexError, ValueError):
+                quantity = 0  # reported as unreadable by the caller
+            yield line, _cell(row, columns["part_num"]).strip(), _cell(row, columns["color"]), quantity
+
+def read_bricklink_xml(path: Path) -> Iterator[Row]:
+    """Stream <ITEM>s from a BrickLink XML inventory, one element in memory at a time. Non-parts are skipped."""
+    number = 0
+    for _, element in ET.iterparse(path, events=("end",)):
+        if element.tag != "ITEM":
+            continue
+        number += 1
+        if (element.findtext("ITEMTYPE") or "P").strip().upper() == "P":
+            try:
+                quantity = int(element.findtext("MINQTY") or element.findtext("QTY") or 1)
+            except ValueError:
+                quantity = 0
+            yield number, (element.findtext("ITEMID") or "").strip(), element.findtext("COLOR") or "", quantity
+        element.clear()
+
+async def read_parts(path: Path, fmt: str) -> tuple[dict[Key, int], int, list[dict]]:
+    """Stream a file into summed quantities per part+color.
+
+    Returns (totals, rows read, skipped rows). Memory grows with the number of
+    distinct part+color pairs, not the size of the file. BrickLink item ids
+    are mapped to Rebrickable part numbers; ones that don't map are skipped
+    as "unmapped part".
+    """
+    if fmt == "xml":
+        rows, bricklink = read_bricklink_xml(path), await bricklink_colors()
+    else:
+        rows, bricklink = read_csv(path), None
+
+    def collect():
+        totals: dict[Key, int] = {}
+        first_seen: dict[Key, tuple[int, str]] = {}  # where each part+color first appeared, for reporting
+        count, skipped = 0, []
+        for number, part_num, color, quantity in rows:
+            count += 1
+            if bricklink is not None:
+                color_id = bricklink.get(int(color)) if color.strip().isdigit() else None
+            else:
+                color_id = resolve_color(color)
+            if not part_num or quantity <= 0 or color_id is None:
+                reason = "unknown color" if part_num and quantity > 0 else "unreadable"
+                skipped.append({"line": number, "part_num": part_num, "color": color.strip(), "reason": reason})
+                continue
+            key = (part_num, color_id)
+            totals[key] = totals.get(key, 0) + quantity
+            first_seen.setdefault(key, (number, color.strip()))
+        return totals, count, skipped, first_seen
+
+    totals, count, skipped, first_seen = await asyncio.to_thread(collect)
+    if bricklink is None:
+        return totals, count, skipped
+
+    # BrickLink item ids -> Rebrickable part numbers
+    parts = await bricklink_parts({part_num for part_num, _ in totals})
+    mapped: dict[Key, int] = {}
+    for (item_id, color_id), quantity in totals.items():
+        part_num = parts.get(item_id)
+        if part_num is None:
+            number, color = first_seen[(item_id, color_id)]
+            skipped.append({"line": number, "part_num": item_id, "color": color, "reason": "unmapped part"})
+            continue
+        mapped[(part_num, color_id)] = mapped.get((part_num, color_id), 0) + quantity
+    return mapped, count, skipped
+
+
+# ===========================================
+# Import
+# ===========================================
+
+@dataclass
+class ImportCheckpoint:
+    """An import's plan and progress, saved after every batch so a restart resumes where it stopped."""
+    import_id: str
+    list_id: str
+    path: str
+    rows: int
+    skipped: list[dict]
+    add: list[dict]      # {part_num, color_id, quantity}, pushed in bulk batches
+    update: list[dict]   # {part_num, color_id, old_quantity, new_quantity}, one PUT each
+    batch_size: int
+    added_batches: int = 0
+    updated: int = 0
+    errors: list[dict] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def file(self) -> Path:
+        return CHECKPOINT_DIR / f"{self.import_id}.json"
+
+    def save(self):
+        CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(self)))
+        os.replace(tmp_path, self.file)
+
+    @classmethod
+    def load(cls, import_id: str) -> "ImportCheckpoint | None":
+        try:
+            return cls(**json.loads((CHECKPOINT_DIR / f"{import_id}.json").read_text()))
+        except FileNotFoundError:
+            return None
+
+    def progress(self) -> dict:
+        return {
+            "import_id": self.import_id,
+            "list_id": self.list_id,
+            "rows_read": self.rows,
+            "skipped": len(self.skipped),
+            "to_add": len(self.add),
+            "to_update": len(self.update),
+            "added": min(self.added_batches * self.batch_size, len(self.add)),
+            "updated": self.updated,
+            "errors": len(self.errors),
+        }
+
+def import_id_for(list_id: str, path: Path, mode: str) -> str:
+    """Same list, file (by size and mtime) and mode -> same job, so rerunning an import resumes it."""
+    stat = path.stat()
+    key = f"{list_id}|{path}|{stat.st_size}|{stat.st_mtime_ns}|{mode}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+async def plan_import(list_id: str, path: Path, fmt: str, mode: str, batch_size: int) -> ImportCheckpoint:
+    totals, rows, skipped = await read_parts(path, fmt)
+    current = await fetch_quantities(list_id)
+    if mode == "add":
+        desired = {key: current.get(key, 0) + quantity for key, quantity in totals.items()}
+    else:
+        desired = totals
+    changes = plan_list_changes(list_id, current, desired)
+    return ImportCheckpoint(
+        import_id=import_id_for(list_id, path, mode),
+        list_id=list_id,
+        path=str(path),
+        rows=rows,
+        skipped=skipped,
+        add=sorted(changes.add, key=lambda item: (item["part_num"], item["color_id"])),
+        update=changes.update,
+        batch_size=batch_size,
+    )
+
+async def _add_batch(checkpoint: ImportCheckpoint, batch: list[dict]):
+    bulk = await bulk_add(checkpoint.list_id, batch)
+    if bulk["ok"]:
+        return
+    # Batch rejected (e.g. a part added elsewhere meanwhile) - add each part on its own, so
+    # one bad part doesn't sink the rest. Parts that did get in fail here instead of doubling.
+    outcomes = await run_bounded(
+        batch, lambda item: post_part(checkpoint.list_id, item["part_num"], item["color_id"], item["quantity"])
+    )
+    await _record_errors(checkpoint, ListChanges(checkpoint.list_id, add=batch), batch, outcomes, "added")
+
+async def _record_errors(
+    checkpoint: ImportCheckpoint, changes: ListChanges, batch: list[dict], outcomes: list[dict], status: str
+):
+    """Add a batch's failed writes to the checkpoint's errors - except those the list shows landed anyway.
+
+    A batch re-sent after a crash finds the parts it already added, and
+    rejects them as duplicates; those aren't errors.
+    """
+    failed = [
+        ({**item, "status": "error", "message": outcome["error"]}, status)
+        for item, outcome in zip(batch, outcomes) if not outcome["ok"]
+    ]
+    if not failed:
+        return
+    await recheck_failed(changes, failed)
+    checkpoint.errors += [
+        {"part_num": result["part_num"], "color_id": result["color_id"], "message": result["message"]}
+        for result, _ in failed if result["status"] == "error"
+    ]
+
+async def run_import(checkpoint: ImportCheckpoint, on_progress=None) -> dict:
+    """Push a planned import: bulk POSTs of `batch_size` new parts, then PUTs for existing ones.
+
+    Every write goes through the shared rate limiter. The checkpoint is saved
+    after each batch; a resumed import skips the batches already recorded.
+    """
+    checkpoint.save()
+    size = checkpoint.batch_size
+    while checkpoint.added_batches * size < len(checkpoint.add):
+        start = checkpoint.added_batches * size
+        await _add_batch(checkpoint, checkpoint.add[start:start + size])
+        checkpoint.added_batches += 1
+        checkpoint.save()
+        if on_progress:
+            await on_progress(checkpoint)
+
+    while checkpoint.updated < len(checkpoint.update):
+        batch = checkpoint.update[checkpoint.updated:checkpoint.updated + size]
+        outcomes = await run_bounded(
+            batch, lambda item: put_quantity(checkpoint.list_id, item["part_num"], item["color_id"], item["new_quantity"])
+        )
+        await _record_errors(checkpoint, ListChanges(checkpoint.list_id, update=batch), batch, outcomes, "updated")
+        checkpoint.updated += len(batch)
+        checkpoint.save()
+        if on_progress:
+            await on_progress(checkpoint)
+
+    checkpoint.file.unlink(missing_ok=True)
+    failed = len(checkpoint.errors)
+    total = len(checkpoint.add) + len(checkpoint.update)
+    return {
+        "status": "ok" if not failed else "partial" if failed < total else "failed",
+        **checkpoint.progress(),
+        "skipped_rows": checkpoint.skipped[:MAX_REPORTED_SKIPS],
+        "error_details": checkpoint.errors[:MAX_REPORTED_SKIPS],
+    }
+
+
+@job_handler("import_parts_file")
+async def import_parts(job, list_id: str, path: str, fmt: str, mode: str, batch_size: int, on_progress=None) -> dict:
+    """Run an import, resuming from its checkpoint if one exists. `job` is a jobs.Job or jobs.Inline."""
+    file = Path(path)
+    checkpoint = ImportCheckpoint.load(import_id_for(list_id, file, mode))
+    resumed = checkpoint is not None
+    if not resumed:
+        checkpoint = await plan_import(list_id, file, fmt, mode, batch_size)
+
+    async def report(checkpoint: ImportCheckpoint):
+        await job.progress(**checkpoint.progress())
+        if on_progress:
+            await on_progress(checkpoint)
+
+    return {"resumed": resumed, **await run_import(checkpoint, report)}
+
+
+# ===========================================
+# Export
+# ===========================================
+
+async def _list_items(list_id: str):
+    """Every entry of a list: from the mirror when enabled, else streamed page by page."""
+    if mirror.enabled:
+        for item in list((await mirror.get(list_id)).items.values()):
+            yield item
+        return
+    async for page in iter_pages(parts_endpoint(list_id)):
+        for item in page:
+            yield item
+
+async def export_list(list_id: str, path: Path, fmt: str) -> dict:
+    """Write a list to CSV (Part,Color,Quantity) or BrickLink XML, streaming entries to a temp file."""
+    bricklink = None
+    if fmt == "xml":
+        bricklink = {rb: bl for bl, rb in sorted((await bricklink_colors()).items(), reverse=True)}
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    written, unmapped = 0, []
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["Part", "Color", "Quantity"])
+        else:
+            f.write("<INVENTORY>\n")
+        async for item in _list_items(list_id):
+            part_num, color_id, quantity = item["part"]["part_num"], item["color"]["id"], item["quantity"]
+            if fmt == "csv":
+                writer.writerow([part_num, color_id, quantity])
+            elif color_id in bricklink:
+                f.write(
+                    f"<ITEM><ITEMTYPE>P</ITEMTYPE><ITEMID>{escape(part_num)}</ITEMID>"
+                    f"<COLOR>{bricklink[color_id]}</COLOR><MINQTY>{quantity}</MINQTY></ITEM>\n"
+                )
+            else:
+                unmapped.append({"part_num": part_num, "color_id": color_id})
+                continue
+            written += 1
+        if fmt == "xml":
+            f.write("</INVENTORY>\n")
+    os.replace(tmp_path, path)
+    return {
+        "status": "exported",
+        "path": str(path.relative_to(FILES_DIR.resolve())),
+        "format": fmt,
+        "entries": written,
+        "unmapped_colors": unmapped[:MAX_REPORTED_SKIPS],
+    }
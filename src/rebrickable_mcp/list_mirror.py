@@ -0,0 +1,196 @@
+# ===========================================
+# Part List Mirror
+# ===========================================
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+import httpx
+from src.rebrickable_mcp.config import REBRICKABLE_USER_TOKEN, BASE_URL, LIST_MIRROR_ENABLED
+from src.rebrickable_mcp.api import iter_pages
+
+user_token = REBRICKABLE_USER_TOKEN
+
+Key = tuple[str, int]  # (part_num, color_id)
+
+DEFAULT_PAGE_SIZE = 100  # what the API uses when page_size is omitted
+
+
+def _key(item: dict) -> Key:
+    return item["part"]["part_num"], item["color"]["id"]
+
+def _stub(part_num: str, color_id: int, quantity: int) -> dict:
+    """Entry for a part we wrote but haven't read back - no part/color details."""
+    return {"part": {"part_num": part_num}, "color": {"id": color_id}, "quantity": quantity}
+
+
+@dataclass
+class MirroredList:
+    items: dict[Key, dict] = field(default_factory=dict)  # API-shaped entries, in API order
+    stubs: set[Key] = field(default_factory=set)          # entries missing part/color details
+    loaded_at: float = field(default_factory=time.time)
+    writes: int = 0  # bumped by every write-through, so a reload racing a write can be dropped
+
+    @property
+    def complete(self) -> bool:
+        """Every entry carries full details, so whole-list reads can be served locally."""
+        return not self.stubs
+
+    def quantities(self) -> dict[Key, int]:
+        return {key: item["quantity"] for key, item in self.items.items()}
+
+
+class ListMirror:
+    """Local copy of the user's part lists: list_id -> (part_num, color_id) -> entry.
+
+    A list is loaded (all pages) the first time it's needed, kept current by
+    recording every write these tools make, and reloaded by the reconciler
+    to pick up edits made elsewhere (e.g. on the website).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lists: dict[str, MirroredList] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+        self.loads = 0
+        self.drift = 0  # entries the reconciler found changed behind our back
+
+    async def _fetch(self, list_id: str) -> MirroredList:
+        mirrored = MirroredList()
+        async for page in iter_pages(f"/users/{user_token}/partlists/{list_id}/parts/"):
+            for item in page:
+                key = _key(item)
+                if key in mirrored.items:
+                    # Same part+color listed twice - keep one entry with the total
+                    merged = mirrored.items[key]
+                    mirrored.items[key] = {**merged, "quantity": merged["quantity"] + item["quantity"]}
+                else:
+                    mirrored.items[key] = item
+        self.loads += 1
+        return mirrored
+
+    async def _load(self, list_id: str) -> MirroredList:
+        """Fetch a list and install it, unless a write landed while the fetch was in flight."""
+        previous = self._lists.get(list_id)
+        writes_before = previous.writes if previous else 0
+        fresh = await self._fetch(list_id)
+        current = self._lists.get(list_id)
+        if current is not None and current.writes != writes_before:
+            return current
+        if current is not None:
+            changed = {k for k in current.items.keys() | fresh.items.keys()
+                       if current.items.get(k, {}).get("quantity") != fresh.items.get(k, {}).get("quantity")}
+            if changed:
+                self.drift += len(changed)
+                logging.info(f"List mirror: {len(changed)} entries of list {list_id} changed upstream")
+        self._lists[list_id] = fresh
+        return fresh
+
+    async def get(self, list_id: str, reload: bool = False) -> MirroredList:
+        """The mirrored list, loading it first if needed. Concurrent loads share one fetch."""
+        list_id = str(list_id)
+        if not reload and list_id in self._lists:
+            return self._lists[list_id]
+        task = self._loading.get(list_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(list_id))
+            self._loading[list_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(list_id, None))
+        return await asyncio.shield(task)
+
+    async def quantity(self, list_id: str, part_num: str, color_id: int) -> int:
+        """How many of a part+color the list holds (0 if absent)."""
+        item = (await self.get(list_id)).items.get((part_num, int(color_id)))
+        return item["quantity"] if item else 0
+
+    def cached(self, list_id: str) -> MirroredList | None:
+        """The mirrored list if it's already loaded - never fetches."""
+        return self._lists.get(str(list_id))
+
+    def page(self, list_id: str, page: int | None, page_size: int | None) -> dict | None:
+        """A page of a fully detailed mirrored list, shaped like the API's response."""
+        mirrored = self.cached(list_id)
+        if mirrored is None or not mirrored.complete:
+            return None
+        page, page_size = page or 1, page_size or DEFAULT_PAGE_SIZE
+        items = list(mirrored.items.values())
+        start = (page - 1) * page_size
+        url = f"{BASE_URL}/users/{user_token}/partlists/{list_id}/parts/?page={{}}&page_size={page_size}"
+        return {
+            "count": len(items),
+            "next": url.format(page + 1) if start + page_size < len(items) else None,
+            "previous": url.format(page - 1) if page > 1 else None,
+            "results": items[start:start + page_size],
+        }
+
+    def record(self, list_id: str, part_num: str, color_id: int, quantity: int, item: dict | None = None):
+        """Note that a part+color now has `quantity` (0 = removed). Unloaded lists are left alone."""
+        mirrored = self.cached(list_id) if self.enabled else None
+        if mirrored is None:
+            return
+        key = (part_num, int(color_id))
+        mirrored.writes += 1
+        if quantity <= 0:
+            mirrored.items.pop(key, None)
+            mirrored.stubs.discard(key)
+            return
+        # Prefer the API's response when it's a full entry, then what we already had
+        if isinstance(item, dict) and isinstance(item.get("part"), dict) and "name" in item["part"]:
+            mirrored.items[key] = {**item, "quantity": quantity}
+            mirrored.stubs.discard(key)
+        elif key in mirrored.items:
+            mirrored.items[key] = {**mirrored.items[key], "quantity": quantity}
+        else:
+            mirrored.items[key] = _stub(part_num, int(color_id), quantity)
+            mirrored.stubs.add(key)
+
+    def record_added(self, list_id: str, part_num: str, color_id: int, quantity: int):
+        """Note a POST that added `quantity` on top of whatever was there."""
+        mirrored = self.cached(list_id) if self.enabled else None
+        if mirrored is None:
+            return
+        current = mirrored.items.get((part_num, int(color_id)))
+        self.record(list_id, part_num, color_id, (current["quantity"] if current else 0) + quantity)
+
+    def seed(self, list_id: str):
+        """Start mirroring a list we just created - it's known to be empty."""
+        if not self.enabled:
+            return
+        self._lists[str(list_id)] = MirroredList()
+
+    def forget(self, list_id: str):
+        """Drop a list whose contents are no longer known (deleted, or a write of unknown effect)."""
+        self._lists.pop(str(list_id), None)
+
+    async def reconcile(self, max_age: float):
+        """Reload every mirrored list older than `max_age` seconds."""
+        now = time.time()
+        for list_id in [lid for lid, m in self._lists.items() if now - m.loaded_at >= max_age]:
+            try:
+                await self.get(list_id, reload=True)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    self.forget(list_id)  # List was deleted
+                else:
+                    logging.warning(f"List mirror: reconciling list {list_id} failed: {e}")
+            except httpx.HTTPError as e:
+                logging.warning(f"List mirror: reconciling list {list_id} failed: {e}")
+
+    async def run_reconciler(self, interval_seconds: float):
+        """Reconcile mirrored lists against the API every `interval_seconds`."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.reconcile(interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "lists": len(self._lists),
+            "entries": sum(len(m.items) for m in self._lists.values()),
+            "loads": self.loads,
+            "drift": self.drift,
+        }
+
+
+mirror = ListMirror(enabled=LIST_MIRROR_ENABLED)
@@ -0,0 +1,394 @@
+# ===========================================
+# Part List Planning
+# ===========================================
+
+import asyncio
+from dataclasses import dataclass, field
+import httpx
+from src.rebrickable_mcp.config import REBRICKABLE_USER_TOKEN
+from src.rebrickable_mcp.api import call_api, iter_pages
+from src.rebrickable_mcp.executor import run_bounded
+from src.rebrickable_mcp.jobs import job_handler
+from src.rebrickable_mcp.list_mirror import Key, mirror
+
+user_token = REBRICKABLE_USER_TOKEN
+
+
+def parts_endpoint(list_id: str) -> str:
+    return f"/users/{user_token}/partlists/{list_id}/parts/"
+
+def part_endpoint(list_id: str, part_num: str, color_id: int) -> str:
+    return f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/"
+
+def coalesce(parts: list[dict]) -> dict[Key, int]:
+    """Sum quantities of duplicate (part_num, color_id) entries."""
+    totals: dict[Key, int] = {}
+    for part in parts:
+        key = (str(part["part_num"]), int(part["color_id"]))
+        totals[key] = totals.get(key, 0) + int(part.get("quantity", 1))
+    return totals
+
+async def fetch_quantities(list_id: str, fresh: bool = False) -> dict[Key, int]:
+    """Current quantity of every part+color in a list (all pages), from the mirror when enabled.
+
+    `fresh` reads the list live from the API, past the mirror and the response cache.
+    """
+    if mirror.enabled and not fresh:
+        return (await mirror.get(list_id)).quantities()
+    quantities: dict[Key, int] = {}
+    async for page in iter_pages(parts_endpoint(list_id), fresh=fresh):
+        for item in page:
+            key = (item["part"]["part_num"], item["color"]["id"])
+            quantities[key] = quantities.get(key, 0) + item["quantity"]
+    return quantities
+
+
+@dataclass
+class ListChanges:
+    """Minimal set of API writes that takes one list to its desired quantities."""
+    list_id: str
+    add: list[dict] = field(default_factory=list)     # {part_num, color_id, quantity} - one bulk POST
+    update: list[dict] = field(default_factory=list)  # {part_num, color_id, old_quantity, new_quantity} - PUT each
+    delete: list[dict] = field(default_factory=list)  # {part_num, color_id, old_quantity} - DELETE each
+
+    @property
+    def api_calls(self) -> int:
+        return (1 if self.add else 0) + len(self.update) + len(self.delete)
+
+    def without(self, keys: set[Key]) -> "ListChanges":
+        """Copy of these changes skipping the given part+color keys."""
+        def keep(item):
+            return (item["part_num"], item["color_id"]) not in keys
+        return ListChanges(
+            self.list_id,
+            [i for i in self.add if keep(i)],
+            [i for i in self.update if keep(i)],
+            [i for i in self.delete if keep(i)],
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "list_id": self.list_id,
+            "add": self.add,
+            "update": self.update,
+            "delete": self.delete,
+            "api_calls": self.api_calls,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ListChanges":
+        return cls(data["list_id"], data["add"], data["update"], data["delete"])
+
+    def removed(self) -> dict[Key, int]:
+        """How much these changes take off each key they lower."""
+        removed = {(i["part_num"], i["color_id"]): i["old_quantity"] for i in self.delete}
+        removed.update({
+            (i["part_num"], i["color_id"]): i["old_quantity"] - i["new_quantity"]
+            for i in self.update if i["new_quantity"] < i["old_quantity"]
+        })
+        return removed
+
+    def targets(self) -> dict[Key, int]:
+        """The end-state quantity of every key these changes touch (0 = removed)."""
+        targets = {(i["part_num"], i["color_id"]): i["quantity"] for i in self.add}
+        targets.update({(i["part_num"], i["color_id"]): i["new_quantity"] for i in self.update})
+        targets.update({(i["part_num"], i["color_id"]): 0 for i in self.delete})
+        return targets
+
+
+def plan_list_changes(list_id: str, current: dict[Key, int], desired: dict[Key, int]) -> ListChanges:
+    """Diff current against desired quantities. Keys missing from `desired` are left alone."""
+    changes = ListChanges(list_id)
+    for (part_num, color_id), quantity in desired.items():
+        old = current.get((part_num, color_id), 0)
+        if quantity == old:
+            continue
+        if quantity <= 0:
+            if old > 0:
+                changes.delete.append({"part_num": part_num, "color_id": color_id, "old_quantity": old})
+        elif old == 0:
+            changes.add.append({"part_num": part_num, "color_id": color_id, "quantity": quantity})
+        else:
+            changes.update.append({"part_num": part_num, "color_id": color_id, "old_quantity": old, "new_quantity": quantity})
+    return changes
+
+def plan_move(
+    source_list_id: str,
+    dest_list_id: str,
+    source: dict[Key, int],
+    dest: dict[Key, int],
+    moves: dict[Key, int]
+) -> tuple[ListChanges, ListChanges, list[dict]]:
+    """Plan moving `moves` quantities from source to dest.
+
+    Only what the source actually holds is moved; anything short is
+    returned in the third element instead of being invented in dest.
+    """
+    source_desired, dest_desired, shortfalls = {}, {}, []
+    for key, quantity in moves.items():
+        available = source.get(key, 0)
+        moved = min(quantity, available)
+        if moved < quantity:
+            shortfalls.append({"part_num": key[0], "color_id": key[1], "requested": quantity, "available": available})
+        if moved <= 0:
+            continue
+        source_desired[key] = available - moved
+        dest_desired[key] = dest.get(key, 0) + moved
+
+    return (
+        plan_list_changes(source_list_id, source, source_desired),
+        plan_list_changes(dest_list_id, dest, dest_desired),
+        shortfalls,
+    )
+
+
+# Writes go through these so the list mirror sees every change
+
+async def post_part(list_id: str, part_num: str, color_id: int, quantity: int) -> dict:
+    result = await call_api(
+        parts_endpoint(list_id),
+        data={"part_num": part_num, "color_id": color_id, "quantity": quantity},
+        method="POST"
+    )
+    mirror.record_added(list_id, part_num, color_id, quantity)
+    return result
+
+async def put_quantity(list_id: str, part_num: str, color_id: int, quantity: int) -> dict:
+    result = await call_api(part_endpoint(list_id, part_num, color_id), data={"quantity": quantity}, method="PUT")
+    mirror.record(list_id, part_num, color_id, quantity, item=result)
+    return result
+
+async def delete_part(list_id: str, part_num: str, color_id: int) -> dict:
+    result = await call_api(part_endpoint(list_id, part_num, color_id), method="DELETE")
+    mirror.record(list_id, part_num, color_id, 0)
+    return result
+
+async def bulk_add(list_id: str, parts: list[dict]) -> dict:
+    """POST a list of parts in one call (retrying transient failures). Returns a run_bounded outcome."""
+    outcomes = await run_bounded(
+        [parts], lambda batch: call_api(parts_endpoint(list_id), data=batch, method="POST"), concurrency=1
+    )
+    if outcomes[0]["ok"]:
+        for part in parts:
+            mirror.record_added(list_id, str(part["part_num"]), int(part["color_id"]), int(part.get("quantity", 1)))
+    else:
+        # A rejected batch may still have been partly applied - reload the list when next needed
+        mirror.forget(list_id)
+    return outcomes[0]
+
+
+async def _current_quantity(list_id: str, part_num: str, color_id: int) -> int:
+    """Quantity of a part+color in a list: free from the mirror, otherwise one GET."""
+    if mirror.enabled:
+        return await mirror.quantity(list_id, part_num, color_id)
+    try:
+        existing = await call_api(part_endpoint(list_id, part_num, color_id))
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        return 0
+    return existing["quantity"]
+
+async def _apply_delta(list_id: str, part_num: str, color_id: int, quantity: int, old_qty: int) -> dict:
+    if old_qty == 0:
+        # Doesn't exist, add fresh (only if positive quantity)
+        if quantity <= 0:
+            return {"status": "no_change", "part_num": part_num, "color_id": color_id, "message": "Part not in list and quantity is not positive"}
+        await post_part(list_id, part_num, color_id, quantity)
+        return {"status": "added", "part_num": part_num, "color_id": color_id, "quantity": quantity}
+
+    new_qty = old_qty + quantity
+    if new_qty <= 0:
+        # Delete if quantity would be 0 or negative
+        await delete_part(list_id, part_num, color_id)
+        return {"status": "deleted", "part_num": part_num, "color_id": color_id, "old_quantity": old_qty, "removed": old_qty}
+
+    # Update with new total
+    await put_quantity(list_id, part_num, color_id, new_qty)
+    return {"status": "updated", "part_num": part_num, "color_id": color_id, "old_quantity": old_qty, "added": quantity, "new_quantity": new_qty}
+
+async def add_or_update(list_id: str, part_num: str, color_id: int, quantity: int) -> dict:
+    """Add `quantity` of a part to a list (negative removes), creating or deleting the entry as needed.
+
+    With the list mirror this is a single write. If the API disagrees with the
+    mirror (the list was edited elsewhere), the list is reloaded and the write retried once.
+    """
+    old_qty = await _current_quantity(list_id, part_num, color_id)
+    try:
+        return await _apply_delta(list_id, part_num, color_id, quantity, old_qty)
+    except httpx.HTTPStatusError as e:
+        if not mirror.enabled or e.response.status_code not in (400, 404):
+            raise
+    await mirror.get(list_id, reload=True)
+    old_qty = await _current_quantity(list_id, part_num, color_id)
+    return await _apply_delta(list_id, part_num, color_id, quantity, old_qty)
+
+async def apply_changes(changes: ListChanges) -> list[dict]:
+    """Execute a ListChanges: one bulk POST for adds, concurrent PUT/DELETE for the rest.
+
+    Returns one result per item with status added/updated/deleted/error.
+    """
+    async def add(item: dict) -> dict:
+        return await post_part(changes.list_id, item["part_num"], item["color_id"], item["quantity"])
+
+    async def update(item: dict) -> dict:
+        return await put_quantity(changes.list_id, item["part_num"], item["color_id"], item["new_quantity"])
+
+    async def delete(item: dict) -> dict:
+        return await delete_part(changes.list_id, item["part_num"], item["color_id"])
+
+    # (item, operation, status on success)
+    work = []
+    results = []
+    if changes.add:
+        bulk = await bulk_add(changes.list_id, changes.add)
+        if bulk["ok"]:
+            results += [{**item, "status": "added"} for item in changes.add]
+        else:
+            # Bulk add rejected - fall back to adding each part on its own
+            work += [(item, add, "added") for item in changes.add]
+    work += [(item, update, "updated") for item in changes.update]
+    work += [(item, delete, "deleted") for item in changes.delete]
+
+    outcomes = await run_bounded(work, lambda step: step[1](step[0]))
+    failed = []
+    for (item, _, status), outcome in zip(work, outcomes):
+        if outcome["ok"]:
+            results.append({**item, "status": status})
+        else:
+            results.append({**item, "status": "error", "message": outcome["error"]})
+            failed.append((results[-1], status))
+    if failed:
+        await recheck_failed(changes, failed)
+    return results
+
+async def recheck_failed(changes: ListChanges, failed: list[tuple[dict, str]]):
+    """Check failed writes against the list itself, marking any that landed anyway as done.
+
+    A write can take effect even though its call failed - e.g. a bulk POST
+    applied before erroring, whose per-part retries are then rejected as
+    duplicates. Whatever the list already holds at its target quantity
+    counts as done, so callers don't treat it as missing.
+    """
+    mirror.forget(changes.list_id)  # whatever did land wasn't recorded
+    try:
+        current = await fetch_quantities(changes.list_id, fresh=True)
+    except httpx.HTTPError:
+        return
+    targets = changes.targets()
+    for result, status in failed:
+        key = (result["part_num"], result["color_id"])
+        if current.get(key, 0) == targets[key]:
+            result["status"] = status
+            result.pop("message", None)
+
+
+# ===========================================
+# Moving Parts Between Lists
+# ===========================================
+
+async def _replan(changes: ListChanges) -> ListChanges:
+    """Re-diff planned changes against the list as it is now, for a step resumed after a crash.
+
+    The plan holds end-state quantities, so writes that landed before the
+    crash drop out instead of being applied twice.
+    """
+    mirror.forget(changes.list_id)
+    current = await fetch_quantities(changes.list_id)
+    return plan_list_changes(changes.list_id, current, changes.targets())
+
+@job_handler("move_parts")
+async def move_parts(job, source_list_id: str, dest_list_id: str, parts: list[dict], dry_run: bool = False) -> dict:
+    """Move parts from one list to another (see the move_parts_between_lists tool).
+
+    Runs as journaled steps - plan, destination, then source - so a move
+    run as a background job resumes after a restart without moving anything
+    twice. `job` is a jobs.Job, or jobs.Inline to run in the caller's request.
+    """
+    moves = coalesce(parts)
+
+    async def plan() -> dict:
+        source, dest = await asyncio.gather(fetch_quantities(source_list_id), fetch_quantities(dest_list_id))
+        source_changes, dest_changes, not_in_source = plan_move(source_list_id, dest_list_id, source, dest, moves)
+        # Emptying the source completely: delete and recreate the list instead of N deletes
+        recreate_source = (
+            len(source_changes.delete) > 2
+            and not source_changes.update
+            and len(source_changes.delete) == len(source)
+        )
+        return {
+            "source": source_changes.as_dict(),
+            "destination": dest_changes.as_dict(),
+            "source_list_recreated": recreate_source,
+            "not_in_source": not_in_source,
+        }
+
+    plan = await job.step("plan", plan)
+    if dry_run:
+        return {"status": "planned", "parts_count": len(moves), **plan}
+
+    async def apply(changes: ListChanges) -> list[dict]:
+        return await apply_changes(await _replan(changes) if job.resumed else changes)
+
+    await job.progress(step="destination", parts_count=len(moves))
+    dest_results = await job.step("destination", lambda: apply(ListChanges.from_dict(plan["destination"])))
+
+    # Only take parts out of the source once the destination holds them
+    failed = {(r["part_num"], r["color_id"]) for r in dest_results if r["status"] == "error"}
+    source_changes = ListChanges.from_dict(plan["source"]).without(failed)
+    recreate_source = plan["source_list_recreated"] and not failed
+
+    result = {
+        "status": "partial" if failed else "moved",
+        "parts_count": len(moves),
+        "destination_results": dest_results,
+        "not_in_source": plan["not_in_source"],
+    }
+    await job.progress(step="source", parts_count=len(moves))
+
+    if recreate_source:
+        source_list = await job.step("read source", lambda: call_api(f"/users/{user_token}/partlists/{source_list_id}/"))
+        source_name = source_list.get("name", "Unnamed List")
+        emptied = source_changes.removed()
+
+        async def delete_source() -> bool:
+            # The plan may have come from the mirror or the response cache - only delete
+            # the list if it still holds exactly what was moved out of it, read live
+            try:
+                if await fetch_quantities(source_list_id, fresh=True) != emptied:
+                    return False
+                await call_api(f"/users/{user_token}/partlists/{source_list_id}/", method="DELETE")
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:  # already gone if resuming
+                    raise
+            mirror.forget(source_list_id)
+            return True
+
+        if await job.step("delete source", delete_source):
+            # Recreate with same name - NOTE: This will have a NEW list_id!
+            new_list = await job.step("recreate source", lambda: call_api(
+                f"/users/{user_token}/partlists/",
+                data={"name": source_name, "is_buildable": source_list.get("is_buildable", True)},
+                method="POST"
+            ))
+            mirror.seed(new_list.get("id"))
+            return {
+                **result,
+                "source_list_recreated": True,
+                "new_source_list_id": new_list.get("id"),
+                "note": f"Source list '{source_name}' was deleted and recreated with new ID: {new_list.get('id')}"
+            }
+
+        # The source changed since planning: take the moved quantities off what it holds now
+        async def replan_source() -> dict:
+            current = await fetch_quantities(source_list_id, fresh=True)
+            desired = {key: current.get(key, 0) - quantity for key, quantity in emptied.items()}
+            return plan_list_changes(source_list_id, current, desired).as_dict()
+
+        source_changes = ListChanges.from_dict(await job.step("replan source", replan_source))
+        result["note"] = "Source list changed since the move was planned - parts were removed one by one instead of recreating it"
+
+    source_results = await job.step("source", lambda: apply(source_changes))
+    if any(r["status"] == "error" for r in source_results):
+        result["status"] = "partial"
+    return {**result, "source_results": source_results}
@@ -0,0 +1,263 @@
+# ===========================================
+# Metrics & Tracing
+# ===========================================
+
+import contextlib
+import functools
+import inspect
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+
+from src.rebrickable_mcp.config import STRUCTURED_OUTPUT
+from src.rebrickable_mcp.shaping import shaped, as_text
+
+try:
+    from opentelemetry import trace
+except ImportError:  # tracing is optional
+    trace = None
+
+# Seconds - tool calls and upstream requests span ~1 ms (catalog) to tens of seconds (rate-limited bulk work)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        self._values[tuple(labels[name] for name in self.label_names)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects. Observations are O(log buckets)."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (math.inf,)
+        names = self.label_names + ("le",)
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Collected:
+    """Values read from elsewhere (cache stats, ...) at scrape time rather than recorded as they happen."""
+
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], list[tuple[dict, float]]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return lines
+
+
+REGISTRY: list = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===========================================
+# Server Metrics
+# ===========================================
+
+TOOL_DURATION = register(Histogram(
+    "rebrickable_tool_duration_seconds", "Tool call latency.", ("tool", "outcome")
+))
+TOOLS_IN_FLIGHT = register(Gauge(
+    "rebrickable_tool_calls_in_flight", "Tool calls currently running."
+))
+SESSIONS = register(Gauge(
+    "rebrickable_sessions_active", "Open MCP sessions.", ("transport",)
+))
+UPSTREAM_DURATION = register(Histogram(
+    "rebrickable_upstream_request_duration_seconds", "Rebrickable API request latency, per attempt.", ("method", "route")
+))
+UPSTREAM_REQUESTS = register(Counter(
+    "rebrickable_upstream_requests_total", "Rebrickable API requests sent, by response status.", ("method", "route", "status")
+))
+UPSTREAM_RETRIES = register(Counter(
+    "rebrickable_upstream_retries_total", "Rebrickable API requests retried after a 429.", ("method", "route")
+))
+RATE_LIMIT_WAIT = register(Histogram(
+    "rebrickable_rate_limit_wait_seconds", "Time spent waiting on the rate limiter before a request."
+))
+
+
+def route_label(endpoint: str) -> str:
+    """Endpoint with its ids replaced by placeholders, so labels stay few ("/lego/parts/{id}/colors/")."""
+    segments = endpoint.strip("/").split("/")
+    labelled = []
+    for i, segment in enumerate(segments):
+        previous = segments[i - 1] if i else ""
+        if previous == "users":
+            labelled.append("{user_token}")
+        elif segment.isdigit():
+            labelled.append("{id}")
+        elif i == 2 and segments[0] == "lego":
+            labelled.append("{id}")
+        elif previous == "parts" and i > 2:
+            labelled.append("{part_num}")
+        else:
+            labelled.append(segment)
+    return "/" + "/".join(labelled) + "/"
+
+
+# ===========================================
+# Tracing
+# ===========================================
+
+# OpenTelemetry's tracer when installed - a no-op until an SDK/exporter is configured
+_tracer = trace.get_tracer("rebrickable_mcp") if trace is not None else None
+
+def set_tracer(tracer):
+    """Send spans to another OpenTelemetry-compatible tracer (or None to turn tracing off)."""
+    global _tracer
+    _tracer = tracer
+
+def span(name: str, **attributes):
+    """Span around a block, parented to whatever span is current (tool call -> upstream requests)."""
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+# ===========================================
+# Tool Instrumentation
+# ===========================================
+
+def _outcome(result) -> str:
+    """Tools report failures as {"status": "error", "message": ...} rather than raising."""
+    if isinstance(result, dict) and (result.get("status") == "error" or result.get("error")):
+        return "error"
+    return "ok"
+
+def _instrument(name: str, fn):
+    """Wrap a tool so each call is timed and traced. Keeps its signature for FastMCP's schema."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "exception"
+            TOOLS_IN_FLIGHT.inc()
+            try:
+                with span(f"tool {name}", tool=name):
+                    result = await fn(*args, **kwargs)
+                outcome = _outcome(result)
+                return result
+            finally:
+                TOOLS_IN_FLIGHT.dec()
+                TOOL_DURATION.observe(time.perf_counter() - start, tool=name, outcome=outcome)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "exception"
+            TOOLS_IN_FLIGHT.inc()
+            try:
+                with span(f"tool {name}", tool=name):
+                    result = fn(*args, **kwargs)
+                outcome = _outcome(result)
+                return result
+            finally:
+                TOOLS_IN_FLIGHT.dec()
+                TOOL_DURATION.observe(time.perf_counter() - start, tool=name, outcome=outcome)
+    return wrapper
+
+
+class InstrumentedTools:
+    """Stands in for FastMCP in register_tools: every @mcp.tool() it registers is instrumented.
+
+    @mcp.tool(shape=True) also gives the tool `fields` and `compact` parameters
+    (see shaping.py). Results are sent as compact JSON unless STRUCTURED_OUTPUT is set.
+    """
+
+    def __init__(self, mcp):
+        self._mcp = mcp
+
+    def tool(self, name: str | None = None, shape: bool = False, **kwargs):
+        if not STRUCTURED_OUTPUT:
+            kwargs.setdefault("structured_output", False)
+        register_tool = self._mcp.tool(name, **kwargs)
+
+        def decorator(fn):
+            tool = _instrument(name or fn.__name__, shaped(fn) if shape else fn)
+            register_tool(tool if STRUCTURED_OUTPUT else as_text(tool))
+            return fn
+        return decorator
+
+    def __getattr__(self, attr):
+        return getattr(self._mcp, attr)
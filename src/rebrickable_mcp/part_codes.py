@@ -0,0 +1,50 @@
+# ===========================================
+# Part Codes
+# ===========================================
+
+import sqlite3
+import sys
+from bisect import bisect_left
+
+# (part code, color id) packed into one int: part code in the high bits, color id + 1 in the low 16
+COLOR_BITS = 16
+
+
+def pack_key(part_code: int, color_id: int) -> int:
+    return part_code << COLOR_BITS | (color_id + 1)
+
+def unpack_key(key: int) -> tuple[int, int]:
+    return key >> COLOR_BITS, (key & ((1 << COLOR_BITS) - 1)) - 1
+
+
+class PartCodes:
+    """Every catalog part number, sorted and interned once; a part's code is its position.
+
+    Shared by the in-memory indexes so each part number string exists once,
+    and looked up by bisection rather than a str -> int dict.
+    """
+
+    def __init__(self, part_nums: list[str]):
+        self.part_nums = [sys.intern(part_num) for part_num in part_nums]
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection) -> "PartCodes":
+        # BINARY collation orders UTF-8 bytes, which matches Python's code point order
+        return cls([part_num for (part_num,) in conn.execute("SELECT part_num FROM parts ORDER BY part_num")])
+
+    def to_sections(self, prefix: str) -> dict:
+        return {f"{prefix}.part_nums": self.part_nums}
+
+    @classmethod
+    def from_snapshot(cls, snapshot, prefix: str) -> "PartCodes":
+        return cls(snapshot[f"{prefix}.part_nums"])
+
+    def code(self, part_num: str) -> int | None:
+        i = bisect_left(self.part_nums, part_num)
+        return i if i < len(self.part_nums) and self.part_nums[i] == part_num else None
+
+    def __getitem__(self, code: int) -> str:
+        return self.part_nums[code]
+
+    def __len__(self) -> int:
+        return len(self.part_nums)
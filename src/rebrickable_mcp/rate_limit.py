@@ -0,0 +1,133 @@
+# ===========================================
+# Rate Limiting
+# ===========================================
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+
+class TokenBucket:
+    """Async token bucket shared by every request in this process.
+
+    Holds up to `burst` tokens and refills at `rate` tokens per second, so
+    requests go out back-to-back while budget is available and only wait
+    once it runs dry.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    async def penalize(self, seconds: float):
+        """Stop handing out tokens for `seconds` (e.g. after a 429)."""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + seconds)
+
+
+class SQLiteTokenBucket:
+    """Token bucket whose state lives in a local SQLite file.
+
+    Lets several worker processes on the same host share one API budget.
+    Each acquire is a short `BEGIN IMMEDIATE` transaction, which SQLite
+    serialises across processes. Transactions run in a worker thread, so
+    waiting on another process's lock never blocks the event loop.
+    """
+
+    def __init__(self, path: str | Path, rate: float, burst: int):
+        self.path = str(path)
+        self.rate = rate
+        self.capacity = burst
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bucket ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " tokens REAL NOT NULL, updated REAL NOT NULL, blocked_until REAL NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO bucket VALUES (0, ?, ?, 0)",
+                (float(burst), time.time()),
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _try_take(self) -> float:
+        """Take a token if one is available. Returns 0, or the seconds to wait."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated, blocked_until = conn.execute(
+                "SELECT tokens, updated, blocked_until FROM bucket WHERE id = 0"
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            if now < blocked_until:
+                delay = blocked_until - now
+            elif tokens >= 1:
+                tokens -= 1
+                delay = 0.0
+            else:
+                delay = (1 - tokens) / self.rate
+            conn.execute(
+                "UPDATE bucket SET tokens = ?, updated = ? WHERE id = 0", (tokens, now)
+            )
+            conn.execute("COMMIT")
+            return delay
+        finally:
+            conn.close()
+
+    def _block(self, seconds: float):
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute(
+                "UPDATE bucket SET tokens = 0, updated = ?,"
+                " blocked_until = MAX(blocked_until, ?) WHERE id = 0",
+                (now, now + seconds),
+            )
+        finally:
+            conn.close()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            delay = await asyncio.to_thread(self._try_take)
+            if delay <= 0:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def penalize(self, seconds: float):
+        """Stop handing out tokens for `seconds` in every process (e.g. after a 429)."""
+        await asyncio.to_thread(self._block, seconds)
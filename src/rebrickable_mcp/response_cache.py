@@ -0,0 +1,225 @@
+# ===========================================
+# Response Cache
+# ===========================================
+
+import asyncio
+import contextlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    body: bytes
+    expires: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    def json(self) -> dict | list:
+        return json.loads(self.body)
+
+
+# Invalidations kept for other processes to catch up on - far more than they fall behind by
+INVALIDATION_LOG_SIZE = 10000
+
+
+class DiskTier:
+    """SQLite-backed second tier so cached responses survive restarts.
+
+    Also keeps a log of invalidated prefixes, so processes sharing the file
+    can drop the same keys from their own memory tier.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, body BLOB NOT NULL, expires REAL NOT NULL,"
+                " etag TEXT, last_modified TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, prefix TEXT NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, expires, etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def put(self, key: str, entry: CacheEntry):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, entry.body, entry.expires, entry.etag, entry.last_modified),
+            )
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Drop matching rows and log the invalidation. Returns its log id."""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM responses WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff")
+            )
+            logged = conn.execute("INSERT INTO invalidations (prefix) VALUES (?)", (prefix,)).lastrowid
+            conn.execute("DELETE FROM invalidations WHERE id <= ?", (logged - INVALIDATION_LOG_SIZE,))
+        return logged
+
+    def last_invalidation(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+
+    def invalidations_since(self, last_id: int) -> list[tuple[int, str]]:
+        """(id, prefix) of every invalidation logged after `last_id`, oldest first."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT id, prefix FROM invalidations WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+
+
+class ResponseCache:
+    """LRU cache of raw API response bodies, bounded by total bytes.
+
+    Expired entries are kept (until evicted) so their ETag/Last-Modified
+    can be used to revalidate instead of re-downloading.
+
+    With `shared`, other processes write to the same disk tier: every lookup
+    first replays their invalidations against this process's memory tier.
+
+    Every invalidation bumps a generation. A response fetched across one -
+    the request started before a write to its prefix and answered after it -
+    may hold the old data, so put() drops it instead of caching it.
+    """
+
+    def __init__(self, max_bytes: int, disk_path: str | Path | None = None, shared: bool = False):
+        self.max_bytes = max_bytes
+        self.disk = DiskTier(disk_path) if disk_path else None
+        self.shared = shared and self.disk is not None
+        self._synced = self.disk.last_invalidation() if self.shared else 0
+        self._own_invalidations: set[int] = set()  # log ids this process wrote - already applied here
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._invalidated: dict[str, int] = {}  # prefix -> generation it was last invalidated at
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.discarded = 0  # responses not cached because a write overtook them
+
+    def generation(self) -> int:
+        """Current invalidation generation - take it before sending a request whose response you'll put()."""
+        return self._generation
+
+    def _overtaken(self, key: str, generation: int) -> bool:
+        return any(
+            invalidated > generation and key.startswith(prefix)
+            for prefix, invalidated in self._invalidated.items()
+        )
+
+    def _store(self, key: str, entry: CacheEntry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old.body)
+        if len(entry.body) > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self.evictions += 1
+
+    def _drop_prefix(self, prefix: str):
+        self._generation += 1
+        self._invalidated[prefix] = self._generation
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._bytes -= len(self._entries.pop(key).body)
+
+    async def _sync(self):
+        """Apply invalidations other processes logged since we last looked."""
+        for last_id, prefix in await asyncio.to_thread(self.disk.invalidations_since, self._synced):
+            if last_id in self._own_invalidations:
+                self._own_invalidations.discard(last_id)
+            else:
+                self._drop_prefix(prefix)
+            self._synced = last_id
+
+    async def get(self, key: str) -> CacheEntry | None:
+        """Look up an entry (fresh or stale) in memory, then on disk."""
+        if self.shared:
+            await self._sync()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry is not None:
+                self._store(key, entry)
+
+        if entry is not None and entry.fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    async def put(self, key: str, entry: CacheEntry, generation: int | None = None):
+        """Store an entry. With the `generation` taken before its request, skip it if its key was invalidated since."""
+        if generation is not None:
+            if self.shared:
+                await self._sync()
+            if self._overtaken(key, generation):
+                self.discarded += 1
+                return
+        self._store(key, entry)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.put, key, entry)
+
+    async def refresh(self, key: str, entry: CacheEntry, ttl: float, generation: int | None = None):
+        """Extend a stale entry after a 304 Not Modified."""
+        self.revalidations += 1
+        await self.put(key, CacheEntry(entry.body, time.time() + ttl, entry.etag, entry.last_modified), generation)
+
+    async def invalidate_prefix(self, prefix: str):
+        """Drop every entry whose key starts with `prefix`."""
+        self._drop_prefix(prefix)
+        if self.disk is not None:
+            logged = await asyncio.to_thread(self.disk.invalidate_prefix, prefix)
+            if self.shared:
+                self._own_invalidations.add(logged)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "discarded": self.discarded,
+            "shared": self.shared,
+        }
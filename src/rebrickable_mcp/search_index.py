@@ -0,0 +1,246 @@
+# ===========================================
+# Part Search Index
+# ===========================================
+
+import re
+import sqlite3
+from array import array
+from bisect import bisect_left
+from src.rebrickable_mcp.part_codes import PartCodes
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Match weights - a query token scores by the best way it matched a part
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+PART_NUM_BONUS = 2.0  # query token equals the part number (or an alternate)
+
+MAX_PREFIX_EXPANSIONS = 64
+MIN_FUZZY_DICE = 0.2
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+def _trigrams(token: str) -> set[str]:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _within_edits(a: str, b: str, limit: int) -> bool:
+    """True if a and b are at most `limit` edits apart (insert, delete, substitute, swap adjacent)."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+class _Postings:
+    """Sorted vocabulary with a sorted doc-id run per token, all packed into one array."""
+
+    def __init__(self, postings: dict[str, list[int]]):
+        self.vocab = sorted(postings)
+        self.offsets = array("I", [0])
+        self.docs = array("I")
+        for token in self.vocab:
+            self.docs.extend(sorted(set(postings[token])))
+            self.offsets.append(len(self.docs))
+        self._view = memoryview(self.docs)
+
+    def to_sections(self, prefix: str) -> dict:
+        return {f"{prefix}.vocab": self.vocab, f"{prefix}.offsets": self.offsets, f"{prefix}.docs": self.docs}
+
+    @classmethod
+    def from_snapshot(cls, snapshot, prefix: str) -> "_Postings":
+        postings = cls.__new__(cls)
+        postings.vocab = snapshot[f"{prefix}.vocab"]
+        postings.offsets = snapshot[f"{prefix}.offsets"]
+        postings.docs = postings._view = snapshot[f"{prefix}.docs"]
+        return postings
+
+    def __getitem__(self, i: int) -> memoryview:
+        """Doc ids for vocabulary id `i` - a view into the shared array, not a copy."""
+        return self._view[self.offsets[i]:self.offsets[i + 1]]
+
+    def find(self, token: str) -> int | None:
+        i = bisect_left(self.vocab, token)
+        return i if i < len(self.vocab) and self.vocab[i] == token else None
+
+    def get(self, token: str) -> memoryview | None:
+        i = self.find(token)
+        return self[i] if i is not None else None
+
+    def prefixed(self, prefix: str, limit: int) -> list[int]:
+        """Vocabulary ids of tokens that start with `prefix` (excluding an exact match)."""
+        found = []
+        i = bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix) and len(found) < limit:
+            if self.vocab[i] != prefix:
+                found.append(i)
+            i += 1
+        return found
+
+
+class PartSearchIndex:
+    """In-process inverted index over the catalog's parts.
+
+    Two token indexes: `numbers` (part numbers plus alternate/mold part
+    numbers, exact and prefix match) and `words` (part and category names,
+    exact, prefix and typo-tolerant match via a trigram index over the
+    vocabulary). A query matches a part only if every query token does.
+    """
+
+    def __init__(self, parts: PartCodes, name_lengths: array, categories: array,
+                 numbers: dict[str, list[int]], words: dict[str, list[int]]):
+        self.parts = parts
+        self.name_lengths = name_lengths  # ranking tie-break: shorter names first
+        self.categories = categories
+        self.numbers = _Postings(numbers)
+        self.words = _Postings(words)
+
+        # Trigram -> vocabulary ids, for finding misspelt words
+        word_trigrams: dict[str, list[int]] = {}
+        for word_id, word in enumerate(self.words.vocab):
+            if len(word) >= 3 and not word.isdigit():
+                for gram in _trigrams(word):
+                    word_trigrams.setdefault(gram, []).append(word_id)
+        self._word_trigrams = _Postings(word_trigrams)
+
+    def to_sections(self, prefix: str) -> dict:
+        return {
+            f"{prefix}.name_lengths": self.name_lengths,
+            f"{prefix}.categories": self.categories,
+            **self.numbers.to_sections(f"{prefix}.numbers"),
+            **self.words.to_sections(f"{prefix}.words"),
+            **self._word_trigrams.to_sections(f"{prefix}.trigrams"),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot, prefix: str, parts: PartCodes) -> "PartSearchIndex":
+        """Rebuild the index over a mapped snapshot - no tokenizing, nothing copied."""
+        index = cls.__new__(cls)
+        index.parts = parts
+        index.name_lengths = snapshot[f"{prefix}.name_lengths"]
+        index.categories = snapshot[f"{prefix}.categories"]
+        index.numbers = _Postings.from_snapshot(snapshot, f"{prefix}.numbers")
+        index.words = _Postings.from_snapshot(snapshot, f"{prefix}.words")
+        index._word_trigrams = _Postings.from_snapshot(snapshot, f"{prefix}.trigrams")
+        return index
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection, parts: PartCodes) -> "PartSearchIndex":
+        """Build the index from the catalog mirror's parts, categories and relationships.
+
+        Doc ids are part codes: both come from the parts table in part_num order.
+        """
+        name_lengths, categories = array("H"), array("H")
+        numbers: dict[str, list[int]] = {}
+        words: dict[str, list[int]] = {}
+
+        for doc, (part_num, name, part_cat_id, cat_name) in enumerate(conn.execute(
+            "SELECT p.part_num, p.name, p.part_cat_id, coalesce(c.name, '')"
+            " FROM parts p LEFT JOIN part_categories c ON c.id = p.part_cat_id ORDER BY p.part_num"
+        )):
+            name_lengths.append(min(len(name), 0xFFFF))
+            categories.append(part_cat_id)
+            numbers.setdefault(part_num.lower(), []).append(doc)
+            for token in tokenize(f"{name} {cat_name}"):
+                words.setdefault(token, []).append(doc)
+
+        # Alternates and molds are interchangeable, so each is findable by the other's number
+        for child, parent in conn.execute(
+            "SELECT child_part_num, parent_part_num FROM part_relationships WHERE rel_type IN ('A', 'M')"
+        ):
+            child_doc, parent_doc = parts.code(child), parts.code(parent)
+            if child_doc is not None and parent_doc is not None:
+                numbers.setdefault(child.lower(), []).append(parent_doc)
+                numbers.setdefault(parent.lower(), []).append(child_doc)
+
+        return cls(parts, name_lengths, categories, numbers, words)
+
+    def _fuzzy(self, token: str) -> list[int]:
+        """Vocabulary ids of words within a small edit distance of `token`."""
+        grams = _trigrams(token)
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for word_id in self._word_trigrams.get(gram) or ():
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        limit = 1 if len(token) <= 5 else 2
+        found = []
+        for word_id, count in shared.items():
+            word = self.words.vocab[word_id]
+            dice = 2 * count / (len(grams) + len(word))  # a padded word has len(word) trigrams
+            if dice >= MIN_FUZZY_DICE and word != token and _within_edits(token, word, limit):
+                found.append(word_id)
+        return found
+
+    def _expand(self, token: str) -> list[tuple[memoryview, float]]:
+        """Every posting list a query token can match through, with its weight."""
+        expansions = []
+
+        exact_number = self.numbers.get(token)
+        if exact_number is not None:
+            expansions.append((exact_number, EXACT_WEIGHT + PART_NUM_BONUS))
+        if len(token) >= 3:
+            for i in self.numbers.prefixed(token, MAX_PREFIX_EXPANSIONS):
+                expansions.append((self.numbers[i], PREFIX_WEIGHT))
+
+        exact_word = self.words.get(token)
+        if exact_word is not None:
+            expansions.append((exact_word, EXACT_WEIGHT))
+        if len(token) >= 2:
+            for i in self.words.prefixed(token, MAX_PREFIX_EXPANSIONS):
+                expansions.append((self.words[i], PREFIX_WEIGHT))
+        if exact_word is None and exact_number is None and len(token) >= 3 and not token.isdigit():
+            for i in self._fuzzy(token):
+                expansions.append((self.words[i], FUZZY_WEIGHT))
+
+        # Strongest first, so each doc is credited with its best match
+        expansions.sort(key=lambda expansion: -expansion[1])
+        return expansions
+
+    def search(self, query: str, part_cat_id: int | None = None) -> list[str]:
+        """Ranked part numbers matching every token in `query`."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        expanded = [self._expand(token) for token in tokens]
+        if not all(expanded):
+            return []
+
+        # Seed candidates from the most selective token, then filter by the rest
+        expanded.sort(key=lambda lists: sum(len(docs) for docs, _ in lists))
+        scores: dict[int, float] = {}
+        for docs, weight in expanded[0]:
+            for doc in docs:
+                if weight > scores.get(doc, 0):
+                    scores[doc] = weight
+
+        for lists in expanded[1:]:
+            pending = set(scores)
+            matched: dict[int, float] = {}
+            for docs, weight in lists:
+                hits = pending.intersection(docs)
+                for doc in hits:
+                    matched[doc] = weight
+                pending -= hits
+                if not pending:
+                    break
+            scores = {doc: scores[doc] + weight for doc, weight in matched.items()}
+
+        if part_cat_id is not None:
+            scores = {doc: s for doc, s in scores.items() if self.categories[doc] == part_cat_id}
+
+        ranked = sorted(scores, key=lambda doc: (-scores[doc], self.name_lengths[doc], doc))
+        return [self.parts[doc] for doc in ranked]
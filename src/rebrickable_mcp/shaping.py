@@ -0,0 +1,143 @@
+# ===========================================
+# Response Shaping
+# ===========================================
+
+import functools
+import inspect
+import json
+
+from mcp.types import TextContent
+
+try:
+    import orjson
+except ImportError:  # faster JSON is optional
+    orjson = None
+
+
+def loads(data: bytes | str):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def dumps(value) -> str:
+    """Compact JSON - several times faster than the indented output FastMCP produces by default."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+# ===========================================
+# Projection
+# ===========================================
+
+# Nested objects compact mode replaces with their id: key -> (id field, name of the replacement)
+REFERENCES = {
+    "part": ("part_num", "part_num"),
+    "color": ("id", "color_id"),
+    "set": ("set_num", "set_num"),
+}
+
+# Dropped in compact mode - links and cross-references that are rarely wanted in bulk
+DROPPED = {"part_img_url", "part_url", "set_img_url", "set_url", "img_url", "external_ids"}
+
+
+def project(item: dict, fields: list[str]) -> dict:
+    """Keep only `fields` of an item. Dotted paths reach into nested objects ("part.part_num")."""
+    projected = {}
+    for field in fields:
+        value = item
+        for key in field.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        projected[field] = value
+    return projected
+
+def compact(value):
+    """Smaller equivalent of a tool result.
+
+    Nested part/color/set objects become their id (colors are looked up with
+    list_colors), links and external ids are dropped, and lists of objects
+    become a table: {"columns": [...], "rows": [[...], ...]}.
+    """
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            if key in DROPPED:
+                continue
+            reference = REFERENCES.get(key)
+            if reference and isinstance(item, dict) and reference[0] in item:
+                compacted[reference[1]] = item[reference[0]]
+            else:
+                compacted[key] = compact(item)
+        return compacted
+    if isinstance(value, list):
+        items = [compact(item) for item in value]
+        if len(items) < 2 or not all(isinstance(item, dict) for item in items):
+            return items
+        columns = list(dict.fromkeys(key for item in items for key in item))
+        return {"columns": columns, "rows": [[item.get(column) for column in columns] for item in items]}
+    return value
+
+def shape(result, fields: list[str] | None = None, compact_mode: bool = False):
+    """Apply a caller's `fields` and `compact` choices to a tool result.
+
+    Fields select from each item of a list or paged response ({"results": [...]}),
+    otherwise from the result itself.
+    """
+    if fields:
+        if isinstance(result, list):
+            result = [project(item, fields) if isinstance(item, dict) else item for item in result]
+        elif isinstance(result, dict) and isinstance(result.get("results"), list):
+            result = {**result, "results": [project(item, fields) for item in result["results"]]}
+        elif isinstance(result, dict):
+            result = project(result, fields)
+    return compact(result) if compact_mode else result
+
+
+# ===========================================
+# Tool Wrappers
+# ===========================================
+
+SHAPE_PARAMETERS = [
+    inspect.Parameter("fields", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=list[str] | None),
+    inspect.Parameter("compact", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool),
+]
+
+SHAPE_DOC = """
+        fields: Keep only these fields of each result; dotted paths reach into nested objects,
+                e.g. ["part.part_num", "color.id", "quantity"].
+        compact: Smaller output - nested part/color/set objects become their ids (color names
+                 via list_colors), image links are dropped and lists become
+                 {"columns": [...], "rows": [[...]]}.
+        """
+
+def shaped(fn):
+    """Give a tool `fields` and `compact` parameters, applied to whatever it returns."""
+    signature = inspect.signature(fn)
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, fields: list[str] | None = None, compact: bool = False, **kwargs):
+            return shape(await fn(*args, **kwargs), fields, compact)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, fields: list[str] | None = None, compact: bool = False, **kwargs):
+            return shape(fn(*args, **kwargs), fields, compact)
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *SHAPE_PARAMETERS])
+    wrapper.__annotations__ = {**fn.__annotations__, "fields": list[str] | None, "compact": bool}
+    wrapper.__doc__ = (fn.__doc__ or "").rstrip() + "\n" + SHAPE_DOC
+    return wrapper
+
+def as_text(fn):
+    """Return a tool's result as one compact JSON text block.
+
+    FastMCP would otherwise send indented JSON - one block per item for lists -
+    and, for tools with an output schema, the whole result again as structured content.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            result = await fn(*args, **kwargs)
+            return TextContent(type="text", text=result if isinstance(result, str) else dumps(result))
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            return TextContent(type="text", text=result if isinstance(result, str) else dumps(result))
+    return wrapper
@@ -0,0 +1,56 @@
+# ===========================================
+# Single-Flight Requests
+# ===========================================
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one.
+
+    The first caller for a key starts the work as its own task; anyone
+    asking for the same key while it runs awaits that task instead of
+    starting another. Cancelling one waiter doesn't cancel the shared
+    work, and an exception is raised to every waiter.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.leaders = 0    # calls that did the work
+        self.collapsed = 0  # calls that shared someone else's
+
+    async def run(self, key: str, fn: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def forget_prefix(self, prefix: str):
+        """Stop handing out in-flight work for these keys - later callers start afresh.
+
+        Used after a write, so a read that began before it isn't shared with
+        callers who asked after it. Callers already waiting still get its result.
+        The detached work still finishes; keeping its result out of the response
+        cache is the cache's invalidation generation's job (see ResponseCache.put).
+        """
+        for key in [k for k in self._inflight if k.startswith(prefix)]:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        calls = self.leaders + self.collapsed
+        return {
+            "in_flight": len(self._inflight),
+            "upstream": self.leaders,
+            "collapsed": self.collapsed,
+            "collapsed_ratio": round(self.collapsed / calls, 3) if calls else 0.0,
+        }
@@ -0,0 +1,94 @@
+# ===========================================
+# Index Snapshots
+# ===========================================
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+
+MAGIC = b"RBSNAP01"
+ALIGN = 8
+STRING_SEP = "\0"
+
+Section = array | memoryview | bytes | list[str]
+
+
+def _encode(value: Section) -> tuple[bytes, str]:
+    """Raw bytes of a section and its kind: an array typecode, "bytes" or "str"."""
+    if isinstance(value, list):
+        return STRING_SEP.join(value).encode("utf-8"), "str"
+    if isinstance(value, array):
+        return value.tobytes(), value.typecode
+    if isinstance(value, memoryview):
+        return value.tobytes(), value.format
+    return bytes(value), "bytes"
+
+def write_snapshot(path: str | Path, sections: dict[str, Section], meta: dict):
+    """Write named sections into one file, each aligned so it can be mapped back as-is.
+
+    Layout: MAGIC, header length (u64), JSON header {meta, sections: {name: [offset, size, kind]}},
+    padding, then the section bodies. Written to a temp file and swapped into place.
+    """
+    path = Path(path)
+    toc, chunks, offset = {}, [], 0
+    for name, value in sections.items():
+        data, kind = _encode(value)
+        padding = -offset % ALIGN
+        chunks.append(b"\0" * padding)
+        offset += padding
+        toc[name] = [offset, len(data), kind]
+        chunks.append(data)
+        offset += len(data)
+
+    header = json.dumps({"meta": meta, "sections": toc}).encode("utf-8")
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Read-only memory map of a file written by write_snapshot.
+
+    Array sections come back as memoryviews straight over the mapping, so
+    nothing is copied and pages are shared with every other process mapping
+    the same file. The mapping stays valid after the file is replaced.
+    """
+
+    def __init__(self, path: str | Path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an index snapshot")
+        header_start = len(MAGIC) + 8
+        if len(self._map) < header_start:
+            raise ValueError(f"{path} is truncated")
+        (header_size,) = struct.unpack_from("<Q", self._map, len(MAGIC))
+        header = json.loads(self._map[header_start:header_start + header_size])
+        self.meta = header["meta"]
+        self._sections = header["sections"]
+        end = header_start + header_size
+        self._base = end + (-end % ALIGN)
+        # A partly written or cut-off file would otherwise map short sections without complaint
+        if self._base + max((offset + size for offset, size, _ in self._sections.values()), default=0) > len(self._map):
+            raise ValueError(f"{path} is truncated")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def __getitem__(self, name: str) -> memoryview | bytes | list[str]:
+        offset, size, kind = self._sections[name]
+        view = memoryview(self._map)[self._base + offset:self._base + offset + size]
+        if kind == "str":
+            return bytes(view).decode("utf-8").split(STRING_SEP) if size else []
+        if kind == "bytes":
+            return bytes(view)
+        return view.cast(kind)
@@ -0,0 +1,86 @@
+# ===========================================
+# Startup Profiling
+# ===========================================
+
+import contextlib
+import os
+import re
+import sys
+import time
+
+# Set in the child process started by profile_startup; phase() is a no-op otherwise
+PROFILE_ENV = "REBRICKABLE_PROFILE_STARTUP"
+PHASE_PREFIX = "startup-phase:"
+
+# `python -X importtime` lines: "import time: <self us> | <cumulative us> | <indent><module>"
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Time an initialisation step when running under profile_startup."""
+    if not os.environ.get(PROFILE_ENV):
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        print(f"{PHASE_PREFIX}{name}\t{time.perf_counter() - start:.6f}", file=sys.stderr, flush=True)
+
+def _parse(stderr: str) -> tuple[list[tuple[str, float, float, int]], list[tuple[str, float]]]:
+    """Split the child's stderr into (module, self s, cumulative s, depth) imports and (name, s) phases."""
+    imports, phases = [], []
+    for line in stderr.splitlines():
+        if line.startswith(PHASE_PREFIX):
+            name, seconds = line[len(PHASE_PREFIX):].rsplit("\t", 1)
+            phases.append((name, float(seconds)))
+            continue
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us) / 1e6, int(cumulative_us) / 1e6, len(indent) // 2))
+    return imports, phases
+
+def profile_startup(target: str = "src.main", entry: str = "create_app", top: int = 15) -> tuple[str, float]:
+    """Start the server module in a fresh interpreter up to (not including) serving, and report where the time went.
+
+    Runs `import target; target.entry()` under `python -X importtime` so every
+    module is timed exactly as on a real cold start. Returns the report and the
+    total wall-clock seconds.
+    """
+    import subprocess  # only needed here, keep it off the normal start path
+
+    code = f"import {target} as m; m.{entry}()"
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env={**os.environ, PROFILE_ENV: "1"},
+        capture_output=True,
+        text=True,
+    )
+    total = time.perf_counter() - start
+    if child.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{child.stderr[-2000:]}")
+
+    imports, phases = _parse(child.stderr)
+
+    # Self time summed per distribution, e.g. everything under mcp.* or pydantic.*
+    by_package: dict[str, float] = {}
+    for module, self_s, _, _ in imports:
+        package = module.split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + self_s
+
+    lines = [f"Cold start: {total * 1000:.0f} ms wall clock (interpreter start included)", "", "Init phases:"]
+    lines += [f"  {seconds * 1000:8.1f} ms  {name}" for name, seconds in phases]
+    lines += ["", "Imports by top-level package (self time):"]
+    lines += [
+        f"  {seconds * 1000:8.1f} ms  {package}"
+        for package, seconds in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    ]
+    lines += ["", f"Slowest {top} modules (self time, includes init work run at import):"]
+    lines += [
+        f"  {self_s * 1000:8.1f} ms  {module}"
+        for module, self_s, _, _ in sorted(imports, key=lambda item: -item[1])[:top]
+    ]
+    return "\n".join(lines), total
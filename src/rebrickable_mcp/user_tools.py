@@ -2,13 +2,22 @@
 # User Tools
 # ===========================================
  
-from mcp.server.fastmcp import FastMCP
-from src.rebrickable_mcp.config import REBRICKABLE_USER_TOKEN
-from src.rebrickable_mcp.api import call_api
-import httpx
-import time
+from mcp.server.fastmcp import Context
+from src.rebrickable_mcp.config import REBRICKABLE_USER_TOKEN, IMPORT_BATCH_SIZE
+from src.rebrickable_mcp.api import call_api, iter_pages
+from src.rebrickable_mcp.list_ops import (
+    coalesce, fetch_quantities, bulk_add, add_or_update, post_part, put_quantity, delete_part,
+    move_parts
+)
+from src.rebrickable_mcp.cache import set_index, color_index
+from src.rebrickable_mcp.list_mirror import mirror
+from src.rebrickable_mcp.executor import run_bounded, summarize
+from src.rebrickable_mcp.list_io import (
+    FORMATS, MAX_REPORTED_SKIPS, ImportCheckpoint, resolve_path, detect_format, plan_import, import_parts, export_list
+)
+from src.rebrickable_mcp.jobs import STATUSES, Inline, queue
+from src.rebrickable_mcp.collection import build_collection_index
 
-mcp = FastMCP("Rebrickable MCP Server")
 user_token = REBRICKABLE_USER_TOKEN
 
 def register_tools(mcp):
@@ -17,46 +26,92 @@ def register_tools(mcp):
     # Part Lists
     # ===========================================
 
-    @mcp.tool()
-    def get_part_lists(page: int | None = None, page_size: int | None = None) -> dict | list:
-        """Get a list of all the user's Part Lists."""
-        params = {k: v for k, v in locals().items() if v is not None}
-        return call_api(f"/users/{user_token}/partlists/", params=params)
+    async def _collect_pages(endpoint: str, params: dict, ctx: Context | None) -> dict:
+        """Follow every page of a list endpoint, streaming progress to the client as pages arrive."""
+        results = []
+        async for page in iter_pages(endpoint, params):
+            results.extend(page)
+            if ctx is not None:
+                try:
+                    await ctx.report_progress(len(results), message=f"Fetched {len(results)} items")
+                except ValueError:
+                    ctx = None  # Called outside an MCP request - nobody to stream to
+        return {"count": len(results), "results": results}
 
-    @mcp.tool()
-    def get_parts_from_list_id(
+    @mcp.tool(shape=True)
+    async def get_part_lists(
+        page: int | None = None,
+        page_size: int | None = None,
+        all_pages: bool = False,
+        ctx: Context = None
+    ) -> dict | list:
+        """Get a list of all the user's Part Lists.
+        
+        all_pages: Fetch every page and return them combined (page/page_size are ignored).
+        """
+        if all_pages:
+            return await _collect_pages(f"/users/{user_token}/partlists/", {}, ctx)
+        params = {k: v for k, v in {"page": page, "page_size": page_size}.items() if v is not None}
+        return await call_api(f"/users/{user_token}/partlists/", params=params)
+
+    @mcp.tool(shape=True)
+    async def get_parts_from_list_id(
         list_id: str,
         page: int | None = None,
         page_size: int | None = None,
-        ordering: str | None = None
+        ordering: str | None = None,
+        all_pages: bool = False,
+        ctx: Context = None
     ) -> dict | list:
-        """Get a list of all the Parts in a specific Part List."""
-        params = {k: v for k, v in locals().items() if v is not None and k != 'list_id'}
-        return call_api(f"/users/{user_token}/partlists/{list_id}/parts/", params=params)
+        """Get a list of all the Parts in a specific Part List.
+        
+        all_pages: Fetch every page and return them combined (page/page_size are ignored).
+        
+        Without an ordering, reads are served from the local list mirror when it has the list.
+        """
+        endpoint = f"/users/{user_token}/partlists/{list_id}/parts/"
+        if mirror.enabled and not ordering:
+            if all_pages:
+                mirrored = await mirror.get(list_id)
+                if not mirrored.complete:
+                    # Parts added since the last load lack details - one reload fills them in
+                    mirrored = await mirror.get(list_id, reload=True)
+                results = list(mirrored.items.values())
+                return {"count": len(results), "results": results}
+            cached_page = mirror.page(list_id, page, page_size)
+            if cached_page is not None:
+                return cached_page
+        if all_pages:
+            params = {"ordering": ordering} if ordering else {}
+            return await _collect_pages(endpoint, params, ctx)
+        params = {k: v for k, v in {"page": page, "page_size": page_size, "ordering": ordering}.items() if v is not None}
+        return await call_api(endpoint, params=params)
 
     @mcp.tool()
-    def create_part_list(
+    async def create_part_list(
         name: str,
         num_parts: int | None = None,
         is_buildable: bool | None = None
     ) -> dict | list:
         """Add a new part list."""
         data = {k: v for k, v in locals().items() if v is not None}
-        return call_api(f"/users/{user_token}/partlists/", data=data, method="POST")
+        new_list = await call_api(f"/users/{user_token}/partlists/", data=data, method="POST")
+        if isinstance(new_list, dict) and new_list.get("id") is not None:
+            mirror.seed(new_list["id"])
+        return new_list
 
     @mcp.tool()
-    def add_part_to_list(
+    async def add_part_to_list(
         list_id: str,
         part_num: str,
         color_id: int,
         quantity: int = 1
     ) -> dict | list:
         """Add a part to a part list. If part+color already exists, returns error - use add_or_update_part instead."""
-        data = {"part_num": part_num, "color_id": color_id, "quantity": quantity}
-        return call_api(f"/users/{user_token}/partlists/{list_id}/parts/", data=data, method="POST")
+        return await post_part(list_id, part_num, color_id, quantity)
 
-    @mcp.tool()
-    def add_parts_to_list(
+    @mcp.tool(shape=True)
+    async def add_parts_to_list(
         list_id: str,
         parts: list[dict]
     ) -> dict | list:
@@ -65,12 +120,28 @@ def register_tools(mcp):
         parts: List of dicts with keys: part_num, color_id, quantity
         Example: [{"part_num": "3020", "color_id": 0, "quantity": 5}, {"part_num": "3021", "color_id": 72, "quantity": 10}]
         
-        POSTs a JSON list to add all parts in a single API call.
+        POSTs a JSON list to add all parts in a single API call. If the API rejects the
+        batch, each part is added on its own (concurrently, within the rate limit) and
+        a per-part result is returned so partial success is visible.
         """
-        return call_api(f"/users/{user_token}/partlists/{list_id}/parts/", data=parts, method="POST")
+        bulk = await bulk_add(list_id, parts)
+        if bulk["ok"]:
+            return bulk["result"]
+
+        async def add_one(part: dict) -> dict:
+            return await post_part(list_id, part["part_num"], part["color_id"], part.get("quantity", 1))
+
+        outcomes = await run_bounded(parts, add_one)
+        results = [
+            {"part_num": part.get("part_num"), "color_id": part.get("color_id"), "status": "added"}
+            if outcome["ok"] else
+            {"part_num": part.get("part_num"), "color_id": part.get("color_id"), "status": "error", "message": outcome["error"]}
+            for part, outcome in zip(parts, outcomes)
+        ]
+        return {**summarize(outcomes), "bulk_error": bulk["error"], "results": results}
 
     @mcp.tool()
-    def add_or_update_part(
+    async def add_or_update_part(
         list_id: str,
         part_num: str,
         color_id: int,
@@ -82,304 +153,365 @@ def register_tools(mcp):
         If it already exists, increases the quantity by the given amount.
         If the resulting quantity would be 0 or less, deletes the part from the list.
         """
-        try:
-            # Check if part exists in list
-            existing = call_api(f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/")
-            old_qty = existing["quantity"]
-            new_qty = old_qty + quantity
-            
-            if new_qty <= 0:
-                # Delete if quantity would be 0 or negative
-                call_api(
-                    f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
-                    method="DELETE"
-                )
-                return {"status": "deleted", "part_num": part_num, "color_id": color_id, "old_quantity": old_qty, "removed": old_qty}
-            
-            # Update with new total
-            call_api(
-                f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
-                data={"quantity": new_qty},
-                method="PUT"
-            )
-            return {"status": "updated", "part_num": part_num, "color_id": color_id, "old_quantity": old_qty, "added": quantity, "new_quantity": new_qty}
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                # Doesn't exist, add fresh (only if positive quantity)
-                if quantity <= 0:
-                    return {"status": "no_change", "part_num": part_num, "color_id": color_id, "message": "Part not in list and quantity is not positive"}
-                call_api(
-                    f"/users/{user_token}/partlists/{list_id}/parts/",
-                    data={"part_num": part_num, "color_id": color_id, "quantity": quantity},
-                    method="POST"
-                )
-                return {"status": "added", "part_num": part_num, "color_id": color_id, "quantity": quantity}
-            else:
-                raise
+        return await add_or_update(list_id, part_num, color_id, quantity)
+
+    @mcp.tool(shape=True)
+    async def add_or_update_parts(
+        list_id: str,
+        parts: list[dict]
+    ) -> dict:
+        """Apply add_or_update_part to many parts at once.
+        
+        parts: List of dicts with keys: part_num, color_id, quantity (may be negative)
+        Duplicate part+color entries are summed first. Parts are processed concurrently
+        within the rate limit; transient failures are retried and every part gets its
+        own result, so one failure doesn't hide the others.
+        """
+        changes = [
+            {"part_num": part_num, "color_id": color_id, "quantity": quantity}
+            for (part_num, color_id), quantity in coalesce(parts).items()
+        ]
+        outcomes = await run_bounded(
+            changes, lambda c: add_or_update(list_id, c["part_num"], c["color_id"], c["quantity"])
+        )
+        results = [
+            outcome["result"] if outcome["ok"] else {**change, "status": "error", "message": outcome["error"]}
+            for change, outcome in zip(changes, outcomes)
+        ]
+        return {**summarize(outcomes), "results": results}
     
     @mcp.tool()
-    def get_part_in_list(
+    async def get_part_in_list(
         list_id: str,
         part_num: str,
         color_id: int,
         quantity: int
     ) -> dict | list:
         """Get details about a specific Part in the Part List."""
+        mirrored = mirror.cached(list_id) if mirror.enabled else None
+        key = (part_num, int(color_id))
+        if mirrored is not None and key in mirrored.items and key not in mirrored.stubs:
+            return mirrored.items[key]
         data = {"quantity": quantity}
-        return call_api(
+        return await call_api(
             f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
             data=data,
             method="GET"
         )
     
     @mcp.tool()
-    def update_part_in_list(
+    async def update_part_in_list(
         list_id: str,
         part_num: str,
         color_id: int,
         quantity: int
     ) -> dict | list:
         """Replace an existing Part's quantity in the Part List."""
-        data = {"quantity": quantity}
-        return call_api(
-            f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
-            data=data,
-            method="PUT"
-        )
+        return await put_quantity(list_id, part_num, color_id, quantity)
 
     @mcp.tool()
-    def delete_part_from_list(
+    async def delete_part_from_list(
         list_id: str,
         part_num: str,
         color_id: int
     ) -> dict | list:
         """Remove a part entirely from a list."""
-        return call_api(
-            f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
-            method="DELETE"
-        )
-
-    def _add_or_update_part_internal(list_id: str, part_num: str, color_id: int, quantity: int) -> dict:
-        """Internal helper for add/update logic - used by move_parts_between_lists.
-        
-        Includes 1-second delays between API calls to respect Rebrickable's rate limit.
-        """
-        try:
-            existing = call_api(f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/")
-            time.sleep(1)  # Rate limit: 1 call/second
-            old_qty = existing["quantity"]
-            new_qty = old_qty + quantity
-            
-            if new_qty <= 0:
-                call_api(
-                    f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
-                    method="DELETE"
-                )
-                time.sleep(1)  # Rate limit: 1 call/second
-                return {"status": "deleted", "part_num": part_num, "color_id": color_id, "old_quantity": old_qty, "removed": old_qty}
-            
-            call_api(
-                f"/users/{user_token}/partlists/{list_id}/parts/{part_num}/{color_id}/",
-                data={"quantity": new_qty},
-                method="PUT"
-            )
-            time.sleep(1)  # Rate limit: 1 call/second
-            return {"status": "updated", "part_num": part_num, "color_id": color_id, "old_quantity": old_qty, "added": quantity, "new_quantity": new_qty}
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                time.sleep(1)  # Rate limit: 1 call/second (even for 404)
-                if quantity <= 0:
-                    return {"status": "no_change", "part_num": part_num, "color_id": color_id, "message": "Part not in list and quantity is not positive"}
-                call_api(
-                    f"/users/{user_token}/partlists/{list_id}/parts/",
-                    data={"part_num": part_num, "color_id": color_id, "quantity": quantity},
-                    method="POST"
-                )
-                time.sleep(1)  # Rate limit: 1 call/second
-                return {"status": "added", "part_num": part_num, "color_id": color_id, "quantity": quantity}
-            else:
-                raise
+        return await delete_part(list_id, part_num, color_id)
 
-    @mcp.tool()
-    def move_parts_between_lists(
+    @mcp.tool(shape=True)
+    async def move_parts_between_lists(
         source_list_id: str,
         dest_list_id: str,
-        parts: list[dict]
+        parts: list[dict],
+        dry_run: bool = False,
+        background: bool = False
     ) -> dict:
         """Move parts from one list to another.
         
         parts: List of dicts with keys: part_num, color_id, quantity
         Example: [{"part_num": "3020", "color_id": 0, "quantity": 5}]
+        dry_run: Return the planned changes without applying them.
+        background: Queue the move as a job and return its job_id at once - poll get_job
+                    for progress and the result. Use for large lists; a background move
+                    resumes where it left off if the server restarts.
         
         Optimized to minimize API calls:
-        1. Fetches destination list once to check existing parts
-        2. Bulk-adds new parts in single call
-        3. Updates existing parts individually (with rate limiting)
+        1. Reads both lists from the local mirror (fetching all pages once if not yet
+           mirrored) and merges duplicate part+color entries
+        2. Plans the end-state quantities: only what the source holds is moved,
+           and partial moves leave the remainder in the source
+        3. Bulk-adds new parts to the destination in a single call, then runs
+           quantity updates and deletes concurrently within the rate limit
         4. If emptying source completely, deletes and recreates list (2 calls vs N deletes)
         """
-        results = []
-        
-        # Step 1: Get all parts currently in destination (1 API call)
-        dest_parts = {}
-        try:
-            dest_response = call_api(f"/users/{user_token}/partlists/{dest_list_id}/parts/", params={"page_size": 1000})
-            time.sleep(1)
-            for item in dest_response.get("results", []):
-                key = (item["part"]["part_num"], item["color"]["id"])
-                dest_parts[key] = item["quantity"]
-        except Exception:
-            pass  # If fetch fails, treat all as new
+        args = {"source_list_id": source_list_id, "dest_list_id": dest_list_id, "parts": parts}
+        if background and not dry_run:
+            return _queued(await queue.submit("move_parts", args))
+        return await move_parts(Inline(), **args, dry_run=dry_run)
+
+    @mcp.tool()
+    async def import_parts_file(
+        list_id: str,
+        path: str,
+        format: str | None = None,
+        mode: str = "add",
+        batch_size: int | None = None,
+        dry_run: bool = False,
+        background: bool = False,
+        ctx: Context = None
+    ) -> dict:
+        """Import parts into a list from a CSV or BrickLink XML file in the server's files directory.
         
-        # Step 2: Separate into new parts vs existing parts
-        new_parts = []
-        existing_parts = []
-        for part in parts:
-            key = (part["part_num"], part["color_id"])
-            if key in dest_parts:
-                existing_parts.append({
-                    **part,
-                    "old_quantity": dest_parts[key],
-                    "new_quantity": dest_parts[key] + part["quantity"]
-                })
-            else:
-                new_parts.append(part)
+        path: File path relative to the files directory (REBRICKABLE_FILES_DIR).
+        format: "csv" or "xml" (default: from the file extension).
+                CSV needs a header with Part and Color columns (Quantity optional, default 1);
+                colors may be Rebrickable ids or names. XML is a BrickLink inventory
+                (<INVENTORY><ITEM>...) with BrickLink color ids.
+        mode: "add" adds the file's quantities to the list; "set" makes the list's quantities
+              match the file (parts not in the file are left alone).
+        batch_size: Parts per bulk add call (default REBRICKABLE_IMPORT_BATCH_SIZE).
+        dry_run: Read and plan only - report what would change without writing.
+        background: Queue the import as a job and return its job_id at once - poll get_job.
         
-        # Step 3: Bulk-add new parts (1 API call)
-        if new_parts:
+        The file is streamed and duplicate part+color lines are summed, so only one bulk
+        POST per batch of new parts is sent. Progress is checkpointed after every batch:
+        if the import is interrupted, calling this again with the same arguments resumes it.
+        """
+        if mode not in ("add", "set"):
+            return {"status": "error", "message": 'mode must be "add" or "set"'}
+        if format is not None and format not in FORMATS:
+            return {"status": "error", "message": f"format must be one of: {', '.join(FORMATS)}"}
+        try:
+            file = resolve_path(path)
+            fmt = format or detect_format(file)
+        except (ValueError, OSError) as e:
+            return {"status": "error", "message": str(e)}
+
+        batch_size = batch_size or IMPORT_BATCH_SIZE
+        if dry_run:
             try:
-                call_api(
-                    f"/users/{user_token}/partlists/{dest_list_id}/parts/",
-                    data=new_parts,
-                    method="POST"
-                )
-                time.sleep(1)
-                for part in new_parts:
-                    results.append({
-                        "part_num": part["part_num"],
-                        "color_id": part["color_id"],
-                        "quantity_moved": part["quantity"],
-                        "destination": {"status": "added", "part_num": part["part_num"], "color_id": part["color_id"], "quantity": part["quantity"]},
-                        "source": {"status": "deleted"}
-                    })
-            except Exception as e:
-                # If bulk add fails, fall back to individual adds
-                for part in new_parts:
-                    try:
-                        call_api(
-                            f"/users/{user_token}/partlists/{dest_list_id}/parts/",
-                            data={"part_num": part["part_num"], "color_id": part["color_id"], "quantity": part["quantity"]},
-                            method="POST"
-                        )
-                        time.sleep(1)
-                        results.append({
-                            "part_num": part["part_num"],
-                            "color_id": part["color_id"],
-                            "quantity_moved": part["quantity"],
-                            "destination": {"status": "added", "part_num": part["part_num"], "color_id": part["color_id"], "quantity": part["quantity"]},
-                            "source": {"status": "deleted"}
-                        })
-                    except Exception:
-                        results.append({
-                            "part_num": part["part_num"],
-                            "color_id": part["color_id"],
-                            "quantity_moved": 0,
-                            "destination": {"status": "error", "message": str(e)},
-                            "source": None
-                        })
-        
-        # Step 4: Update existing parts individually (with rate limiting)
-        for part in existing_parts:
+                checkpoint = await plan_import(list_id, file, fmt, mode, batch_size)
+            except (ValueError, SyntaxError) as e:  # bad CSV header / malformed XML
+                return {"status": "error", "message": f"Could not read {path}: {e}"}
+            return {"status": "planned", **checkpoint.progress(), "skipped_rows": checkpoint.skipped[:MAX_REPORTED_SKIPS]}
+
+        args = {"list_id": list_id, "path": str(file), "fmt": fmt, "mode": mode, "batch_size": batch_size}
+        if background:
+            return _queued(await queue.submit("import_parts_file", args))
+
+        async def on_progress(checkpoint: ImportCheckpoint):
+            nonlocal ctx
+            if ctx is None:
+                return
+            progress = checkpoint.progress()
             try:
-                call_api(
-                    f"/users/{user_token}/partlists/{dest_list_id}/parts/{part['part_num']}/{part['color_id']}/",
-                    data={"quantity": part["new_quantity"]},
-                    method="PUT"
+                await ctx.report_progress(
+                    progress["added"] + progress["updated"],
+                    progress["to_add"] + progress["to_update"],
+                    message=f"Imported {progress['added']} new and {progress['updated']} updated parts"
                 )
-                time.sleep(1)
-                results.append({
-                    "part_num": part["part_num"],
-                    "color_id": part["color_id"],
-                    "quantity_moved": part["quantity"],
-                    "destination": {
-                        "status": "updated",
-                        "part_num": part["part_num"],
-                        "color_id": part["color_id"],
-                        "old_quantity": part["old_quantity"],
-                        "added": part["quantity"],
-                        "new_quantity": part["new_quantity"]
-                    },
-                    "source": {"status": "deleted"}
-                })
-            except Exception as e:
-                results.append({
-                    "part_num": part["part_num"],
-                    "color_id": part["color_id"],
-                    "quantity_moved": 0,
-                    "destination": {"status": "error", "message": str(e)},
-                    "source": None
-                })
-        
-        # Step 5: Check if we're emptying source completely - if so, delete and recreate (2 calls vs N deletes)
+            except ValueError:
+                ctx = None  # Called outside an MCP request - nobody to stream to
+
         try:
-            source_response = call_api(f"/users/{user_token}/partlists/{source_list_id}/")
-            time.sleep(1)
-            source_name = source_response.get("name", "Unnamed List")
-            source_part_count = source_response.get("num_parts", 0)
-            
-            # Count total parts being moved
-            total_moving = sum(p["quantity"] for p in parts)
-            
-            if source_part_count <= total_moving:
-                # Emptying completely - delete and recreate
-                call_api(f"/users/{user_token}/partlists/{source_list_id}/", method="DELETE")
-                time.sleep(1)
-                # Recreate with same name - NOTE: This will have a NEW list_id!
-                new_list = call_api(
-                    f"/users/{user_token}/partlists/",
-                    data={"name": source_name},
-                    method="POST"
-                )
-                time.sleep(1)
-                return {
-                    "status": "moved",
-                    "parts_count": len(parts),
-                    "add_result": results,
-                    "source_list_recreated": True,
-                    "new_source_list_id": new_list.get("id"),
-                    "note": f"Source list '{source_name}' was deleted and recreated with new ID: {new_list.get('id')}"
-                }
-            else:
-                # Partial move - delete parts individually
-                for part in parts:
-                    try:
-                        call_api(
-                            f"/users/{user_token}/partlists/{source_list_id}/parts/{part['part_num']}/{part['color_id']}/",
-                            method="DELETE"
-                        )
-                        time.sleep(1)
-                    except Exception:
-                        pass  # Already marked in results
-        except Exception as e:
-            # Fallback to individual deletes
-            for part in parts:
-                try:
-                    call_api(
-                        f"/users/{user_token}/partlists/{source_list_id}/parts/{part['part_num']}/{part['color_id']}/",
-                        method="DELETE"
-                    )
-                    time.sleep(1)
-                except Exception:
-                    pass
+            return await import_parts(Inline(), **args, on_progress=on_progress)
+        except (ValueError, SyntaxError) as e:
+            return {"status": "error", "message": f"Could not read {path}: {e}"}
+
+    @mcp.tool()
+    async def export_part_list(list_id: str, path: str, format: str | None = None) -> dict:
+        """Export a part list to a CSV or BrickLink XML file in the server's files directory.
+        
+        path: File path relative to the files directory (REBRICKABLE_FILES_DIR); overwritten if it exists.
+        format: "csv" (Part,Color,Quantity with Rebrickable color ids - re-importable) or
+                "xml" (BrickLink inventory). Default: from the file extension, else csv.
         
-        return {"status": "moved", "parts_count": len(parts), "add_result": results}
+        Entries are streamed to the file page by page. For XML, parts whose color has
+        no BrickLink equivalent are left out and listed in the result.
+        """
+        if format is not None and format not in FORMATS:
+            return {"status": "error", "message": f"format must be one of: {', '.join(FORMATS)}"}
+        try:
+            file = resolve_path(path)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        fmt = format or ("xml" if file.suffix.lower() == ".xml" else "csv")
+        return await export_list(list_id, file, fmt)
 
     # LET'S NOT GIVE AI THE ABILITY TO DELETE ENTIRE LISTS AT THE MOMENT
     # @mcp.tool()
     # def delete_part_list(list_id: str) -> dict:
     #     """Delete an entire part list."""
-    #     return call_api(f"/users/{user_token}/partlists/{list_id}/", method="DELETE")
+    #     return await call_api(f"/users/{user_token}/partlists/{list_id}/", method="DELETE")
+        
+    # ===========================================
+    # Across Lists
+    # ===========================================
+
+    @mcp.tool(shape=True)
+    async def find_part_in_lists(
+        part_num: str,
+        color_id: int | None = None,
+        list_ids: list[str] | None = None
+    ) -> dict:
+        """Find which of the user's part lists hold a part, and how many of it each has.
+        
+        color_id: Only this color (default: every color the part is held in).
+        list_ids: Lists to search (default: all of the user's lists).
+        
+        All lists are read concurrently (from the list mirror or cached pages where possible)
+        and searched locally - one call instead of one get_parts_from_list_id per list.
+        """
+        index = await build_collection_index(list_ids)
+        found = index.find(part_num, color_id)
+        return {
+            "part_num": part_num,
+            "total_quantity": sum(entry["total_quantity"] for entry in found),
+            "results": found,
+            "lists_searched": len(index.list_totals),
+            "list_errors": index.errors,
+        }
+
+    @mcp.tool(shape=True)
+    async def get_collection_totals(
+        list_ids: list[str] | None = None,
+        include_parts: bool = False,
+        limit: int = 100
+    ) -> dict:
+        """Inventory totals across the user's part lists.
+        
+        list_ids: Lists to include (default: all of the user's lists).
+        include_parts: Also return the combined quantity of each part+color across the lists,
+                       largest first, up to `limit` entries.
+        
+        Returns distinct part+colors, distinct parts and total pieces overall and per list.
+        """
+        index = await build_collection_index(list_ids)
+        result = {**index.totals(), "list_errors": index.errors}
+        if include_parts:
+            parts = index.parts()
+            result["parts_count"] = len(parts)
+            result["parts"] = parts[:limit]
+        return result
+
+    @mcp.tool(shape=True)
+    async def find_duplicate_parts(
+        list_ids: list[str] | None = None,
+        min_lists: int = 2,
+        limit: int = 100
+    ) -> dict:
+        """Find part+colors that appear in more than one of the user's part lists.
+        
+        list_ids: Lists to compare (default: all of the user's lists).
+        min_lists: Only report part+colors held in at least this many lists.
+        
+        Useful for consolidating lists (see move_parts_between_lists). Results are ordered by
+        how many lists hold the part+color, then by total quantity.
+        """
+        index = await build_collection_index(list_ids)
+        duplicates = index.duplicates(max(2, min_lists))
+        return {"count": len(duplicates), "results": duplicates[:limit], "list_errors": index.errors}
+
+    # ===========================================
+    # Background Jobs
+    # ===========================================
+
+    def _queued(job: dict) -> dict:
+        return {
+            "status": "queued",
+            "job_id": job["job_id"],
+            "message": "Running in the background - call get_job with this job_id for progress and the result",
+        }
+
+    @mcp.tool(shape=True)
+    async def get_job(job_id: str) -> dict:
+        """Status, progress and (once finished) the result of a background job.
+        
+        status: queued, running, done, failed or cancelled. A running job's progress
+        shows how far it has got; result holds what the tool would have returned.
+        """
+        job = await queue.get(job_id)
+        if job is None:
+            return {"status": "not_found", "job_id": job_id, "message": "No such job (finished jobs are kept for 7 days)"}
+        return job
+
+    @mcp.tool()
+    async def list_jobs(status: str | None = None, limit: int = 20) -> dict:
+        """Recent background jobs, newest first, without their arguments or results.
         
+        status: Only jobs in this state (queued, running, done, failed, cancelled).
+        """
+        if status is not None and status not in STATUSES:
+            return {"status": "error", "message": f"status must be one of: {', '.join(STATUSES)}"}
+        jobs = [{k: v for k, v in job.items() if k not in ("args", "result")} for job in await queue.list(status, limit)]
+        return {"count": len(jobs), "results": jobs}
+
+    @mcp.tool()
+    async def cancel_job(job_id: str) -> dict:
+        """Cancel a background job.
+        
+        A queued job never starts. A running one stops at its next step or batch -
+        changes already written to the lists stay.
+        """
+        job = await queue.cancel(job_id)
+        if job is None:
+            return {"status": "not_found", "job_id": job_id}
+        return {k: v for k, v in job.items() if k not in ("args", "result")}
+
     # ===========================================
     # Set Lists
     # ===========================================
-    
+
+    CATALOG_UNAVAILABLE = {"status": "unavailable", "message": "Set inventories need the local catalog mirror, which isn't loaded"}
+
+    @mcp.tool(shape=True)
+    async def find_buildable_sets(
+        list_ids: list[str] | None = None,
+        min_percent: float = 50,
+        theme_id: int | None = None,
+        min_parts: int = 10,
+        limit: int = 20
+    ) -> dict:
+        """Rank sets by how much of their inventory the user's part lists already cover.
+        
+        list_ids: Part lists to count as owned (default: every list marked buildable).
+        min_percent: Only return sets at least this complete.
+        theme_id: Only sets in this theme or its sub-themes.
+        min_parts: Skip sets with fewer parts than this (tiny polybags trivially match).
+        
+        Computed locally from the catalog mirror's set inventories (first version,
+        spares excluded) - no per-set API calls. Exact part+color matches only;
+        use check_set_buildability for missing parts and substitutes.
+        """
+        index = set_index()
+        if index is None:
+            return CATALOG_UNAVAILABLE
+        collection = await build_collection_index(list_ids, buildable_only=True)
+        count, sets = index.rank(index.encode(collection.quantities()), min_percent, theme_id, min_parts, limit)
+        return {"list_ids": list(collection.list_totals), "count": count, "results": sets, "list_errors": collection.errors}
+
+    @mcp.tool(shape=True)
+    async def check_set_buildability(
+        set_num: str,
+        list_ids: list[str] | None = None,
+        substitutions: bool = True
+    ) -> dict:
+        """Check whether a set can be built from the user's part lists.
+        
+        set_num: Set number, e.g. "75192-1" (a bare "75192" means "-1").
+        list_ids: Part lists to count as owned (default: every list marked buildable).
+        substitutions: Suggest owned parts the set doesn't use to stand in for missing ones -
+                       alternates/molds in the same color first, then the same part in the
+                       closest color.
+        
+        Returns the completion percentage and every missing part+color with how many are short.
+        """
+        index = set_index()
+        if index is None:
+            return CATALOG_UNAVAILABLE
+        position = index.position(set_num)
+        if position is None:
+            return {"status": "not_found", "set_num": set_num, "message": "Set has no inventory in the catalog mirror"}
+        collection = await build_collection_index(list_ids, buildable_only=True)
+        result = index.check(position, index.encode(collection.quantities()), color_index(), substitutions)
+        return {"list_ids": list(collection.list_totals), **result, "list_errors": collection.errors}
@@ -0,0 +1,174 @@
+# ===========================================
+# Worker Message Relay
+# ===========================================
+
+import asyncio
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+
+from src.rebrickable_mcp.cache import CACHE_DIR
+
+SOCKET_DIR = CACHE_DIR / "workers"
+
+# Frames on a relay socket: u32 length + JSON header, then u32 length + body
+LENGTH = struct.Struct("<I")
+
+# Request scope keys a relayed POST carries over to the owning worker
+RELAYED_SCOPE = ("method", "scheme", "path", "root_path", "http_version")
+
+
+def worker_endpoint() -> str:
+    """Message endpoint this worker advertises to the SSE sessions it accepts."""
+    return f"/messages/{os.getpid()}/"
+
+def socket_path(pid: int) -> Path:
+    return SOCKET_DIR / f"{pid}.sock"
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _encode_headers(headers) -> list[list[str]]:
+    return [[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers]
+
+def _decode_headers(headers: list[list[str]]) -> list[tuple[bytes, bytes]]:
+    return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+async def _write_frame(writer: asyncio.StreamWriter, header: dict, body: bytes):
+    encoded = json.dumps(header).encode("utf-8")
+    writer.write(LENGTH.pack(len(encoded)) + encoded + LENGTH.pack(len(body)) + body)
+    await writer.drain()
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[dict, bytes]:
+    (size,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    header = json.loads(await reader.readexactly(size))
+    (size,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return header, await reader.readexactly(size)
+
+async def _respond(send, status: int, body: bytes):
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class MessageRelay:
+    """Delivers MCP message POSTs to the worker process that owns the session.
+
+    An SSE session lives in the worker that accepted its GET /sse, but any
+    worker may accept the POSTs that follow. Each worker advertises
+    /messages/<pid>/ as its message endpoint and listens on
+    cache/workers/<pid>.sock; a POST for another pid is passed over that
+    socket and the owner's response relayed back. ASGI app for the
+    /messages/{worker:int}/ route.
+    """
+
+    def __init__(self, handle_post_message):
+        self.app = handle_post_message
+        self.pid = os.getpid()
+        self.forwarded = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        SOCKET_DIR.mkdir(parents=True, exist_ok=True)
+        # Sockets left behind by workers that didn't shut down cleanly
+        for stale in SOCKET_DIR.glob("*.sock"):
+            if stale.stem.isdigit() and not _alive(int(stale.stem)):
+                stale.unlink(missing_ok=True)
+        path = socket_path(self.pid)
+        path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._serve, path=str(path))
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        socket_path(self.pid).unlink(missing_ok=True)
+
+    async def __call__(self, scope, receive, send):
+        owner = scope["path_params"]["worker"]
+        if owner == self.pid:
+            await self.app(scope, receive, send)
+        else:
+            await self._forward(owner, scope, receive, send)
+
+    async def _forward(self, owner: int, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(socket_path(owner)))
+        except OSError:
+            # The owning worker exited, and its sessions with it
+            await _respond(send, 404, b"Could not find session")
+            return
+        try:
+            request = {key: scope[key] for key in RELAYED_SCOPE if key in scope}
+            request["query_string"] = scope["query_string"].decode("latin-1")
+            request["headers"] = _encode_headers(scope["headers"])
+            await _write_frame(writer, request, body)
+            response, payload = await _read_frame(reader)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logging.warning(f"Relay to worker {owner} failed: {e}")
+            await _respond(send, 502, b"Session worker unavailable")
+            return
+        finally:
+            writer.close()
+
+        self.forwarded += 1
+        await send({
+            "type": "http.response.start",
+            "status": response["status"],
+            "headers": _decode_headers(response["headers"]),
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run one relayed POST through our SSE transport and send back its response."""
+        try:
+            request, body = await _read_frame(reader)
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                **request,
+                "query_string": request["query_string"].encode("latin-1"),
+                "headers": _decode_headers(request["headers"]),
+            }
+            delivered = False
+
+            async def receive():
+                nonlocal delivered
+                if delivered:
+                    return {"type": "http.disconnect"}
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            response = {"status": 500, "headers": []}
+            chunks = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                    response["headers"] = _encode_headers(message.get("headers", []))
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+
+            await self.app(scope, receive, send)
+            await _write_frame(writer, response, b"".join(chunks))
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logging.warning(f"Dropped a relayed message: {e}")
+        finally:
+            writer.close()
+
+    def stats(self) -> dict:
+        return {"pid": self.pid, "forwarded": self.forwarded}
@@ -0,0 +1,151 @@
+# ===========================================
+# Test Fixtures
+# ===========================================
+#
+# Tests run the real client code against bench/fake_rebrickable.py, served
+# in-process on a free port. The server's config is read at import time, so
+# the environment is set here before any src module is imported.
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from bench.fake_rebrickable import FakeRebrickable, SyntheticCatalog
+from bench.scenarios import free_port
+
+PORT = free_port()
+os.environ.update({
+    "REBRICKABLE_BASE_URL": f"http://127.0.0.1:{PORT}/api/v3",
+    "REBRICKABLE_CDN_URL": f"http://127.0.0.1:{PORT}/media/downloads",
+    "REBRICKABLE_API_KEY": "test",
+    "REBRICKABLE_USER_TOKEN": "test",
+    "REBRICKABLE_RATE_LIMIT": "1000",
+    "REBRICKABLE_RATE_BURST": "10",
+    "REBRICKABLE_HTTP2": "0",
+    "REBRICKABLE_RETRY_BASE_DELAY": "0.01",
+    "REBRICKABLE_RESPONSE_CACHE_DISK": "0",
+    "REBRICKABLE_LIST_MIRROR": "1",
+})
+
+
+@pytest.fixture(scope="session")
+def fake() -> FakeRebrickable:
+    """The fake API, with two seeded lists of 300 parts."""
+    server_fake = FakeRebrickable(lists=2, list_size=300, max_page_size=100000, catalog=SyntheticCatalog(parts=300, sets=10))
+    server = uvicorn.Server(uvicorn.Config(server_fake.app(), host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("Fake Rebrickable server didn't start")
+        time.sleep(0.05)
+    yield server_fake
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    """One event loop for the session - the shared HTTP client and rate limiter outlive a single test."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    from src.rebrickable_mcp.api import close_client
+
+    loop.run_until_complete(close_client())
+    loop.close()
+
+
+@pytest.fixture
+def run(fake, loop):
+    """Run a coroutine against a freshly reset fake, with empty caches and mirror."""
+    from src.rebrickable_mcp.api import response_cache
+    from src.rebrickable_mcp.list_mirror import mirror
+
+    fake.reset()
+    mirror._lists.clear()
+    loop.run_until_complete(response_cache.invalidate_prefix(""))
+    return loop.run_until_complete
+
+
+class Tools:
+    """Collects the functions register_tools defines, to call them directly."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self, name: str | None = None, **kwargs):
+        def decorator(fn):
+            self.tools[name or fn.__name__] = fn
+            return fn
+        return decorator
+
+
+@pytest.fixture(scope="session")
+def tools() -> dict:
+    """user_tools' tool functions by name."""
+    from src.rebrickable_mcp import user_tools
+
+    collected = Tools()
+    user_tools.register_tools(collected)
+    return collected.tools
+
+
+# A catalog small enough to reason about: three bricks and a plate, a mold
+# variant of the 2 x 4 brick, a wall element filed under Bricks and a tile
+CATALOG_ROWS = {
+    "colors": [
+        (0, "Black", "05131D", 0), (4, "Orange", "FE8A18", 0), (5, "Red", "C91A09", 0),
+        (15, "White", "FFFFFF", 0), (36, "Trans-Red", "C91A09", 1), (71, "Light Bluish Gray", "A0A5A9", 0),
+    ],
+    "themes": [(1, "City", None), (2, "Police", 1)],
+    "part_categories": [(11, "Bricks"), (14, "Plates"), (19, "Tiles")],
+    "parts": [
+        ("3001", "Brick 2 x 4", 11, "Plastic"), ("3001old", "Brick 2 x 4 without Bottom Tubes", 11, "Plastic"),
+        ("3003", "Brick 2 x 2", 11, "Plastic"), ("3622", "Brick 1 x 3", 11, "Plastic"),
+        ("3020", "Plate 2 x 4", 14, "Plastic"), ("3245", "Wall 1x2", 11, "Plastic"), ("3069b", "Flat 1x2", 19, "Plastic"),
+    ],
+    "part_relationships": [("M", "3001old", "3001")],
+    "elements": [],
+    "sets": [("100-1", "Small House", 2020, 2, 7, ""), ("200-1", "Car", 2021, 1, 6, "")],
+    "minifigs": [],
+    "inventories": [(1, 1, "100-1"), (2, 1, "200-1")],
+    "inventory_parts": [
+        (1, "3001", 5, 4, 0, ""), (1, "3003", 15, 2, 0, ""), (1, "3020", 0, 1, 0, ""), (1, "3622", 5, 1, 1, ""),
+        (2, "3020", 0, 2, 0, ""), (2, "3622", 5, 2, 0, ""), (2, "3001old", 5, 1, 0, ""), (2, "3001", 4, 1, 0, ""),
+    ],
+}
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch) -> sqlite3.Connection:
+    """CATALOG_ROWS written where the catalog mirror lives, with the working directory moved to tmp_path."""
+    from src.rebrickable_mcp import cache
+
+    monkeypatch.chdir(tmp_path)  # cache paths are relative to it
+    cache.CACHE_DIR.mkdir()
+    conn = sqlite3.connect(cache.CATALOG_DB)
+    for name, spec in cache.CATALOG_TABLES.items():
+        conn.execute(f"CREATE TABLE {name} ({', '.join(f'{column} {sql_type}' for column, sql_type, _ in spec)})")
+        conn.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' for _ in spec)})", CATALOG_ROWS[name])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """An empty cache directory under tmp_path, with the loaded catalog state put back afterwards."""
+    from src.rebrickable_mcp import cache
+
+    monkeypatch.chdir(tmp_path)  # cache paths are relative to it
+    for name in ("_catalog", "_search_index", "_set_index", "_color_index"):
+        monkeypatch.setattr(cache, name, getattr(cache, name))
+    monkeypatch.setattr(cache, "COLORS", {})
+    monkeypatch.setattr(cache, "_refresh_status", dict.fromkeys(cache._refresh_status))
+    return tmp_path / cache.CACHE_DIR
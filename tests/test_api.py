@@ -0,0 +1,35 @@
+import asyncio
+
+from src.rebrickable_mcp import api
+from src.rebrickable_mcp.api import call_api, close_client, get_client
+
+
+def test_concurrent_calls_share_one_client(fake, run, monkeypatch):
+    clients = []
+    send = api._send
+
+    async def recording_send(client, *args, **kwargs):
+        clients.append(client)
+        return await send(client, *args, **kwargs)
+
+    monkeypatch.setattr(api, "_send", recording_send)
+    part_nums = [part[0] for part in fake.catalog.parts[:5]]
+
+    async def scenario():
+        return await asyncio.gather(*(call_api(f"/lego/parts/{part_num}/") for part_num in part_nums))
+
+    parts = run(scenario())
+
+    assert [part["part_num"] for part in parts] == part_nums
+    assert len(clients) == 5
+    assert all(client is get_client() for client in clients)
+    assert get_client().headers["Authorization"] == "key test"
+
+
+def test_closed_client_is_replaced(fake, run):
+    client = get_client()
+    run(close_client())
+
+    assert client.is_closed
+    assert get_client() is not client
+    assert run(call_api("/lego/colors/"))["count"] == len(fake.catalog.colors)
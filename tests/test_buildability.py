@@ -0,0 +1,58 @@
+import pytest
+
+from src.rebrickable_mcp.buildability import SetInventoryIndex
+from src.rebrickable_mcp.color_index import ColorIndex
+from src.rebrickable_mcp.part_codes import PartCodes
+
+
+@pytest.fixture
+def sets(catalog) -> SetInventoryIndex:
+    return SetInventoryIndex.build(catalog, PartCodes.build(catalog))
+
+
+def test_inventories_in_both_directions(sets):
+    house, car = sets.position("100-1"), sets.position("200")  # a bare number means the first release
+
+    assert sets.set_nums[car] == "200-1"
+    # By set: spares are left out
+    assert {sets.key_of(k): q for k, q in sets.needs(house).items()} == {("3001", 5): 4, ("3003", 15): 2, ("3020", 0): 1}
+    assert list(sets.totals) == [7, 6]
+    assert list(sets.set_offsets) == [0, 3, 7]
+    # By key: every set needing a part, with its quantity
+    k = sets.key_id("3020", 0)
+    start, end = sets.key_offsets[k], sets.key_offsets[k + 1]
+    assert list(zip(sets.key_sets[start:end], sets.key_quantities[start:end])) == [(house, 1), (car, 2)]
+    assert sets.key_id("3069b", 0) is None
+
+
+def test_coverage_ranks_sets_by_owned_share(sets):
+    owned = sets.encode({("3001", 5): 2, ("3003", 15): 2, ("3020", 0): 5, ("3069b", 0): 9})
+
+    count, ranked = sets.rank(owned)
+
+    assert count == 2
+    assert [(s["set_num"], s["parts_owned"], s["percent"]) for s in ranked] == [("100-1", 5, 71.4), ("200-1", 2, 33.3)]
+    assert sets.rank(owned, min_percent=50)[0] == 1
+    assert [s["set_num"] for s in sets.rank(owned, theme_id=1)[1]] == ["100-1", "200-1"]  # Police is under City
+    assert [s["set_num"] for s in sets.rank(owned, theme_id=2)[1]] == ["100-1"]
+
+
+def test_missing_parts_are_substituted_from_spare_owned_ones(catalog, sets):
+    colors = ColorIndex({
+        cid: {"name": name, "rgb": rgb, "is_trans": bool(is_trans)}
+        for cid, name, rgb, is_trans in catalog.execute("SELECT id, name, rgb, is_trans FROM colors")
+    })
+    owned = sets.encode({("3001", 5): 2, ("3001old", 5): 1, ("3001", 4): 3, ("3003", 15): 2, ("3020", 0): 1})
+
+    result = sets.check(sets.position("100-1"), owned, colors)
+
+    assert result["parts_owned"] == 5
+    [missing] = result["missing"]
+    assert (missing["part_num"], missing["color_id"], missing["missing"]) == ("3001", 5, 2)
+    # The mold variant in the same color first, then the same part in the nearest color
+    assert [(s["part_num"], s["color_id"], s["quantity"], s["kind"]) for s in missing["substitutes"]] == [
+        ("3001old", 5, 1, "alternate"), ("3001", 4, 1, "color"),
+    ]
+    assert result["parts_substituted"] == 2
+    assert result["percent_with_substitutes"] == 100.0
+    assert "substitutes" not in sets.check(sets.position("100-1"), owned, substitutions=False)["missing"][0]
@@ -0,0 +1,37 @@
+from src.rebrickable_mcp import cache
+
+
+def test_catalog_is_built_from_the_dumps(fake, run, cache_dir):
+    assert cache.load_catalog()
+
+    assert fake.downloads == len(cache.CATALOG_TABLES)
+    assert (cache_dir / "catalog.sqlite3").exists()
+    assert not list(cache_dir.glob("*.part"))
+    for name, (_, rows) in fake.catalog.tables.items():
+        assert cache._catalog.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] == len(rows)
+    assert len(cache.COLORS) == len(fake.catalog.colors)
+
+
+def test_lookups_are_answered_locally(fake, run, cache_dir):
+    cache.load_catalog()
+    inventory_parts = fake.catalog.tables["inventory_parts"][1]
+    part_num, name, part_cat_id, _ = next(p for p in fake.catalog.parts if p[0] == inventory_parts[0][1])
+
+    part = cache.lookup_part(part_num)
+    colors = cache.lookup_part_colors(part_num)
+    found = cache.search_catalog_parts(part_num)
+
+    assert (part["part_num"], part["name"], part["part_cat_id"]) == (part_num, name, part_cat_id)
+    assert part["part_url"] == f"https://rebrickable.com/parts/{part_num}/"
+    used = {cid for _, pn, cid, *_ in inventory_parts if pn == part_num}
+    assert {c["color_id"] for c in colors["results"]} == used
+    assert found["results"][0]["part_num"] == part_num
+    assert fake.requests == {}  # no API budget spent
+
+
+def test_misses_fall_back_to_the_api(fake, run, cache_dir):
+    assert cache.lookup_part("3001") is None  # not loaded
+    cache.load_catalog()
+    assert cache.lookup_part("no-such-part") is None
+    assert cache.lookup_part_colors("no-such-part") is None
+    assert cache.search_catalog_parts("zzzz") is None
@@ -0,0 +1,41 @@
+import time
+from email.utils import formatdate
+
+from src.rebrickable_mcp import cache
+
+
+def test_unchanged_dumps_arent_downloaded_again(fake, run, cache_dir):
+    cache.load_catalog()
+    downloads, catalog = fake.downloads, cache._catalog
+
+    assert cache.prepare_refresh() is None
+
+    assert fake.downloads == downloads  # every dump answered 304
+    assert cache._catalog is catalog
+    status = cache.catalog_status(24)
+    assert status["loaded"] and not status["stale"]
+    assert status["last_check"] is not None
+
+
+def test_changed_dumps_are_swapped_in(fake, run, cache_dir, monkeypatch):
+    cache.load_catalog()
+    downloads, catalog = fake.downloads, cache._catalog
+    monkeypatch.setattr(fake.catalog, "last_modified", formatdate(time.time() + 60, usegmt=True))
+
+    state = cache.prepare_refresh()
+    cache.apply_refresh(state)
+
+    assert fake.downloads == downloads + len(cache.CATALOG_TABLES)
+    assert cache._catalog is not catalog
+    assert (cache_dir / "parts_last_modified.txt").read_text() == fake.catalog.last_modified
+    assert cache.lookup_part(fake.catalog.parts[0][0]) is not None
+    # ...and the next check is conditional on the new date
+    assert cache.prepare_refresh() is None
+
+
+def test_status_reports_staleness(cache_dir):
+    assert cache.catalog_status(24)["stale"]  # never loaded
+
+    cache._refresh_status["last_refresh"] = time.time() - 3 * 3600
+    assert not cache.catalog_status(24)["stale"]
+    assert cache.catalog_status(1)["stale"]  # missed more than one refresh cycle
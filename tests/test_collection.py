@@ -0,0 +1,47 @@
+from src.rebrickable_mcp.collection import build_collection_index
+
+
+def test_index_combines_every_list(fake, run):
+    index = run(build_collection_index())
+    one, two = fake.lists[1]["parts"], fake.lists[2]["parts"]
+    shared = one.keys() & two.keys()
+
+    assert index.errors == []
+    assert index.quantities() == {key: one.get(key, 0) + two.get(key, 0) for key in one.keys() | two.keys()}
+    totals = index.totals()
+    assert totals["lists"] == 2
+    assert totals["total_quantity"] == sum(one.values()) + sum(two.values())
+    assert {(d["part_num"], d["color_id"]) for d in index.duplicates()} == shared
+
+
+def test_find_reports_each_list_holding_a_part(fake, run):
+    (part_num, color_id), quantity = next(iter(fake.lists[1]["parts"].items()))
+    fake.lists[2]["parts"][(part_num, color_id)] = quantity + 1
+
+    found = run(build_collection_index()).find(part_num, color_id)
+
+    assert found == [{
+        "part_num": part_num,
+        "color_id": color_id,
+        "total_quantity": 2 * quantity + 1,
+        "lists": [
+            {"list_id": "2", "list_name": "List 2", "quantity": quantity + 1},
+            {"list_id": "1", "list_name": "List 1", "quantity": quantity},
+        ],
+    }]
+
+
+def test_buildable_only_skips_lists_not_marked_buildable(fake, run):
+    fake.lists[2]["is_buildable"] = False
+
+    index = run(build_collection_index(buildable_only=True))
+
+    assert list(index.list_totals) == ["1"]
+    assert index.quantities() == fake.lists[1]["parts"]
+
+
+def test_a_list_that_fails_to_load_is_reported(fake, run):
+    index = run(build_collection_index(["1", "999"]))
+
+    assert list(index.list_totals) == ["1"]
+    assert [error["list_id"] for error in index.errors] == ["999"]
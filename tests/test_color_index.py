@@ -0,0 +1,50 @@
+import pytest
+
+from src.rebrickable_mcp.color_index import ColorIndex, hex_to_lab
+
+
+@pytest.fixture
+def colors(catalog) -> ColorIndex:
+    return ColorIndex({
+        cid: {"name": name, "rgb": rgb, "is_trans": bool(is_trans)}
+        for cid, name, rgb, is_trans in catalog.execute("SELECT id, name, rgb, is_trans FROM colors")
+    })
+
+
+def test_lab_conversion():
+    assert hex_to_lab("FFFFFF") == pytest.approx((100, 0, 0), abs=0.1)
+    assert hex_to_lab("000000") == pytest.approx((0, 0, 0), abs=0.1)
+
+
+def test_nearest_color_to_an_rgb_value(colors):
+    nearest = colors.nearest("CC1100", limit=2, is_trans=False)
+
+    assert [c["name"] for c in nearest] == ["Red", "Orange"]
+    assert nearest[0]["distance"] < nearest[1]["distance"]
+    assert colors.nearest("A0A5A9", limit=1)[0] == {
+        "id": 71, "name": "Light Bluish Gray", "rgb": "A0A5A9", "is_trans": False, "distance": 0.0,
+    }
+
+
+def test_nearest_color_agrees_with_a_full_scan(colors):
+    for rgb in ("000000", "7F7F7F", "FF8000", "0000FF", "F0F0E0"):
+        target = hex_to_lab(rgb)
+        scan = sorted(
+            (sum((a - b) ** 2 for a, b in zip(lab, target)), cid) for lab, cid in zip(colors.labs, colors.ids)
+        )
+        assert [c["id"] for c in colors.nearest(rgb, limit=3)] == [cid for _, cid in scan[:3]]
+
+
+def test_trans_bitmap(colors):
+    assert colors.is_trans(36)
+    assert not colors.is_trans(5)
+    assert colors.trans_bits == 1 << colors.ids.index(36)
+    # Red and Trans-Red share an RGB value; the filter picks between them
+    assert colors.nearest("C91A09", limit=1, is_trans=True)[0]["id"] == 36
+    assert colors.nearest("C91A09", limit=1, is_trans=False)[0]["id"] == 5
+
+
+def test_resolve_by_name_or_hex(colors):
+    assert colors.resolve("red") == [{"id": 5, "name": "Red", "rgb": "C91A09", "is_trans": False, "match": "exact"}]
+    assert [c["name"] for c in colors.resolve("light")] == ["Light Bluish Gray"]
+    assert [c["id"] for c in colors.resolve("#FFFFFF", limit=1)] == [15]
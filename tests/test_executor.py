@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+
+from src.rebrickable_mcp.executor import run_bounded, summarize
+
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://test/")
+    response = httpx.Response(status, request=request, json={"detail": f"status {status}"})
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+def test_outcomes_keep_input_order_and_retry_transient_failures(loop):
+    calls: dict[int, int] = {}
+
+    async def fn(item: int) -> dict:
+        calls[item] = calls.get(item, 0) + 1
+        await asyncio.sleep(0.01 * (5 - item))  # later items finish first
+        if item == 1 and calls[item] == 1:
+            raise status_error(503)
+        if item == 3:
+            raise status_error(400)
+        return {"item": item}
+
+    outcomes = loop.run_until_complete(run_bounded(list(range(5)), fn, concurrency=5))
+
+    assert [o["ok"] for o in outcomes] == [True, True, True, False, True]
+    assert [o["result"]["item"] for o in outcomes if o["ok"]] == [0, 1, 2, 4]
+    assert outcomes[1]["attempts"] == 2
+    assert outcomes[3] == {"ok": False, "error": "400: status 400", "attempts": 1}  # not worth retrying
+    assert summarize(outcomes) == {"status": "partial", "succeeded": 4, "failed": 1}
+
+
+def test_transient_failures_give_up_after_the_retries(loop):
+    async def fn(item):
+        raise httpx.ConnectError("refused")
+
+    [outcome] = loop.run_until_complete(run_bounded([0], fn, retries=2))
+
+    assert outcome == {"ok": False, "error": "refused", "attempts": 3}
+
+
+def test_concurrency_is_bounded(loop):
+    running, peak = 0, 0
+
+    async def fn(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    outcomes = loop.run_until_complete(run_bounded(list(range(20)), fn, concurrency=3))
+
+    assert peak == 3
+    assert summarize(outcomes)["status"] == "ok"
@@ -0,0 +1,71 @@
+import os
+
+import httpx
+import pytest
+
+API = os.environ["REBRICKABLE_BASE_URL"]
+LISTS = f"{API}/users/test/partlists"
+
+
+@pytest.fixture
+def client(fake, run):
+    with httpx.Client(timeout=10) as client:
+        yield client
+
+
+def test_pages_are_capped_and_linked(fake, client, monkeypatch):
+    monkeypatch.setattr(fake, "max_page_size", 120)
+
+    first = client.get(f"{LISTS}/1/parts/", params={"page_size": 1000}).json()
+    last = client.get(first["next"]).json()
+    last = client.get(last["next"]).json()
+
+    assert (first["count"], len(first["results"]), first["previous"]) == (300, 120, None)
+    assert (len(last["results"]), last["next"]) == (60, None)
+    assert client.get(f"{LISTS}/1/parts/", params={"page": 9, "page_size": 120}).status_code == 404
+
+
+def test_requests_beyond_the_rate_are_throttled(fake, client, monkeypatch):
+    monkeypatch.setattr(fake, "rate", 1.0)
+    monkeypatch.setattr(fake, "_tokens", 2.0)
+
+    statuses = [client.get(f"{API}/lego/colors/").status_code for _ in range(3)]
+    throttled = client.get(f"{API}/lego/colors/")
+
+    assert statuses == [200, 200, 429]
+    assert int(throttled.headers["Retry-After"]) >= 1
+    assert client.get(f"http://{httpx.URL(API).netloc.decode()}/_stats").json()["throttled"] == 2
+
+
+@pytest.mark.parametrize("bulk, status, quantity", [("add", 201, 5), ("reject", 400, 2), ("off", 400, 2)])
+def test_bulk_post_modes(fake, client, monkeypatch, bulk, status, quantity):
+    monkeypatch.setattr(fake, "bulk", bulk)
+    existing = next(iter(fake.lists[1]["parts"]))
+    fake.lists[1]["parts"][existing] = 2
+
+    response = client.post(f"{LISTS}/1/parts/", json=[{"part_num": existing[0], "color_id": existing[1], "quantity": 3}])
+
+    assert response.status_code == status
+    assert fake.lists[1]["parts"][existing] == quantity
+
+
+def test_dumps_are_served_conditionally(fake, client):
+    url = os.environ["REBRICKABLE_CDN_URL"] + "/colors.csv.zip"
+
+    first = client.get(url)
+    again = client.get(url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+
+    assert first.status_code == 200 and first.content[:2] == b"PK"
+    assert again.status_code == 304
+    assert fake.downloads == 1
+
+
+def test_reset_restores_the_seeded_lists(fake, client):
+    seeded = {list_id: dict(data["parts"]) for list_id, data in fake.lists.items()}
+    client.delete(f"{LISTS}/1/")
+    client.post(f"{LISTS}/", json={"name": "New"})
+
+    client.post(f"http://{httpx.URL(API).netloc.decode()}/_reset")
+
+    assert {list_id: data["parts"] for list_id, data in fake.lists.items()} == seeded
+    assert fake.requests == {}
@@ -0,0 +1,81 @@
+import asyncio
+
+from src.rebrickable_mcp.jobs import Job, JobQueue, job_handler
+
+
+@job_handler("test_noop")
+async def noop(job) -> dict:
+    return {}
+
+
+def test_job_taken_over_after_a_crash_resumes_from_its_journal(tmp_path, loop):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease_seconds=0)  # leases expire at once
+    ran = []
+
+    async def step(name: str) -> str:
+        ran.append(name)
+        return name
+
+    async def scenario():
+        submitted = await queue.submit("test_noop", {})
+        first = Job(queue, *await asyncio.to_thread(queue._claim, "crashed"))
+        await first.step("one", lambda: step("one"))
+        # The first worker dies here; another takes the job over
+        second = Job(queue, *await asyncio.to_thread(queue._claim, "survivor"))
+        results = [await second.step("one", lambda: step("one")), await second.step("two", lambda: step("two"))]
+        return submitted, first, second, results
+
+    submitted, first, second, results = loop.run_until_complete(scenario())
+    assert submitted["status"] == "queued"
+    assert first.id == second.id
+    assert not first.resumed and second.resumed
+    assert results == ["one", "two"]
+    assert ran == ["one", "two"]
+
+
+def test_stats_count_jobs_by_status(tmp_path, loop):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+
+    async def scenario():
+        cancelled = await queue.submit("test_noop", {})
+        await queue.submit("test_noop", {})
+        await queue.cancel(cancelled["job_id"])
+        return await queue.stats()
+
+    counts = loop.run_until_complete(scenario())
+    assert counts["queued"] == 1 and counts["cancelled"] == 1
+    assert queue.counts == counts
+
+
+@job_handler("test_slow_steps")
+async def slow_steps(job, ran: list) -> dict:
+    for name in ("one", "two", "three"):
+        async def work(name=name):
+            await asyncio.sleep(0.2)
+            ran.append(name)
+            return name
+        await job.step(name, work)
+    return {"done": True}
+
+
+def test_worker_that_loses_its_lease_stops_the_handler(tmp_path, loop):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease_seconds=0.15)
+    ran = []
+
+    async def scenario():
+        # Handlers take their arguments from the job row; pass the list straight to this one
+        submitted = await queue.submit("test_slow_steps", {})
+        row, journal = await asyncio.to_thread(queue._claim, "first")
+        row["args"] = {"ran": ran}
+        running = asyncio.ensure_future(queue._run(row, journal, "first"))
+        await asyncio.sleep(0.25)
+        # Its lease runs out and another worker claims the job
+        with queue._connect() as conn:
+            conn.execute("UPDATE jobs SET owner = 'second' WHERE id = ?", (submitted["job_id"],))
+        await running
+        await asyncio.sleep(0.3)
+        return await queue.get(submitted["job_id"])
+
+    job = loop.run_until_complete(scenario())
+    assert ran == ["one"]
+    assert job["status"] == "running"  # left for the new owner, not finished by the old one
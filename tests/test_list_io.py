@@ -0,0 +1,58 @@
+from src.rebrickable_mcp import list_io
+from src.rebrickable_mcp.list_io import plan_import, read_parts, run_import
+from src.rebrickable_mcp.part_codes import PartCodes
+
+
+def test_unreadable_csv_rows_are_reported_with_their_values(tmp_path, run):
+    path = tmp_path / "parts.csv"
+    path.write_text("Part,Color,Quantity\n3001,5,2\n3003,6,x\n3001,5,3\n3004\n")
+
+    totals, rows, skipped = run(read_parts(path, "csv"))
+
+    assert totals == {("3001", 5): 5}
+    assert rows == 4
+    assert skipped == [
+        {"line": 3, "part_num": "3003", "color": "6", "reason": "unreadable"},
+        {"line": 5, "part_num": "3004", "color": "", "reason": "unreadable"},
+    ]
+
+
+def test_bricklink_item_ids_are_mapped_to_part_numbers(fake, tmp_path, run, monkeypatch):
+    catalog = PartCodes(sorted(p[0] for p in fake.catalog.parts))
+    monkeypatch.setattr(list_io, "part_codes", lambda: catalog)
+    printed = next(p[0] for p in fake.catalog.parts if "pr" in p[0])
+    plain = next(p[0] for p in fake.catalog.parts if "pr" not in p[0])
+    path = tmp_path / "parts.xml"
+    items = [(plain, 6, 2), (fake.catalog.bricklink_id(printed), 6, 3), ("no-such-part", 6, 1)]
+    path.write_text("<INVENTORY>" + "".join(
+        f"<ITEM><ITEMTYPE>P</ITEMTYPE><ITEMID>{item_id}</ITEMID><COLOR>{color}</COLOR><MINQTY>{qty}</MINQTY></ITEM>"
+        for item_id, color, qty in items
+    ) + "</INVENTORY>")
+
+    totals, rows, skipped = run(read_parts(path, "xml"))
+
+    # BrickLink color 6 is Rebrickable color 5 in the fake
+    assert totals == {(plain, 5): 2, (printed, 5): 3}
+    assert rows == 3
+    assert skipped == [{"line": 3, "part_num": "no-such-part", "color": "6", "reason": "unmapped part"}]
+
+
+def test_resumed_batch_that_already_landed_isnt_an_error(fake, tmp_path, run, monkeypatch):
+    monkeypatch.setattr(list_io, "CHECKPOINT_DIR", tmp_path / "imports")
+    monkeypatch.setattr(fake, "bulk", "reject")
+    new = [p[0] for p in fake.catalog.parts if (p[0], 5) not in fake.lists[1]["parts"]][:20]
+    path = tmp_path / "parts.csv"
+    path.write_text("Part,Color,Quantity\n" + "".join(f"{part_num},5,2\n" for part_num in new))
+
+    async def scenario():
+        checkpoint = await plan_import("1", path, "csv", "add", batch_size=10)
+        # The first batch was posted, then the process died before saving its progress
+        for item in checkpoint.add[:10]:
+            fake.lists[1]["parts"][(item["part_num"], item["color_id"])] = item["quantity"]
+        return await run_import(checkpoint)
+
+    result = run(scenario())
+
+    assert result["status"] == "ok"
+    assert result["error_details"] == []
+    assert all(fake.lists[1]["parts"][(part_num, 5)] == 2 for part_num in new)
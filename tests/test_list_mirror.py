@@ -0,0 +1,30 @@
+from src.rebrickable_mcp.list_mirror import mirror
+from src.rebrickable_mcp.list_ops import put_quantity
+
+
+def test_disabled_mirror_keeps_nothing(fake, run, tools, monkeypatch):
+    monkeypatch.setattr(mirror, "enabled", False)
+    part_num, color_id = next(iter(fake.lists[1]["parts"]))
+
+    async def scenario():
+        created = await tools["create_part_list"](name="New")
+        await put_quantity("1", part_num, color_id, 4)
+        return created
+
+    created = run(scenario())
+    assert mirror.cached(created["id"]) is None
+    assert mirror.cached("1") is None
+    assert mirror.stats()["lists"] == 0
+
+
+def test_disabled_mirror_doesnt_serve_reads(fake, run, tools, monkeypatch):
+    part_num, color_id = next(iter(fake.lists[1]["parts"]))
+    get_part_in_list = tools["get_part_in_list"]
+    # Loaded while enabled, then switched off (as with several workers)
+    run(mirror.get("1"))
+    monkeypatch.setattr(mirror, "enabled", False)
+
+    run(put_quantity("1", part_num, color_id, 4))
+    fake.lists[1]["parts"][(part_num, color_id)] = 9  # edited elsewhere
+
+    assert run(get_part_in_list("1", part_num, color_id, 1))["quantity"] == 9
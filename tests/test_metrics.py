@@ -0,0 +1,42 @@
+from src.rebrickable_mcp.metrics import TOOL_DURATION, TOOLS_IN_FLIGHT, _instrument
+
+
+def calls(tool: str, outcome: str) -> int:
+    series = TOOL_DURATION._series.get((tool, outcome))
+    return sum(series[0]) if series else 0
+
+
+def test_tool_error_results_are_counted_as_errors():
+    failing = _instrument("test_failing", lambda: {"status": "error", "message": "Part not found"})
+    working = _instrument("test_working", lambda: {"status": "updated"})
+
+    failing()
+    working()
+
+    assert calls("test_failing", "error") == 1
+    assert calls("test_failing", "ok") == 0
+    assert calls("test_working", "ok") == 1
+
+
+def test_results_with_an_empty_error_field_are_ok():
+    # get_job / cancel_job return job rows, which always carry an "error" field
+    queued_job = _instrument("test_get_job", lambda: {"job_id": "abc", "status": "queued", "error": None})
+    failed_job = _instrument("test_failed_job", lambda: {"job_id": "abc", "status": "failed", "error": "boom"})
+
+    queued_job()
+    failed_job()
+
+    assert calls("test_get_job", "ok") == 1
+    assert calls("test_get_job", "error") == 0
+    assert calls("test_failed_job", "error") == 1
+
+
+def test_sync_tools_count_as_in_flight():
+    seen = []
+    tool = _instrument("test_sync", lambda: seen.append(TOOLS_IN_FLIGHT._values.get((), 0)) or {})
+    before = TOOLS_IN_FLIGHT._values.get((), 0)
+
+    tool()
+
+    assert seen == [before + 1]
+    assert TOOLS_IN_FLIGHT._values.get((), 0) == before
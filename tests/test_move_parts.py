@@ -0,0 +1,78 @@
+import httpx
+import pytest
+
+from src.rebrickable_mcp import api
+from src.rebrickable_mcp.jobs import Inline
+from src.rebrickable_mcp.list_mirror import mirror
+from src.rebrickable_mcp.list_ops import fetch_quantities, move_parts
+
+
+def everything_in(fake, list_id: int) -> list[dict]:
+    return [
+        {"part_num": part_num, "color_id": color_id, "quantity": quantity}
+        for (part_num, color_id), quantity in fake.lists[list_id]["parts"].items()
+    ]
+
+def part_in_neither_list(fake) -> tuple[str, int]:
+    for part in fake.catalog.parts:
+        key = (part[0], 5)
+        if all(key not in data["parts"] for data in fake.lists.values()):
+            return key
+    raise AssertionError("catalog too small")
+
+
+def test_emptying_an_unchanged_source_recreates_it(fake, run):
+    moved = everything_in(fake, 1)
+    before = dict(fake.lists[2]["parts"])
+
+    result = run(move_parts(Inline(), "1", "2", moved))
+
+    assert result["status"] == "moved"
+    assert result["source_list_recreated"] is True
+    assert 1 not in fake.lists
+    assert fake.lists[int(result["new_source_list_id"])]["parts"] == {}
+    for part in moved:
+        key = (part["part_num"], part["color_id"])
+        assert fake.lists[2]["parts"][key] == before.get(key, 0) + part["quantity"]
+
+
+@pytest.mark.parametrize("mirror_enabled", [True, False])
+def test_source_changed_since_planning_isnt_deleted(fake, run, monkeypatch, mirror_enabled):
+    monkeypatch.setattr(mirror, "enabled", mirror_enabled)
+    moved = everything_in(fake, 1)
+    # Planning reads the list from the mirror or the response cache - load it there first
+    run(fetch_quantities("1"))
+    # ...then add to it behind the server's back
+    extra = part_in_neither_list(fake)
+    fake.lists[1]["parts"][extra] = 7
+
+    result = run(move_parts(Inline(), "1", "2", moved))
+
+    assert result["status"] == "moved"
+    assert "new_source_list_id" not in result
+    assert fake.lists[1]["parts"] == {extra: 7}
+    assert all(r["status"] == "deleted" for r in result["source_results"])
+
+
+def test_bulk_add_that_landed_before_failing_isnt_reported_as_an_error(fake, run, monkeypatch):
+    monkeypatch.setattr(fake, "bulk", "reject")
+    moved = everything_in(fake, 1)[:20]
+    send = api._send
+    failures = []
+
+    async def bulk_applied_then_500(client, method, url, params, data, headers=None):
+        response = await send(client, method, url, params, data, headers)
+        if method == "POST" and isinstance(data, list) and not failures:
+            failures.append(url)
+            return httpx.Response(500, request=response.request)
+        return response
+
+    monkeypatch.setattr(api, "_send", bulk_applied_then_500)
+    result = run(move_parts(Inline(), "1", "2", moved))
+
+    assert failures
+    assert result["status"] == "moved"
+    assert any(r["status"] == "added" for r in result["destination_results"])
+    assert not any(r["status"] == "error" for r in result["destination_results"])
+    for part in moved:
+        assert (part["part_num"], part["color_id"]) not in fake.lists[1]["parts"]
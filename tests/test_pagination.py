@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from src.rebrickable_mcp.api import fetch_all, iter_pages
+from src.rebrickable_mcp.list_ops import parts_endpoint
+
+ROUTE = "GET /users/{user_token}/partlists/{list_id:int}/parts/"
+
+
+def test_pages_follow_next_links(fake, run, monkeypatch):
+    monkeypatch.setattr(fake, "max_page_size", 40)
+
+    async def pages():
+        return [page async for page in iter_pages(parts_endpoint("1"))]
+
+    pages = run(pages())
+
+    assert [len(page) for page in pages] == [40] * 7 + [20]
+    keys = [(item["part"]["part_num"], item["color"]["id"]) for page in pages for item in page]
+    assert keys == list(fake.lists[1]["parts"])
+    assert fake.requests[ROUTE] == 8
+
+
+def test_stopping_early_doesnt_fetch_everything(fake, run, monkeypatch):
+    monkeypatch.setattr(fake, "max_page_size", 10)
+
+    async def first_page():
+        pages = iter_pages(parts_endpoint("1"), prefetch=2)
+        page = await anext(pages)
+        await pages.aclose()
+        return page
+
+    assert len(run(first_page())) == 10
+    assert fake.requests[ROUTE] <= 4  # the page read, plus at most the prefetched ones
+
+
+def test_errors_reach_the_consumer(fake, run):
+    with pytest.raises(httpx.HTTPStatusError):
+        run(fetch_all(parts_endpoint("999")))
+
+
+def test_all_pages_tool_mode(fake, run, tools, monkeypatch):
+    monkeypatch.setattr(fake, "max_page_size", 50)
+    monkeypatch.setattr("src.rebrickable_mcp.list_mirror.mirror.enabled", False)
+
+    listed = run(tools["get_parts_from_list_id"]("2", all_pages=True))
+    one_page = run(tools["get_parts_from_list_id"]("2", page_size=500))
+
+    assert listed["count"] == len(listed["results"]) == 300
+    assert len(one_page["results"]) == 50
+    assert one_page["next"] is not None
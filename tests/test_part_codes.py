@@ -0,0 +1,21 @@
+from src.rebrickable_mcp.part_codes import COLOR_BITS, PartCodes, pack_key, unpack_key
+
+
+def test_packed_keys_round_trip_and_sort_by_part_then_color():
+    keys = [(0, -1), (0, 0), (0, 9999), (1, -1), ((1 << 20) + 3, 5)]
+
+    packed = [pack_key(code, color_id) for code, color_id in keys]
+
+    assert [unpack_key(key) for key in packed] == keys
+    assert packed == sorted(packed)
+    assert pack_key(1, -1) == 1 << COLOR_BITS  # "unknown" color -1 still packs to a valid key
+
+
+def test_part_codes_are_positions_in_sorted_order():
+    parts = PartCodes(["3001", "3001old", "3003", "3020pr0001"])
+
+    assert [parts.code(part_num) for part_num in ("3001", "3001old", "3003", "3020pr0001")] == [0, 1, 2, 3]
+    assert parts[parts.code("3003")] == "3003"
+    assert parts.code("3002") is None
+    assert parts.code("9999") is None  # past the end
+    assert len(parts) == 4
@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+from src.rebrickable_mcp.rate_limit import SQLiteTokenBucket, TokenBucket
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def bucket(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteTokenBucket(tmp_path / "bucket.sqlite3", rate=20, burst=3)
+    return TokenBucket(rate=20, burst=3)
+
+
+def test_burst_goes_out_at_once_then_waits_for_refill(bucket, loop):
+    async def scenario():
+        burst = [await bucket.acquire() for _ in range(3)]
+        return burst, await bucket.acquire()
+
+    burst, waited = loop.run_until_complete(scenario())
+    assert burst == [0.0, 0.0, 0.0]
+    assert 0.02 < waited < 0.2
+
+
+def test_penalty_pauses_every_acquire(bucket, loop):
+    async def scenario():
+        await bucket.penalize(0.2)
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    assert loop.run_until_complete(scenario()) >= 0.15
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from src.rebrickable_mcp import api
+from src.rebrickable_mcp.api import call_api, response_cache
+from src.rebrickable_mcp.list_ops import part_endpoint
+from src.rebrickable_mcp.response_cache import CacheEntry, ResponseCache
+
+
+def test_write_during_an_inflight_get_isnt_cached_stale(fake, run, monkeypatch):
+    (part_num, color_id), quantity = next(iter(fake.lists[1]["parts"].items()))
+    endpoint = part_endpoint("1", part_num, color_id)
+    send = api._send
+
+    async def slow_get(client, method, *args, **kwargs):
+        # The fake has answered with the old quantity; the body is still on its way back
+        response = await send(client, method, *args, **kwargs)
+        if method == "GET":
+            await asyncio.sleep(0.3)
+        return response
+
+    async def scenario():
+        monkeypatch.setattr(api, "_send", slow_get)
+        read = asyncio.ensure_future(call_api(endpoint))
+        await asyncio.sleep(0.1)
+        await call_api(endpoint, data={"quantity": quantity + 100}, method="PUT")
+        before_write = await read
+        monkeypatch.setattr(api, "_send", send)
+        return before_write, await call_api(endpoint)
+
+    discarded = response_cache.discarded
+    before_write, after_write = run(scenario())
+    assert before_write["quantity"] == quantity
+    assert after_write["quantity"] == quantity + 100
+    assert response_cache.discarded == discarded + 1
+
+
+def test_reads_without_a_write_are_cached(fake, run):
+    endpoint = part_endpoint("1", *next(iter(fake.lists[1]["parts"])))
+    route = "GET /users/{user_token}/partlists/{list_id:int}/parts/{part_num}/{color_id:int}/"
+
+    async def scenario():
+        await call_api(endpoint)
+        await call_api(endpoint)
+
+    run(scenario())
+    assert fake.requests[route] == 1
+
+
+def test_reads_after_a_write_dont_join_one_in_flight_before_it(fake, run, monkeypatch):
+    (part_num, color_id), quantity = next(iter(fake.lists[1]["parts"].items()))
+    endpoint = part_endpoint("1", part_num, color_id)
+    send = api._send
+
+    async def slow_get(client, method, *args, **kwargs):
+        response = await send(client, method, *args, **kwargs)
+        if method == "GET":
+            await asyncio.sleep(0.3)
+        return response
+
+    async def scenario():
+        monkeypatch.setattr(api, "_send", slow_get)
+        first = asyncio.ensure_future(call_api(endpoint))
+        joined = asyncio.ensure_future(call_api(endpoint))
+        await asyncio.sleep(0.1)
+        await call_api(endpoint, data={"quantity": quantity + 100}, method="PUT")
+        after = await call_api(endpoint)  # still overlapping the first read
+        monkeypatch.setattr(api, "_send", send)
+        return await first, await joined, after, await call_api(endpoint)
+
+    first, joined, after, cached = run(scenario())
+    assert first["quantity"] == joined["quantity"] == quantity
+    assert after["quantity"] == cached["quantity"] == quantity + 100
+
+
+def test_shared_cache_doesnt_replay_its_own_invalidations(tmp_path, loop):
+    path = tmp_path / "responses.sqlite3"
+    this, other = ResponseCache(1 << 20, path, shared=True), ResponseCache(1 << 20, path, shared=True)
+    entry = CacheEntry(b"{}", time.time() + 60)
+
+    async def scenario():
+        await this.invalidate_prefix("/lists/1/")
+        generation = this.generation()
+        await this.put("/lists/1/parts", entry, generation)
+        kept = await this.get("/lists/1/parts")
+        await other.invalidate_prefix("/lists/1/")
+        return kept, generation, await this.get("/lists/1/parts")
+
+    kept, generation, after_other = loop.run_until_complete(scenario())
+    assert kept is entry
+    assert this.discarded == 0
+    assert after_other is None  # another process's invalidation still applies
+    assert this.generation() == generation + 1
@@ -0,0 +1,51 @@
+import pytest
+
+from src.rebrickable_mcp.part_codes import PartCodes
+from src.rebrickable_mcp.search_index import PartSearchIndex, _within_edits
+
+
+@pytest.fixture
+def index(catalog) -> PartSearchIndex:
+    return PartSearchIndex.build(catalog, PartCodes.build(catalog))
+
+
+def test_postings_hold_sorted_part_codes(index):
+    bricks = sorted(index.parts.code(p) for p in ("3001", "3001old", "3003", "3622"))
+
+    assert list(index.words.get("brick")) == bricks
+    assert list(index.words.get("plate")) == [index.parts.code("3020")]
+    assert index.words.get("tile") is None
+    # Molds are findable by each other's number
+    assert list(index.numbers.get("3001")) == sorted(index.parts.code(p) for p in ("3001", "3001old"))
+
+
+def test_exact_matches_rank_before_prefix_ones(index):
+    ranked = index.search("brick")
+
+    # The wall is only a prefix match, through its category "Bricks", despite its shorter name
+    assert ranked == ["3001", "3003", "3622", "3001old", "3245"]
+
+
+def test_part_number_beats_name_and_ties_break_on_name_length(index):
+    assert index.search("3001") == ["3001", "3001old"]
+    assert index.search("brick 2 4") == ["3001", "3001old"]
+    assert index.search("brick", part_cat_id=14) == []
+
+
+def test_misspelt_words_match_by_edit_distance(index):
+    assert index.search("brik") == ["3001", "3003", "3622", "3001old"]
+    assert index.search("plaet 2") == ["3020"]  # adjacent letters swapped
+    assert index.search("brock") == ["3001", "3003", "3622", "3001old"]
+    assert index.search("brxxk") == []  # two edits on a short word is too far
+
+
+def test_prefix_matches_rank_before_misspellings(index):
+    # "plat" starts "plate"; the tile's "flat" is one letter off, and its name shorter
+    assert index.search("plat") == ["3020", "3069b"]
+
+
+def test_edit_distance_limit():
+    assert _within_edits("brick", "brik", 1)
+    assert _within_edits("plate", "plaet", 1)
+    assert not _within_edits("brick", "block", 1)
+    assert _within_edits("brick", "block", 2)
@@ -0,0 +1,19 @@
+from src.rebrickable_mcp.shaping import compact, shape
+
+ITEM = {
+    "quantity": 2,
+    "part": {"part_num": "3001", "name": "Brick 2 x 4", "part_img_url": "https://example.com/3001.jpg"},
+    "color": {"id": 5, "name": "Red", "external_ids": {}},
+}
+
+
+def test_fields_select_dotted_paths_from_each_result():
+    shaped = shape({"count": 1, "results": [ITEM]}, fields=["part.part_num", "quantity"])
+    assert shaped == {"count": 1, "results": [{"part.part_num": "3001", "quantity": 2}]}
+
+
+def test_compact_replaces_references_with_ids_and_lists_with_tables():
+    assert compact([ITEM, {**ITEM, "quantity": 3}]) == {
+        "columns": ["quantity", "part_num", "color_id"],
+        "rows": [[2, "3001", 5], [3, "3001", 5]],
+    }
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from src.rebrickable_mcp.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run(loop):
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"body"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("key", fetch) for _ in range(5)))
+
+    assert loop.run_until_complete(scenario()) == [b"body"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["collapsed"] == 4
+
+
+def test_errors_reach_every_waiter_and_arent_kept(loop):
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("key", failing) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(error, ValueError) for error in loop.run_until_complete(scenario()))
+    assert flight.stats()["in_flight"] == 0
+    with pytest.raises(ValueError):
+        loop.run_until_complete(flight.run("key", failing))
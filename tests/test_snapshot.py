@@ -0,0 +1,80 @@
+import os
+from array import array
+
+import pytest
+
+from src.rebrickable_mcp import cache
+from src.rebrickable_mcp.snapshot import Snapshot, write_snapshot
+
+
+def test_sections_map_back_unchanged(tmp_path):
+    path = tmp_path / "test.snapshot"
+    sections = {
+        "small": array("H", [1, 2, 65535]),
+        "offsets": array("I", range(1000)),
+        "keys": array("Q", [1 << 40, 3]),
+        "blob": b"\x01\x02\x03",
+        "names": ["3001", "Brick 2 x 4", ""],
+        "empty": [],
+    }
+
+    write_snapshot(path, sections, meta={"version": 1})
+    snapshot = Snapshot(path)
+
+    assert snapshot.meta == {"version": 1}
+    for name, value in sections.items():
+        assert name in snapshot
+        mapped = snapshot[name]
+        assert (list(mapped) if isinstance(value, array) else mapped) == (list(value) if isinstance(value, array) else value)
+    # Arrays are views over the mapping, aligned for their item size
+    assert isinstance(snapshot["keys"], memoryview)
+    assert snapshot._sections["keys"][0] % 8 == 0
+
+
+@pytest.mark.parametrize("cut", [4, 20, 40])
+def test_truncated_file_is_rejected(tmp_path, cut):
+    path = tmp_path / "test.snapshot"
+    write_snapshot(path, {"offsets": array("I", range(1000))}, meta={})
+    data = path.read_bytes()
+    path.write_bytes(data[:cut] if cut < 40 else data[:-cut])
+
+    with pytest.raises(ValueError):
+        Snapshot(path)
+
+
+def test_index_snapshot_round_trip(catalog):
+    colors = {0: {"name": "Black", "rgb": "05131D", "is_trans": False}}
+    search, sets = cache._build_indexes(catalog)
+    cache.save_snapshot(colors, search, sets, cache.SNAPSHOT_PATH)
+
+    loaded_colors, loaded_search, loaded_sets = cache._read_snapshot(cache.SNAPSHOT_PATH)
+
+    assert loaded_colors == colors
+    for query in ("brick", "3001", "brik", "plat"):
+        assert loaded_search.search(query) == search.search(query)
+    assert loaded_sets.set_nums == sets.set_nums
+    for s in range(len(sets.set_nums)):
+        assert loaded_sets.needs(s) == sets.needs(s)
+    owned = sets.encode({("3001", 5): 2, ("3020", 0): 5})
+    assert loaded_sets.rank(owned) == sets.rank(owned)
+
+
+def test_stale_or_truncated_index_snapshot_isnt_loaded(catalog, monkeypatch):
+    search, sets = cache._build_indexes(catalog)
+    cache.save_snapshot({}, search, sets, cache.SNAPSHOT_PATH)
+    assert cache._read_snapshot(cache.SNAPSHOT_PATH) is not None
+
+    version = cache.SNAPSHOT_VERSION
+    monkeypatch.setattr(cache, "SNAPSHOT_VERSION", version + 1)
+    assert cache._read_snapshot(cache.SNAPSHOT_PATH) is None
+    monkeypatch.setattr(cache, "SNAPSHOT_VERSION", version)
+
+    # Built from an older catalog
+    mtime = cache.CATALOG_DB.stat().st_mtime
+    os.utime(cache.CATALOG_DB, (mtime + 10, mtime + 10))
+    assert cache._read_snapshot(cache.SNAPSHOT_PATH) is None
+
+    cache.save_snapshot({}, search, sets, cache.SNAPSHOT_PATH)
+    data = cache.SNAPSHOT_PATH.read_bytes()
+    cache.SNAPSHOT_PATH.write_bytes(data[:len(data) // 2])
+    assert cache._read_snapshot(cache.SNAPSHOT_PATH) is None
@@ -0,0 +1,64 @@
+import logging
+from pathlib import Path
+
+from src.rebrickable_mcp.startup_profile import PROFILE_ENV, _parse, phase, profile_startup
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importtime_and_phase_lines_are_parsed():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   _io",
+        "import time:      2500 |       4000 | mcp.server",
+        "startup-phase:warm_start\t0.012500",
+        "some other warning",
+    ])
+
+    imports, phases = _parse(stderr)
+
+    assert imports == [("_io", 0.00012, 0.00012, 1), ("mcp.server", 0.0025, 0.004, 0)]
+    assert phases == [("warm_start", 0.0125)]
+
+
+def test_phases_are_only_reported_when_profiling(capsys, monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    with phase("quiet"):
+        pass
+    assert capsys.readouterr().err == ""
+
+    monkeypatch.setenv(PROFILE_ENV, "1")
+    with phase("loud"):
+        pass
+    name, seconds = _parse(capsys.readouterr().err)[1][0]
+    assert name == "loud" and seconds >= 0
+
+
+def test_profile_reports_a_cold_start(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # an empty cache, so nothing is loaded
+    monkeypatch.setenv("PYTHONPATH", str(ROOT))
+
+    report, total = profile_startup("src.main", "create_app", top=5)
+
+    assert total > 0
+    for phase_name in ("import mcp", "import tool modules", "warm_start", "register tools", "import web stack", "create app"):
+        assert f"  {phase_name}" in report
+    assert "Imports by top-level package" in report
+
+
+def test_server_start_is_logged_not_printed(cache_dir, monkeypatch, capsys, caplog):
+    import uvicorn
+
+    from src import main
+
+    monkeypatch.setattr(main, "MULTI_WORKER", False)
+    monkeypatch.setattr(main, "create_app", lambda: "app")
+    monkeypatch.setattr(uvicorn, "run", lambda app, **kwargs: None)
+    monkeypatch.setattr("sys.argv", ["server"])
+    monkeypatch.setenv("PORT", "8123")
+
+    with caplog.at_level(logging.INFO):
+        main.main()
+
+    assert "Starting Rebrickable MCP server on port 8123" in caplog.text
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.fixture
+def main(cache_dir, monkeypatch):
+    from src import main
+
+    monkeypatch.setattr(main, "MULTI_WORKER", False)
+    return main
+
+
+def paths(app) -> set[str]:
+    return {route.path for route in app.routes}
+
+
+def test_streamable_http_is_served_alongside_sse(main, monkeypatch):
+    monkeypatch.setattr(main, "TRANSPORTS", {"sse", "http"})
+
+    assert {"/sse", "/messages", "/mcp", "/health", "/metrics"} <= paths(main.create_app())
+
+
+@pytest.mark.parametrize("transport, served, absent", [("http", "/mcp", "/sse"), ("sse", "/sse", "/mcp")])
+def test_one_transport_alone(main, monkeypatch, transport, served, absent):
+    monkeypatch.setattr(main, "TRANSPORTS", {transport})
+
+    app_paths = paths(main.create_app())
+
+    assert served in app_paths
+    assert absent not in app_paths
+
+
+def test_multi_worker_sse_routes_messages_by_worker(main, monkeypatch):
+    monkeypatch.setattr(main, "TRANSPORTS", {"sse"})
+    monkeypatch.setattr(main, "MULTI_WORKER", True)
+
+    assert "/messages/{worker:int}/" in paths(main.create_app())
+
+
+@pytest.mark.parametrize("transports", [set(), {"sse", "websocket"}])
+def test_unknown_transports_are_refused(main, monkeypatch, transports):
+    monkeypatch.setattr(main, "TRANSPORTS", transports)
+
+    with pytest.raises(ValueError, match="REBRICKABLE_TRANSPORTS"):
+        main.create_app()
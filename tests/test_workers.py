@@ -0,0 +1,105 @@
+import os
+import time
+
+import pytest
+
+from src.rebrickable_mcp.rate_limit import SQLiteTokenBucket
+from src.rebrickable_mcp.workers import MessageRelay
+
+
+def test_workers_draw_from_one_rate_budget(tmp_path, loop):
+    path = tmp_path / "ratelimit.sqlite3"
+    first, second = SQLiteTokenBucket(path, rate=10, burst=3), SQLiteTokenBucket(path, rate=10, burst=3)
+
+    async def scenario():
+        burst = [await first.acquire(), await second.acquire(), await first.acquire()]
+        return burst, await second.acquire()
+
+    burst, waited = loop.run_until_complete(scenario())
+    assert burst == [0.0, 0.0, 0.0]
+    assert waited > 0.05  # the burst was spent between them
+
+
+def test_a_429_in_one_worker_pauses_the_others(tmp_path, loop):
+    path = tmp_path / "ratelimit.sqlite3"
+    first, second = SQLiteTokenBucket(path, rate=100, burst=5), SQLiteTokenBucket(path, rate=100, burst=5)
+
+    async def scenario():
+        await first.penalize(0.2)
+        start = time.monotonic()
+        await second.acquire()
+        return time.monotonic() - start
+
+    assert loop.run_until_complete(scenario()) >= 0.15
+
+
+def echo_app(name: str):
+    async def app(scope, receive, send):
+        message = await receive()
+        body = f"{name} {scope['method']} {scope['path']}?{scope['query_string'].decode()} {message['body'].decode()}"
+        await send({"type": "http.response.start", "status": 202, "headers": [(b"x-worker", name.encode())]})
+        await send({"type": "http.response.body", "body": body.encode()})
+    return app
+
+
+async def post(relay: MessageRelay, worker: int, body: bytes) -> tuple[int, dict, bytes]:
+    scope = {
+        "type": "http", "method": "POST", "scheme": "http", "path": f"/messages/{worker}/", "root_path": "",
+        "http_version": "1.1", "query_string": b"session_id=abc", "headers": [(b"content-type", b"application/json")],
+        "path_params": {"worker": worker},
+    }
+    chunks = [body[:3], body[3:]]
+    response = {}
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        response.setdefault(message["type"], message)
+
+    await relay(scope, receive, send)
+    start = response["http.response.start"]
+    return start["status"], dict(start["headers"]), response["http.response.body"]["body"]
+
+
+@pytest.fixture
+def relays(tmp_path, monkeypatch, loop):
+    monkeypatch.chdir(tmp_path)  # sockets go under cache/workers/
+    owner = MessageRelay(echo_app("owner"))
+    owner.pid = os.getppid()  # stands in for another live worker process
+    local = MessageRelay(echo_app("local"))
+    loop.run_until_complete(owner.start())
+    loop.run_until_complete(local.start())
+    yield owner, local
+    loop.run_until_complete(local.stop())
+    loop.run_until_complete(owner.stop())
+
+
+def test_messages_for_another_worker_are_relayed_to_it(relays, loop):
+    owner, local = relays
+
+    status, headers, body = loop.run_until_complete(post(local, owner.pid, b'{"jsonrpc": "2.0"}'))
+
+    assert status == 202
+    assert headers[b"x-worker"] == b"owner"
+    assert body == f'owner POST /messages/{owner.pid}/?session_id=abc {{"jsonrpc": "2.0"}}'.encode()
+    assert local.stats()["forwarded"] == 1
+
+
+def test_messages_for_this_worker_are_handled_here(relays, loop):
+    owner, local = relays
+
+    status, headers, _ = loop.run_until_complete(post(local, local.pid, b"{}"))
+
+    assert (status, headers[b"x-worker"]) == (202, b"local")
+    assert local.stats()["forwarded"] == 0
+
+
+def test_messages_for_a_gone_worker_are_not_found(relays, loop):
+    owner, local = relays
+    loop.run_until_complete(owner.stop())
+
+    status, _, body = loop.run_until_complete(post(local, owner.pid, b"{}"))
+
+    assert (status, body) == (404, b"Could not find session")